@@ -15,7 +15,18 @@ from flask_login import LoginManager, login_user, logout_user, login_required, c
 from datetime import datetime, date, time, timedelta
 import os
 from config import config
-from models import db, Customer, Table, Reservation, User, find_available_tables, create_customer, create_reservation
+from models import (db, Customer, Table, Reservation, ReservationRecord, User, WaitlistEntry, find_available_tables,
+                    with_reservation_details, record_event)
+from booking import (parse_availability_query, parse_reservation_request, book_reservation, restaurant_stats,
+                     parse_hold_request, place_hold, parse_waitlist_request, join_waitlist, daily_summary,
+                     parse_availability_batch, batch_available_tables, slot_suggester, MAX_SUGGESTIONS)
+from waitlist import promote_waitlist, promote_for_table
+from table_assignment import optimize_day
+from page_cache import data_version
+from assets import asset_url
+from tenancy import DEFAULT_TENANT, current_tenant, merge_reports
+from outbox import read_events
+from idempotency import idempotent
 
 def create_app(config_name=None):
     """
@@ -36,6 +47,10 @@ def create_app(config_name=None):
     # Initialize extensions
     db.init_app(app)
     
+    # One database per restaurant location, chosen per request (TENANT_DATABASES)
+    from tenancy import init_tenancy
+    tenancy = init_tenancy(app)
+    
     # Initialize Flask-Login
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -44,36 +59,123 @@ def create_app(config_name=None):
     
     @login_manager.user_loader
     def load_user(user_id):
+        # User ids are per tenant database; a login only counts where it was made
+        if session.get('tenant', DEFAULT_TENANT) != current_tenant():
+            return None
         return User.query.get(int(user_id))
     
+    # Request latency and SQL metrics
+    metrics = None
+    if app.config.get('METRICS_ENABLED'):
+        from metrics import init_metrics
+        metrics = init_metrics(app)
+    
+    # Checkout holds on tables (Redis when REDIS_URL is set)
+    from holds import init_holds
+    init_holds(app)
+    
+    # Coalesce concurrent identical availability lookups within this worker
+    if app.config.get('AVAILABILITY_COALESCING'):
+        import singleflight
+        app.extensions['availability_flight'] = singleflight.SingleFlight('availability')
+        if metrics is not None:
+            metrics.add_collector(singleflight.render_metrics)
+    if tenancy is not None and metrics is not None:
+        metrics.add_collector(tenancy.registry.render_metrics)
+    
+    # Per-request SQL budgets (TestingConfig)
+    if app.config.get('QUERY_BUDGET') or app.config.get('QUERY_REPEAT_LIMIT'):
+        from query_budget import init_query_budget
+        init_query_budget(app)
+    
+    # Housekeeping jobs; the thread is started by whichever server runs the app
+    if app.config.get('SCHEDULER_ENABLED'):
+        from scheduler import init_scheduler
+        init_scheduler(app)
+    
+    # Cached database liveness probe for GET /api/status, refreshed by every worker
+    from status import init_status
+    init_status(app)
+    
+    # Reservation and table change events, delivered to in-process subscribers
+    from outbox import init_outbox
+    init_outbox(app)
+    
     # Register blueprints and routes
     register_routes(app)
     
+    # gzip/brotli for pages and JSON, negotiated per request
+    if app.config.get('RESPONSE_COMPRESSION'):
+        from compression import init_compression
+        init_compression(app)
+    
+    # Fingerprinted, precompressed CSS/JS (assets.py) and the asset_url() template helper
+    from assets import init_assets
+    init_assets(app)
+    
+    # Compiled templates on disk, cached fragments and pages pre-rendered at boot
+    from page_cache import init_template_cache
+    init_template_cache(app, static_pages=[('index', 'index.html'), ('login', 'login.html')])
+
     return app
 
+def warm_up(app, connections=0, templates=True):
+    """
+    Pay cold-start costs before the first request arrives
+
+    Called from the gunicorn hooks in gunicorn.conf.py: templates are
+    compiled once in the master (forked workers inherit them) and each
+    worker opens its own pool connections after the fork.
+
+    Args:
+        app (Flask): Application to warm up
+        connections (int): Number of pool connections to open
+        templates (bool): Compile every template into the Jinja cache
+    """
+    if templates:
+        for template_name in app.jinja_env.list_templates():
+            app.jinja_env.get_template(template_name)
+
+    if connections:
+        with app.app_context():
+            # Never open more than the pool keeps, overflow would be discarded
+            pool_size = getattr(db.engine.pool, 'size', lambda: connections)()
+            opened = []
+            try:
+                for _ in range(min(connections, pool_size)):
+                    connection = db.engine.connect()
+                    connection.exec_driver_sql('SELECT 1')
+                    opened.append(connection)
+            except Exception as e:
+                app.logger.warning(f"Database warm-up failed: {e}")
+            finally:
+                # Closing returns the connections to the pool, still open
+                for connection in opened:
+                    connection.close()
+
 def register_routes(app):
     """Register all application routes"""
     
+    # Nearest free slots for a party, offered when a requested time is full
+    suggest = slot_suggester(app.config, app.extensions['holds'])
+    
+    @app.template_global()
+    def restaurant_name(tenant=None):
+        """Display name of the current (or given) restaurant location"""
+        tenancy = app.extensions.get('tenancy')
+        if tenancy is not None:
+            return tenancy.restaurant_name(tenant)
+        return app.config.get('RESTAURANT_NAME', 'Bella Vista Restaurant')
+    
     @app.route('/')
     def index():
         """Main page - Customer portal"""
-        return render_template('index.html')
+        return app.extensions['static_pages'].response('index', current_user) or render_template('index.html')
     
     @app.route('/favicon.ico')
     def favicon():
-        """Serve favicon - direct emoji response"""
-        return "🍽️", 200, {'Content-Type': 'text/plain; charset=utf-8'}
-    
-    @app.route('/static/favicon.svg')
-    def favicon_svg():
-        """Serve SVG favicon directly"""
-        from flask import send_from_directory, current_app
-        import os
-        return send_from_directory(
-            os.path.join(current_app.root_path, 'static'),
-            'favicon.svg', 
-            mimetype='image/svg+xml'
-        )
+        """Send browsers that ask for /favicon.ico to the fingerprinted SVG icon"""
+        return redirect(asset_url('favicon.svg'))
     
     @app.route('/debug')
     def debug():
@@ -84,7 +186,7 @@ def register_routes(app):
             'status': 'working',
             'static_folder': app.static_folder,
             'static_url_path': app.static_url_path,
-            'static_files_exist': os.path.exists(os.path.join(app.root_path, 'static', 'favicon.svg')),
+            'static_files_exist': os.path.exists(os.path.join(app.root_path, 'static', 'dist', 'manifest.json')),
             'emoji_test': '🍽️ 🇺🇸 🇳🇵 🇬🇧',
             'timestamp': datetime.now().isoformat()
         })
@@ -98,6 +200,25 @@ def register_routes(app):
             'version': '1.0.0'
         })
     
+    @app.route('/api/status')
+    def system_status():
+        """
+        Online indicator polled by the customer portal
+        
+        Answers from the probe cached in status.py, so however many tabs
+        poll, a worker checks the database at most once per interval.
+        """
+        snapshot = app.extensions['status_probe'].snapshot()
+        online = snapshot['database'] == 'ok'
+        response = jsonify({
+            'status': 'online' if online else 'degraded',
+            **snapshot,
+            'poll_seconds': app.config['STATUS_POLL_SECONDS']
+        })
+        response.status_code = 200 if online else 503
+        response.cache_control.no_store = True
+        return response
+    
     @app.route('/api/tables/available')
     def get_available_tables():
         """
@@ -112,35 +233,107 @@ def register_routes(app):
             JSON: List of available tables
         """
         try:
-            reservation_date = request.args.get('date')
-            reservation_time = request.args.get('time')
-            party_size = request.args.get('party_size', type=int)
+            query, error = parse_availability_query(request.args)
+            if error:
+                return jsonify({'error': error}), 400
             
-            if not all([reservation_date, reservation_time, party_size]):
-                return jsonify({'error': 'Missing required parameters'}), 400
+            # Find available tables; identical concurrent requests share one
+            # lookup, so the shared result is plain dicts, not session-bound rows
+            def lookup():
+                # Tables held by customers checking out count as taken
+                held_tables = app.extensions['holds'].held_tables(*query[:2])
+                return [table.to_dict() for table in find_available_tables(*query, exclude_table_ids=held_tables)]
             
-            # Parse date and time
-            res_date = datetime.strptime(reservation_date, '%Y-%m-%d').date()
-            res_time = datetime.strptime(reservation_time, '%H:%M').time()
-            
-            # Find available tables
-            available_tables = find_available_tables(res_date, res_time, party_size)
+            flight = app.extensions.get('availability_flight')
+            available_tables = flight.do((current_tenant(), *query), lookup) if flight else lookup()
             
             return jsonify({
-                'available_tables': [table.to_dict() for table in available_tables],
+                'available_tables': available_tables,
                 'count': len(available_tables)
             })
             
-        except ValueError as e:
-            return jsonify({'error': 'Invalid date or time format'}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/tables/available/batch', methods=['POST'])
+    def get_available_tables_batch():
+        """
+        API endpoint answering many availability queries in one request
+        
+        Expected JSON payload:
+        {
+            "queries": [{"date": "YYYY-MM-DD", "time": "HH:MM", "party_size": int}, ...]
+        }
+        
+        Returns:
+            JSON: One result per query, in order, with the ids of its
+            available tables (smallest first); each table's details once
+        """
+        queries, error = parse_availability_batch(request.get_json(silent=True),
+                                                  app.config['AVAILABILITY_BATCH_LIMIT'])
+        if error:
+            return jsonify({'error': error}), 400
+        
+        try:
+            results, tables = batch_available_tables(queries, holds=app.extensions['holds'])
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        
+        return jsonify({
+            'results': [{
+                'date': reservation_date.isoformat(),
+                'time': reservation_time.strftime('%H:%M'),
+                'party_size': party_size,
+                'table_ids': table_ids,
+                'count': len(table_ids)
+            } for (reservation_date, reservation_time, party_size), table_ids in zip(queries, results)],
+            'tables': tables
+        })
+    
+    @app.route('/api/availability/next')
+    def next_available_slots():
+        """
+        API endpoint suggesting the free slots nearest to a requested time
+        
+        Query Parameters:
+            date (str): Requested date (YYYY-MM-DD)
+            time (str): Requested time (HH:MM)
+            party_size (int): Number of people
+            limit (int): Number of suggestions (default AVAILABILITY_SUGGESTIONS)
+            
+        Returns:
+            JSON: Up to limit (date, time, table) options within the opening
+            hours and booking window, nearest first
+        """
+        try:
+            query, error = parse_availability_query(request.args)
+            if error:
+                return jsonify({'error': error}), 400
+            try:
+                limit = int(request.args.get('limit') or app.config['AVAILABILITY_SUGGESTIONS'])
+            except ValueError:
+                limit = 0
+            if not 1 <= limit <= MAX_SUGGESTIONS:
+                return jsonify({'error': f'limit must be between 1 and {MAX_SUGGESTIONS}'}), 400
+            
+            suggestions = suggest(*query, limit=limit)
+            return jsonify({
+                'suggestions': suggestions,
+                'count': len(suggestions)
+            })
+            
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     @app.route('/api/reservations', methods=['POST'])
+    @idempotent
     def create_reservation_api():
         """
         API endpoint to create a new reservation
         
+        Retries carrying the same Idempotency-Key header get the first
+        attempt's response back instead of booking again (idempotency.py).
+        
         Expected JSON payload:
         {
             "first_name": "string",
@@ -150,74 +343,128 @@ def register_routes(app):
             "date": "YYYY-MM-DD",
             "time": "HH:MM",
             "party_size": int,
-            "special_requests": "string" (optional)
+            "special_requests": "string" (optional),
+            "hold_token": "string" (optional, from POST /api/holds)
         }
         
         Returns:
-            JSON: Reservation details or error message
+            JSON: Reservation details, or an error message; when the time is
+            full (409) the nearest free slots are listed under 'suggestions'
         """
         try:
-            data = request.get_json()
-            
-            # Validate required fields
-            required_fields = ['first_name', 'last_name', 'phone', 'date', 'time', 'party_size']
-            for field in required_fields:
-                if field not in data:
-                    return jsonify({'error': f'Missing required field: {field}'}), 400
+            fields, error = parse_reservation_request(request.get_json())
+            if error:
+                return jsonify({'error': error}), 400
             
-            # Parse date and time
-            res_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
-            res_time = datetime.strptime(data['time'], '%H:%M').time()
+            body, status = book_reservation(fields, holds=app.extensions['holds'], suggest=suggest)
+            return jsonify(body), status
             
-            # Validate future date
-            if res_date < date.today():
-                return jsonify({'error': 'Reservation date must be in the future'}), 400
-            
-            # Create or get customer
-            customer = create_customer(
-                first_name=data['first_name'],
-                last_name=data['last_name'],
-                phone=data['phone'],
-                email=data.get('email')
-            )
-            
-            if not customer:
-                return jsonify({'error': 'Failed to create customer'}), 500
-            
-            # Find available table
-            available_tables = find_available_tables(res_date, res_time, data['party_size'])
-            
-            if not available_tables:
-                return jsonify({
-                    'error': f'No tables available for {data["party_size"]} people on {data["date"]} at {data["time"]}'
-                }), 409
-            
-            # Use the smallest suitable table
-            selected_table = available_tables[0]
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/holds', methods=['POST'])
+    def create_hold():
+        """
+        API endpoint to hold a table while the customer checks out
+        
+        Expected JSON payload:
+        {
+            "date": "YYYY-MM-DD",
+            "time": "HH:MM",
+            "party_size": int,
+            "table_id": int (optional, defaults to the smallest suitable table)
+        }
+        
+        Returns:
+            JSON: Hold token, expiry and held table, or error message
+        """
+        try:
+            hold_request, error = parse_hold_request(request.get_json(silent=True))
+            if error:
+                return jsonify({'error': error}), 400
             
-            # Create reservation
-            reservation = create_reservation(
-                customer_id=customer.customer_id,
-                table_id=selected_table.table_id,
-                reservation_date=res_date,
-                reservation_time=res_time,
-                party_size=data['party_size'],
-                special_requests=data.get('special_requests')
-            )
+            body, status = place_hold(hold_request, app.extensions['holds'], app.config['HOLD_TTL_SECONDS'])
+            return jsonify(body), status
             
-            if not reservation:
-                return jsonify({'error': 'Failed to create reservation'}), 500
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/holds/<hold_token>', methods=['DELETE'])
+    def release_hold(hold_token):
+        """API endpoint to give a held table back before the hold expires"""
+        if app.extensions['holds'].release(hold_token):
+            return jsonify({'message': 'Hold released'})
+        return jsonify({'error': 'Hold not found or already expired'}), 404
+    
+    @app.route('/api/waitlist', methods=['POST'])
+    def create_waitlist_entry():
+        """
+        API endpoint to join the waitlist when no table is free
+        
+        Expected JSON payload:
+        {
+            "first_name": "string",
+            "last_name": "string",
+            "phone": "string",
+            "email": "string" (optional),
+            "date": "YYYY-MM-DD",
+            "earliest_time": "HH:MM",
+            "latest_time": "HH:MM",
+            "party_size": int,
+            "special_requests": "string" (optional),
+            "priority": int (optional, staff only)
+        }
+        
+        Returns:
+            JSON: Waitlist entry, plus the reservation if a table was free
+        """
+        try:
+            fields, error = parse_waitlist_request(request.get_json(silent=True))
+            if error:
+                return jsonify({'error': error}), 400
+            if not (current_user.is_authenticated and current_user.is_staff()):
+                fields['priority'] = 0
             
-            return jsonify({
-                'message': 'Reservation created successfully',
-                'reservation': reservation.to_dict()
-            }), 201
+            body, status = join_waitlist(fields, app.config['TIME_SLOT_DURATION'], holds=app.extensions['holds'])
+            return jsonify(body), status
             
-        except ValueError as e:
-            return jsonify({'error': 'Invalid date or time format'}), 400
         except Exception as e:
+            db.session.rollback()
             return jsonify({'error': str(e)}), 500
     
+    @app.route('/api/waitlist')
+    @login_required
+    def list_waitlist():
+        """API endpoint listing waitlist entries in the order they are served"""
+        if not current_user.is_staff():
+            return jsonify({'error': 'Access denied'}), 403
+        
+        query = WaitlistEntry.query.filter_by(status=request.args.get('status', 'waiting'))
+        if request.args.get('date'):
+            try:
+                query = query.filter_by(reservation_date=datetime.strptime(request.args['date'], '%Y-%m-%d').date())
+            except ValueError:
+                return jsonify({'error': 'Invalid date format'}), 400
+        
+        entries = query.options(db.joinedload(WaitlistEntry.customer)).order_by(
+            WaitlistEntry.reservation_date, WaitlistEntry.priority.desc(), WaitlistEntry.created_at).all()
+        return jsonify({'entries': [entry.to_dict() for entry in entries]})
+    
+    @app.route('/api/waitlist/<int:entry_id>', methods=['DELETE'])
+    @login_required
+    def remove_waitlist_entry(entry_id):
+        """API endpoint to take a customer off the waitlist"""
+        if not current_user.is_staff():
+            return jsonify({'error': 'Access denied'}), 403
+        
+        entry = WaitlistEntry.query.get_or_404(entry_id)
+        if entry.status != 'waiting':
+            return jsonify({'error': 'Entry is no longer waiting'}), 400
+        
+        entry.status = 'removed'
+        db.session.commit()
+        return jsonify({'message': 'Removed from the waitlist'})
+    
     @app.route('/login', methods=['GET', 'POST'])
     def login():
         """User login page"""
@@ -240,12 +487,13 @@ def register_routes(app):
                     db.session.commit()
                 
                 login_user(user)
+                session['tenant'] = current_tenant()
                 flash('Welcome to Admin Dashboard!', 'success')
                 return redirect(url_for('admin_dashboard'))
             else:
                 flash('Invalid username or password. Use: admin / admin123', 'error')
         
-        return render_template('login.html')
+        return app.extensions['static_pages'].response('login', current_user) or render_template('login.html')
     
     @app.route('/logout')
     @login_required
@@ -265,7 +513,7 @@ def register_routes(app):
         
         # Get today's reservations
         today = date.today()
-        today_reservations = Reservation.query.filter_by(reservation_date=today).all()
+        today_reservations = with_reservation_details(Reservation.query).filter_by(reservation_date=today).all()
         
         # Get statistics
         total_reservations = len(today_reservations)
@@ -300,7 +548,7 @@ def register_routes(app):
         
         # Get all reservations with pagination
         page = request.args.get('page', 1, type=int)
-        reservations = Reservation.query.order_by(Reservation.reservation_date.desc(), Reservation.reservation_time.desc()).paginate(
+        reservations = with_reservation_details(Reservation.query).order_by(Reservation.reservation_date.desc(), Reservation.reservation_time.desc()).paginate(
             page=page, per_page=app.config['RESERVATIONS_PER_PAGE'], error_out=False)
         
         return render_template('admin_reservations.html', reservations=reservations)
@@ -313,8 +561,9 @@ def register_routes(app):
             flash('Access denied. Staff privileges required.', 'error')
             return redirect(url_for('index'))
         
-        tables = Table.query.order_by(Table.table_number).all()
-        return render_template('admin_tables.html', tables=tables)
+        # The table list is only queried when its cached fragment is out of date
+        return render_template('admin_tables.html', tables_query=Table.query.order_by(Table.table_number),
+                               tables_version=data_version(Table))
     
     @app.route('/api/reservations/<int:reservation_id>/confirm', methods=['POST'])
     @login_required
@@ -342,10 +591,190 @@ def register_routes(app):
         
         if reservation.cancel():
             db.session.commit()
-            return jsonify({'message': 'Reservation cancelled successfully'})
+            
+            # Offer the freed table to the waitlist straight away
+            promoted = promote_waitlist(reservation.table_id, reservation.reservation_date,
+                                        reservation.reservation_time, holds=app.extensions['holds'])
+            return jsonify({
+                'message': 'Reservation cancelled successfully',
+                'waitlist_entry_id': promoted.entry_id if promoted else None
+            })
         else:
             return jsonify({'error': 'Cannot cancel this reservation'}), 400
     
+    @app.route('/api/reservations/<int:reservation_id>/complete', methods=['POST'])
+    @login_required
+    def complete_reservation(reservation_id):
+        """API endpoint to mark a reservation as completed"""
+        if not current_user.is_staff():
+            return jsonify({'error': 'Access denied'}), 403
+        
+        reservation = Reservation.query.get_or_404(reservation_id)
+        
+        if reservation.complete():
+            db.session.commit()
+            return jsonify({'message': 'Reservation completed successfully'})
+        else:
+            return jsonify({'error': 'Cannot complete this reservation'}), 400
+    
+    @app.route('/api/admin/optimize-tables', methods=['POST'])
+    @login_required
+    def optimize_table_assignments():
+        """
+        API endpoint to re-assign a day's upcoming reservations to tables
+        
+        Expected JSON payload (all optional):
+        {
+            "date": "YYYY-MM-DD" (defaults to today),
+            "dry_run": bool (report the moves without making them)
+        }
+        
+        Returns:
+            JSON: Moves, wasted seats before and after, and any conflicts
+        """
+        if not current_user.is_admin():
+            return jsonify({'error': 'Access denied. Admin privileges required.'}), 403
+        
+        data = request.get_json(silent=True) or {}
+        try:
+            service_date = datetime.strptime(data['date'], '%Y-%m-%d').date() if data.get('date') else date.today()
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid date format'}), 400
+        
+        try:
+            result = optimize_day(service_date, apply=not data.get('dry_run'), holds=app.extensions['holds'])
+            return jsonify(result), 409 if result['conflicts'] else 200
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/admin/tenants/report')
+    @login_required
+    def tenant_report():
+        """
+        API endpoint for the day's figures of every restaurant location
+        
+        Each tenant is queried on its own thread against its own pool; a
+        location that does not answer within TENANT_REPORT_TIMEOUT is
+        listed with an error instead of delaying the rest.
+        
+        Query Parameters:
+            date (str): Service date (YYYY-MM-DD), defaults to today
+            
+        Returns:
+            JSON: Summary per tenant and totals over the tenants that answered
+        """
+        # Only administrators of the default (head office) database see every location
+        if not current_user.is_admin() or current_tenant() != DEFAULT_TENANT:
+            return jsonify({'error': 'Access denied. Admin privileges required.'}), 403
+        
+        try:
+            service_date = (datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+                            if request.args.get('date') else date.today())
+        except ValueError:
+            return jsonify({'error': 'Invalid date format'}), 400
+        
+        tenancy = app.extensions.get('tenancy')
+        if tenancy is None:
+            tenants = {DEFAULT_TENANT: daily_summary(service_date)}
+        else:
+            tenants = tenancy.fan_out(lambda: daily_summary(service_date))
+        
+        for tenant, summary in tenants.items():
+            summary['restaurant_name'] = restaurant_name(tenant)
+        return jsonify({
+            'date': service_date.isoformat(),
+            'tenants': tenants,
+            'totals': merge_reports(tenants),
+            'failed': sorted(tenant for tenant, summary in tenants.items() if 'error' in summary)
+        })
+    
+    @app.route('/api/admin/occupancy')
+    @login_required
+    def occupancy_report():
+        """
+        API endpoint for fill rates and free tables per slot over several days
+        
+        Query Parameters:
+            date (str): First date (YYYY-MM-DD), defaults to today
+            days (int): Number of days (default 7, at most MAX_ADVANCE_BOOKING_DAYS + 1)
+            party_size (int): Party to count free tables for (default 2)
+            
+        Returns:
+            JSON: Per date, the share of seats booked and the number of tables
+            free for the party in every slot, plus the earliest free slot
+        """
+        from occupancy import OccupancyMatrix, bookable_slots
+        
+        if not current_user.is_staff():
+            return jsonify({'error': 'Access denied'}), 403
+        
+        try:
+            start_date = (datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+                          if request.args.get('date') else date.today())
+            days = int(request.args.get('days', 7))
+            party_size = int(request.args.get('party_size', 2))
+        except ValueError:
+            return jsonify({'error': 'Invalid date, days or party_size'}), 400
+        if not 1 <= days <= app.config['MAX_ADVANCE_BOOKING_DAYS'] + 1 or party_size < 1:
+            return jsonify({'error': 'days or party_size out of range'}), 400
+        
+        started = datetime.now()
+        matrix = OccupancyMatrix.load(start_date, days, bookable_slots(
+            app.config['OPENING_TIME'], app.config['CLOSING_TIME'], app.config['TIME_SLOT_DURATION']))
+        fill_rate = matrix.fill_rate()
+        free_tables = matrix.free_table_counts(party_size)
+        # Slots of today that have already started are not offered
+        next_free = (matrix.next_free_slot(party_size, started.date(), started.time())
+                     if start_date <= started.date() else matrix.next_free_slot(party_size))
+        
+        return jsonify({
+            'party_size': party_size,
+            'slots': [slot.strftime('%H:%M') for slot in matrix.slots],
+            'days': [{
+                'date': day.isoformat(),
+                'fill_rate': [round(float(rate), 3) for rate in fill_rate[position]],
+                'free_tables': free_tables[position].tolist()
+            } for position, day in enumerate(matrix.dates)],
+            'next_free': {
+                'date': next_free[0].isoformat(),
+                'time': next_free[1].strftime('%H:%M'),
+                'table_id': next_free[2]
+            } if next_free else None,
+            'elapsed_ms': round((datetime.now() - started).total_seconds() * 1000, 2)
+        })
+    
+    @app.route('/api/admin/outbox')
+    @login_required
+    def outbox_events():
+        """
+        API endpoint streaming reservation and table change events
+        
+        Consumers outside the application page through the outbox with the
+        last event_id they processed, like the in-process dispatcher does.
+        
+        Query Parameters:
+            after (int): Last event_id already processed (default 0)
+            limit (int): Maximum events to return (default 100, at most 1000)
+            
+        Returns:
+            JSON: Events in order and the cursor to pass as 'after' next time
+        """
+        if not current_user.is_admin():
+            return jsonify({'error': 'Access denied. Admin privileges required.'}), 403
+        
+        try:
+            after = int(request.args.get('after', 0))
+            limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+        except ValueError:
+            return jsonify({'error': 'after and limit must be integers'}), 400
+        
+        events = read_events(after, limit, app.config['OUTBOX_SETTLE_SECONDS'])
+        return jsonify({
+            'events': [event.to_dict() for event in events],
+            'next_after': events[-1].event_id if events else after
+        })
+    
     @app.route('/api/reservations/search')
     @login_required
     def search_reservations():
@@ -356,7 +785,8 @@ def register_routes(app):
         search_term = request.args.get('q', '').lower()
         date_filter = request.args.get('date')
         
-        query = Reservation.query
+        # Live and archived reservations alike
+        query = ReservationRecord.query
         
         if date_filter:
             try:
@@ -365,36 +795,30 @@ def register_routes(app):
             except ValueError:
                 pass
         
-        reservations = query.order_by(Reservation.reservation_date.desc(), 
-                                    Reservation.reservation_time.desc()).all()
-        
         if search_term:
-            filtered_reservations = []
-            for reservation in reservations:
-                searchable_text = f"{reservation.customer.full_name} {reservation.customer.phone} {reservation.table.table_number}".lower()
-                if search_term in searchable_text:
-                    filtered_reservations.append(reservation)
-            reservations = filtered_reservations
+            # Same text the customer/table fields produce, matched in the database;
+            # outer joins keep archived rows whose table has since been deleted
+            searchable_text = db.func.lower(
+                Customer.first_name + ' ' + Customer.last_name + ' ' + Customer.phone + ' ' +
+                db.func.coalesce(db.cast(Table.table_number, db.String), '')
+            )
+            query = query.outerjoin(ReservationRecord.customer).outerjoin(ReservationRecord.table).filter(
+                searchable_text.contains(search_term, autoescape=True))
+        
+        count = query.count()
+        reservations = with_reservation_details(query, ReservationRecord).order_by(
+            ReservationRecord.reservation_date.desc(), ReservationRecord.reservation_time.desc()).limit(50).all()
         
         return jsonify({
-            'reservations': [reservation.to_dict() for reservation in reservations[:50]],
-            'count': len(reservations)
+            'reservations': [reservation.to_dict() for reservation in reservations],
+            'count': count
         })
     
     @app.route('/api/stats')
     def get_stats():
         """Public API endpoint for basic restaurant stats"""
         try:
-            total_tables = Table.query.filter_by(status='available').count()
-            today = date.today()
-            today_reservations = Reservation.query.filter_by(reservation_date=today).count()
-            
-            return jsonify({
-                'total_tables': total_tables,
-                'today_reservations': today_reservations,
-                'restaurant_name': app.config.get('RESTAURANT_NAME', 'Bella Vista Restaurant'),
-                'status': 'online'
-            })
+            return jsonify(restaurant_stats(restaurant_name()))
         except Exception as e:
             return jsonify({'status': 'error', 'message': str(e)}), 500
     
@@ -409,7 +833,9 @@ def register_routes(app):
             # Get all data in JSON format
             customers = [customer.to_dict() for customer in Customer.query.all()]
             tables = [table.to_dict() for table in Table.query.all()]
-            reservations = [reservation.to_dict() for reservation in Reservation.query.all()]
+            # Includes archived reservations (see archive.py)
+            reservations = [reservation.to_dict() for reservation in
+                            with_reservation_details(ReservationRecord.query, ReservationRecord).all()]
             users = [user.to_dict() for user in User.query.all()]
             
             return jsonify({
@@ -456,6 +882,8 @@ def register_routes(app):
             )
             
             db.session.add(table)
+            db.session.flush()
+            record_event(db.session, 'table.created', table.table_id, table.to_dict())
             db.session.commit()
             
             return jsonify({
@@ -494,6 +922,10 @@ def register_routes(app):
                 if existing_table:
                     return jsonify({'error': 'Table number already exists'}), 409
             
+            # A table back in service or with more seats frees capacity for the waitlist
+            frees_capacity = (data.get('status', table.status) == 'available' and
+                              (table.status != 'available' or int(data.get('capacity', table.capacity)) > table.capacity))
+            
             # Update fields
             if 'table_number' in data:
                 table.table_number = data['table_number']
@@ -504,11 +936,18 @@ def register_routes(app):
             if 'location' in data:
                 table.location = data['location']
             
+            record_event(db.session, 'table.updated', table.table_id, table.to_dict())
             db.session.commit()
             
+            promoted = []
+            if frees_capacity:
+                promoted = promote_for_table(table.table_id, app.config['TIME_SLOT_DURATION'],
+                                             holds=app.extensions['holds'])
+            
             return jsonify({
                 'message': 'Table updated successfully',
-                'table': table.to_dict()
+                'table': table.to_dict(),
+                'waitlist_entry_ids': [entry.entry_id for entry in promoted]
             })
             
         except Exception as e:
@@ -533,6 +972,7 @@ def register_routes(app):
             if active_reservations:
                 return jsonify({'error': 'Cannot delete table with active reservations'}), 400
             
+            record_event(db.session, 'table.deleted', table.table_id, table.to_dict())
             db.session.delete(table)
             db.session.commit()
             
@@ -573,10 +1013,11 @@ def register_routes(app):
             return ""
         return value.strftime('%I:%M %p')
 
-# Application factory
-app = create_app()
-
 if __name__ == '__main__':
+    # Build the app only when run directly - importing this module (wsgi.py,
+    # asgi.py, tests) must not construct a development app as a side effect
+    app = create_app()
+    
     with app.app_context():
         # Create database tables if they don't exist
         db.create_all()
@@ -594,6 +1035,11 @@ if __name__ == '__main__':
                     os.environ.get('HEROKU_APP_NAME') or 
                     os.environ.get('RENDER_EXTERNAL_URL'))
     
+    # The reloader's watcher process does not serve requests
+    scheduler = app.extensions.get('scheduler')
+    if scheduler is not None and (is_production or os.environ.get('WERKZEUG_RUN_MAIN')):
+        scheduler.start()
+    
     if is_production:
         print(f"🚀 Running in production mode on port {port}")
         print(f"🌐 Access URL: {os.environ.get('RENDER_EXTERNAL_URL', 'Production environment')}")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Reservation Archival for Restaurant Reservation System
+MIT400 Assessment 2
+
+Completed and cancelled reservations older than the retention window
+(RESERVATION_RETENTION_DAYS) are moved from reservations into
+reservations_archive, so date-range scans, pagination counts and the
+availability checks only walk recent and upcoming bookings.
+
+Rows are moved in batches of ARCHIVE_BATCH_SIZE. Each batch copies and
+deletes its rows in one short transaction, so the job can run while the
+restaurant takes bookings and can be stopped and resumed at any point.
+Pending and confirmed reservations are never archived.
+
+Admin search and the database export read ReservationRecord, the union
+of both tables, so archived history stays visible there.
+
+Usage:
+    python archive.py
+    python archive.py --days 180 --batch-size 5000
+    python archive.py --dry-run
+"""
+
+import argparse
+import os
+import time as time_module
+from datetime import datetime, date, timedelta
+
+# Statuses that are final and can be archived
+ARCHIVABLE_STATUSES = ['completed', 'cancelled']
+
+def archivable_condition(cutoff_date):
+    """
+    WHERE clause for reservations that are due for archival
+
+    Args:
+        cutoff_date (date): Reservations before this date are due
+
+    Returns:
+        ColumnElement: Condition on the reservations table
+    """
+    from models import db, Reservation
+
+    reservations = Reservation.__table__
+    # The newest row always stays, so an autoincrement counter derived from
+    # MAX(reservation_id) can never hand out an ID that is in the archive
+    newest_id = db.select(db.func.max(reservations.c.reservation_id)).scalar_subquery()
+    return db.and_(
+        reservations.c.reservation_date < cutoff_date,
+        reservations.c.status.in_(ARCHIVABLE_STATUSES),
+        reservations.c.reservation_id < newest_id
+    )
+
+def count_archivable(engine, cutoff_date):
+    """
+    Count the reservations that archive_reservations would move
+
+    Returns:
+        int: Number of reservations due for archival
+    """
+    from models import db, Reservation
+
+    with engine.connect() as connection:
+        return connection.scalar(db.select(db.func.count()).select_from(Reservation.__table__)
+                                 .where(archivable_condition(cutoff_date)))
+
+def archive_reservations(engine, cutoff_date, batch_size=1000, log=None):
+    """
+    Move finished reservations before a date into reservations_archive
+
+    Args:
+        engine (Engine): Database holding both tables
+        cutoff_date (date): Reservations before this date are archived
+        batch_size (int): Reservations moved per transaction
+        log (callable, optional): Receives progress messages
+
+    Returns:
+        int: Number of reservations archived
+    """
+    from models import db, Reservation, ArchivedReservation, RESERVATION_HISTORY_COLUMNS
+
+    log = log or (lambda message: None)
+    reservations = Reservation.__table__
+    archive = ArchivedReservation.__table__
+    condition = archivable_condition(cutoff_date)
+
+    archived = 0
+    while True:
+        with engine.begin() as connection:
+            batch_ids = connection.scalars(
+                db.select(reservations.c.reservation_id).where(condition)
+                .order_by(reservations.c.reservation_id).limit(batch_size)).all()
+            if not batch_ids:
+                break
+
+            archived_at = datetime.utcnow()
+            connection.execute(archive.insert().from_select(
+                RESERVATION_HISTORY_COLUMNS + ['archived_at'],
+                db.select(*[reservations.c[name] for name in RESERVATION_HISTORY_COLUMNS],
+                          db.literal(archived_at, db.DateTime))
+                .where(reservations.c.reservation_id.in_(batch_ids))))
+            connection.execute(reservations.delete().where(reservations.c.reservation_id.in_(batch_ids)))
+
+        archived += len(batch_ids)
+        log(f"  archived {archived:,}")
+
+    return archived
+
+def main():
+    """Main archival function"""
+    parser = argparse.ArgumentParser(description='Move old finished reservations into the archive table')
+    parser.add_argument('--database-url', help='database to archive (default: DATABASE_URL / config)')
+    parser.add_argument('--days', type=int, help='retention window in days (default: RESERVATION_RETENTION_DAYS)')
+    parser.add_argument('--batch-size', type=int, help='reservations per transaction (default: ARCHIVE_BATCH_SIZE)')
+    parser.add_argument('--dry-run', action='store_true', help='only count the reservations due for archival')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+
+    from app import create_app
+    from models import db
+
+    app = create_app('production')
+    days = args.days if args.days is not None else app.config['RESERVATION_RETENTION_DAYS']
+    batch_size = args.batch_size or app.config['ARCHIVE_BATCH_SIZE']
+    cutoff_date = date.today() - timedelta(days=days)
+
+    print("🗄  Restaurant Reservation System - Reservation archival")
+    print(f"Archiving completed and cancelled reservations before {cutoff_date.isoformat()}")
+
+    with app.app_context():
+        # Creates reservations_archive on databases that predate it
+        db.create_all()
+
+        if args.dry_run:
+            print(f"✓ {count_archivable(db.engine, cutoff_date):,} reservations due for archival")
+            return
+
+        started = time_module.perf_counter()
+        archived = archive_reservations(db.engine, cutoff_date, batch_size, log=print)
+
+    print(f"✅ Archived {archived:,} reservations in {time_module.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for the public booking API
+
+The public endpoints (/api/tables/available, POST /api/reservations and
+/api/stats) mostly wait on the database, so they are served here by async
+handlers on an async SQLAlchemy engine. Every other path - the customer
+portal, login and admin pages - is passed through to the Flask app
+unchanged, so one server can host both.
+
+Validation and booking reuse booking.py and the models: reads run the
+shared SELECT statements on an AsyncSession, and writes run the same
+sync booking functions through AsyncSession.run_sync().
+
+Requests for a restaurant location other than the default one (see
+tenancy.py) go to the Flask app, whose session binds to that location's
+database; the async engine serves the default database only. Bookings
+that carry an Idempotency-Key header are handed to the Flask view too:
+its @idempotent claim, replay and release (idempotency.py) wait on the
+database with blocking polls that have no place on the event loop.
+
+With METRICS_ENABLED the async handlers are recorded in the Flask app's
+metrics (metrics.py) under the endpoint names of their Flask views, so
+/metrics covers every request whichever side served it.
+
+Usage:
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+"""
+
+import contextlib
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route, Mount
+from app import create_app
+from models import available_tables_statement
+from singleflight import AsyncSingleFlight
+from booking import (parse_availability_query, parse_reservation_request, book_reservation, restaurant_stats,
+                     slot_suggester)
+from idempotency import HEADER as IDEMPOTENCY_HEADER
+from tenancy import DEFAULT_TENANT
+
+# Async driver used for each sync database backend
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'mysql': 'aiomysql',
+    'postgresql': 'asyncpg'
+}
+
+def async_database_uri(database_uri):
+    """
+    Translate a sync SQLAlchemy URI into its async driver equivalent
+
+    Args:
+        database_uri (str): URI from SQLALCHEMY_DATABASE_URI
+
+    Returns:
+        URL: Same database, using the async driver for its backend
+    """
+    url = make_url(database_uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {backend} databases')
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}')
+
+class FlaskFallback:
+    """
+    ASGI middleware sending selected requests straight to the Flask app
+
+    Args:
+        asgi_app (callable): Async application serving everything else
+        wsgi_app (callable): Flask app wrapped for ASGI
+        predicate (callable): Called with the HTTP scope, True for Flask
+    """
+
+    def __init__(self, asgi_app, wsgi_app, predicate):
+        self.asgi_app = asgi_app
+        self.wsgi_app = wsgi_app
+        self.predicate = predicate
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and self.predicate(scope):
+            await self.wsgi_app(scope, receive, send)
+        else:
+            await self.asgi_app(scope, receive, send)
+
+def needs_flask(scope, tenancy=None):
+    """
+    True for requests only the Flask views handle correctly
+
+    Args:
+        scope (dict): ASGI HTTP scope
+        tenancy (Tenancy, optional): app.extensions['tenancy'], when installed
+
+    Returns:
+        bool: The request is for another tenant, or is an idempotent booking
+    """
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    if tenancy is not None:
+        environ = {'PATH_INFO': scope['path'], 'HTTP_HOST': headers.get('host', '')}
+        if tenancy.middleware.resolve(environ) != DEFAULT_TENANT:
+            return True
+    return (scope['method'] == 'POST' and scope['path'] == '/api/reservations'
+            and IDEMPOTENCY_HEADER.lower() in headers)
+
+def create_asgi_app(flask_app):
+    """
+    Build the ASGI application serving the public API next to Flask
+
+    Args:
+        flask_app (Flask): Application that serves every other route
+
+    Returns:
+        FlaskFallback: ASGI application
+    """
+    engine = create_async_engine(async_database_uri(flask_app.config['SQLALCHEMY_DATABASE_URI']))
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    # Reported on the Flask /metrics page next to the sync group
+    flight = AsyncSingleFlight('availability_async') if flask_app.config.get('AVAILABILITY_COALESCING') else None
+
+    holds = flask_app.extensions['holds']
+    suggest = slot_suggester(flask_app.config, holds)
+    metrics = flask_app.extensions.get('metrics')
+
+    def endpoint(handler):
+        """Record a handler's requests under the name of its Flask view"""
+        return metrics.instrument(handler.__name__, handler) if metrics is not None else handler
+
+    async def lookup_available_tables(query):
+        """Run the availability SELECT and return the tables as dicts"""
+        held_tables = holds.held_tables(*query[:2])
+        async with Session() as session:
+            available_tables = (await session.scalars(available_tables_statement(*query, held_tables))).all()
+            return [table.to_dict() for table in available_tables]
+
+    async def get_available_tables(request):
+        """Async version of the /api/tables/available view"""
+        query, error = parse_availability_query(request.query_params)
+        if error:
+            return JSONResponse({'error': error}, status_code=400)
+
+        try:
+            if flight is not None:
+                available_tables = await flight.do(query, lambda: lookup_available_tables(query))
+            else:
+                available_tables = await lookup_available_tables(query)
+            return JSONResponse({
+                'available_tables': available_tables,
+                'count': len(available_tables)
+            })
+        except Exception as e:
+            return JSONResponse({'error': str(e)}, status_code=500)
+
+    async def create_reservation_api(request):
+        """Async version of the POST /api/reservations view, for requests without an Idempotency-Key"""
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+
+        fields, error = parse_reservation_request(data)
+        if error:
+            return JSONResponse({'error': error}, status_code=400)
+
+        try:
+            async with Session() as session:
+                body, status = await session.run_sync(lambda sync_session: book_reservation(
+                    fields, session=sync_session, holds=holds, suggest=suggest))
+                return JSONResponse(body, status_code=status)
+        except Exception as e:
+            return JSONResponse({'error': str(e)}, status_code=500)
+
+    async def get_stats(request):
+        """Async version of the /api/stats view"""
+        restaurant_name = flask_app.config.get('RESTAURANT_NAME', 'Bella Vista Restaurant')
+        try:
+            async with Session() as session:
+                stats = await session.run_sync(lambda sync_session: restaurant_stats(restaurant_name, session=sync_session))
+                return JSONResponse(stats)
+        except Exception as e:
+            return JSONResponse({'status': 'error', 'message': str(e)}, status_code=500)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        scheduler = flask_app.extensions.get('scheduler')
+        if scheduler is not None:
+            scheduler.start()
+        yield
+        if scheduler is not None:
+            scheduler.stop()
+        await engine.dispose()
+
+    flask_asgi = WSGIMiddleware(flask_app)
+    starlette_app = Starlette(
+        routes=[
+            Route('/api/tables/available', endpoint(get_available_tables), methods=['GET']),
+            Route('/api/reservations', endpoint(create_reservation_api), methods=['POST']),
+            Route('/api/stats', endpoint(get_stats), methods=['GET']),
+            Mount('/', app=flask_asgi)
+        ],
+        lifespan=lifespan
+    )
+    tenancy = flask_app.extensions.get('tenancy')
+    return FlaskFallback(starlette_app, flask_asgi, lambda scope: needs_flask(scope, tenancy))
+
+# Create the ASGI application
+app = create_asgi_app(create_app('production'))
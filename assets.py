@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Static Asset Pipeline for Restaurant Reservation System
+MIT400 Assessment 2
+
+Stylesheets, scripts and the favicon live in assets/ and are built into
+static/dist/ under content-hashed names (css/base.3f2a9c1e0b.css), each
+with a gzip and - when the optional brotli package is installed - a
+brotli copy next to it. static/dist/manifest.json maps every source name
+to its built name.
+
+Templates link assets through asset_url('css/base.css'). The /assets/
+route serves the smallest encoding the browser accepts with
+Content-Encoding and Vary: Accept-Encoding set, and because a changed
+file gets a new name, every response can be cached for a year as
+immutable: pages are the only thing browsers fetch again between
+navigations.
+
+The build runs at deploy time (build.sh) and again at boot whenever a
+source file is newer than the manifest, so development needs no extra
+step. Files from earlier builds are kept for pages still open in
+browsers; --prune removes them.
+
+Usage:
+    python assets.py
+    python assets.py --prune
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(BASE_DIR, 'assets')
+OUTPUT_DIR = os.path.join(BASE_DIR, 'static', 'dist')
+MANIFEST_NAME = 'manifest.json'
+
+# Text formats worth compressing; images and fonts are compressed already
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html'}
+
+# Encodings in order of preference, with the suffix of their precompressed copy
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# Hashed names never change content, so browsers may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+def _write_atomic(path, content):
+    """Write a file so concurrent readers never see it half-written"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(descriptor, 'wb') as temp_file:
+        temp_file.write(content)
+    os.replace(temp_path, path)
+
+def source_files(source_dir=SOURCE_DIR):
+    """Relative paths of every source asset, with '/' separators"""
+    names = []
+    for directory, _, files in os.walk(source_dir):
+        for file_name in files:
+            path = os.path.relpath(os.path.join(directory, file_name), source_dir)
+            names.append(path.replace(os.sep, '/'))
+    return sorted(names)
+
+def build_assets(source_dir=SOURCE_DIR, output_dir=OUTPUT_DIR, log=None):
+    """
+    Fingerprint and precompress every source asset
+
+    Args:
+        source_dir (str): Directory with the source assets
+        output_dir (str): Directory to write built assets and the manifest to
+        log (callable, optional): Receives progress messages
+
+    Returns:
+        dict: Manifest mapping source names to built names
+    """
+    log = log or (lambda message: None)
+    manifest = {}
+    for name in source_files(source_dir):
+        with open(os.path.join(source_dir, name), 'rb') as source_file:
+            content = source_file.read()
+
+        stem, extension = os.path.splitext(name)
+        built_name = f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}{extension}"
+        built_path = os.path.join(output_dir, built_name)
+        manifest[name] = built_name
+        if os.path.exists(built_path):
+            continue
+
+        _write_atomic(built_path, content)
+        sizes = [f"{len(content):,} B"]
+        if extension in COMPRESSIBLE_EXTENSIONS:
+            compressed = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed['.br'] = brotli.compress(content, quality=11)
+            for suffix, body in compressed.items():
+                # Only keep encodings that actually save bytes
+                if len(body) < len(content):
+                    _write_atomic(built_path + suffix, body)
+                    sizes.append(f"{suffix[1:]} {len(body):,} B")
+        log(f"  {built_name} ({', '.join(sizes)})")
+
+    _write_atomic(os.path.join(output_dir, MANIFEST_NAME), json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+def prune_assets(manifest, output_dir=OUTPUT_DIR):
+    """
+    Delete built files that the manifest no longer refers to
+
+    Returns:
+        int: Number of files deleted
+    """
+    keep = {MANIFEST_NAME}
+    for built_name in manifest.values():
+        keep.update(built_name + suffix for suffix in ['', '.gz', '.br'])
+    removed = 0
+    for name in source_files(output_dir):
+        if name not in keep:
+            os.remove(os.path.join(output_dir, name))
+            removed += 1
+    return removed
+
+def load_manifest(source_dir=SOURCE_DIR, output_dir=OUTPUT_DIR):
+    """
+    Read the manifest, building the assets first if any source is newer
+
+    Returns:
+        dict: Manifest mapping source names to built names
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        built_at = os.path.getmtime(manifest_path)
+        if all(os.path.getmtime(os.path.join(source_dir, name)) <= built_at for name in source_files(source_dir)):
+            with open(manifest_path) as manifest_file:
+                return json.load(manifest_file)
+    return build_assets(source_dir, output_dir)
+
+def asset_url(name):
+    """
+    URL of the built copy of a source asset, for templates
+
+    Args:
+        name (str): Source name relative to assets/, e.g. 'css/base.css'
+
+    Returns:
+        str: URL of the fingerprinted file
+    """
+    from flask import current_app, url_for
+    return url_for('asset', filename=current_app.extensions['assets'][name])
+
+def init_assets(app):
+    """
+    Load the asset manifest and register the asset route and template helper
+
+    Args:
+        app (Flask): Application to serve assets from
+
+    Returns:
+        dict: Manifest, stored in app.extensions['assets']
+    """
+    from flask import request, send_from_directory
+
+    manifest = load_manifest()
+    app.extensions['assets'] = manifest
+    app.add_template_global(asset_url)
+
+    @app.route('/assets/<path:filename>')
+    def asset(filename):
+        """Serve a built asset in the best encoding the client accepts"""
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = None
+        for candidate, suffix in ENCODINGS:
+            if request.accept_encodings[candidate] and os.path.exists(os.path.join(OUTPUT_DIR, filename + suffix)):
+                encoding = candidate
+                filename += suffix
+                break
+
+        response = send_from_directory(OUTPUT_DIR, filename, mimetype=mimetype)
+        if encoding:
+            response.content_encoding = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+        return response
+
+    return manifest
+
+def main():
+    """Main build function"""
+    parser = argparse.ArgumentParser(description='Fingerprint and precompress the static assets')
+    parser.add_argument('--prune', action='store_true', help='delete files left over from earlier builds')
+    args = parser.parse_args()
+
+    print("📦 Restaurant Reservation System - Asset build")
+    if brotli is None:
+        print("⚠️  brotli is not installed, building gzip copies only")
+
+    manifest = build_assets(log=print)
+    print(f"✅ {len(manifest)} assets in {os.path.relpath(OUTPUT_DIR, BASE_DIR)}")
+
+    if args.prune:
+        print(f"🧹 Removed {prune_assets(manifest)} stale files")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+$(document).ready(function() {
+    // Search functionality
+    $('#searchReservations').on('keyup', function() {
+        const searchTerm = $(this).val().toLowerCase();
+        $('.reservation-item').each(function() {
+            const text = $(this).text().toLowerCase();
+            if (text.includes(searchTerm)) {
+                $(this).show();
+            } else {
+                $(this).hide();
+            }
+        });
+    });
+    
+    // Auto-refresh reservations every 60 seconds
+    setInterval(function() {
+        location.reload();
+    }, 60000);
+});
+
+function confirmReservation(reservationId) {
+    if (!confirm('Are you sure you want to confirm this reservation?')) {
+        return;
+    }
+    
+    $.ajax({
+        url: `/api/reservations/${reservationId}/confirm`,
+        method: 'POST',
+        success: function(response) {
+            location.reload(); // Reload to show updated status
+        },
+        error: function(xhr) {
+            const response = xhr.responseJSON;
+            alert(response.error || 'Error confirming reservation');
+        }
+    });
+}
+
+function cancelReservation(reservationId) {
+    if (!confirm('Are you sure you want to cancel this reservation?')) {
+        return;
+    }
+    
+    $.ajax({
+        url: `/api/reservations/${reservationId}/cancel`,
+        method: 'POST',
+        success: function(response) {
+            location.reload(); // Reload to show updated status
+        },
+        error: function(xhr) {
+            const response = xhr.responseJSON;
+            alert(response.error || 'Error cancelling reservation');
+        }
+    });
+}
+
+function completeReservation(reservationId) {
+    if (!confirm('Mark this reservation as completed?')) {
+        return;
+    }
+    
+    $.ajax({
+        url: `/api/reservations/${reservationId}/complete`,
+        method: 'POST',
+        success: function(response) {
+            location.reload(); // Reload to show updated status
+        },
+        error: function(xhr) {
+            const response = xhr.responseJSON;
+            alert(response.error || 'Error completing reservation');
+        }
+    });
+}
+
+function optimizeTables() {
+    if (!confirm('Re-assign today\'s upcoming reservations to free up the largest tables?')) {
+        return;
+    }
+    
+    $.ajax({
+        url: '/api/admin/optimize-tables',
+        method: 'POST',
+        contentType: 'application/json',
+        data: JSON.stringify({}),
+        success: function(response) {
+            alert(`Moved ${response.moves.length} reservation(s); wasted seats ${response.wasted_seats_before} → ${response.wasted_seats_after}`);
+            location.reload();
+        },
+        error: function(xhr) {
+            const response = xhr.responseJSON;
+            alert((response.conflicts || []).join('\n') || response.error || 'Error optimizing tables');
+        }
+    });
+}
+
+// Auto-refresh every 30 seconds to show real-time updates
+setInterval(function() {
+    location.reload();
+}, 30000);
@@ -0,0 +1,60 @@
+$(document).ready(function() {
+    // Search functionality
+    $('#searchAllReservations').on('keyup', function() {
+        const searchTerm = $(this).val().toLowerCase();
+        $('.reservation-item').each(function() {
+            const text = $(this).text().toLowerCase();
+            if (text.includes(searchTerm)) {
+                $(this).show();
+            } else {
+                $(this).hide();
+            }
+        });
+    });
+    
+    // Date filter functionality
+    $('#filterDate').on('change', function() {
+        const selectedDate = $(this).val();
+        if (selectedDate) {
+            window.location.href = window.location.pathname + '?date=' + selectedDate;
+        } else {
+            window.location.href = window.location.pathname;
+        }
+    });
+});
+
+function confirmReservation(reservationId) {
+    if (!confirm('Are you sure you want to confirm this reservation?')) {
+        return;
+    }
+    
+    $.ajax({
+        url: `/api/reservations/${reservationId}/confirm`,
+        method: 'POST',
+        success: function(response) {
+            location.reload();
+        },
+        error: function(xhr) {
+            const response = xhr.responseJSON;
+            alert('Error: ' + (response.error || 'Failed to confirm reservation'));
+        }
+    });
+}
+
+function cancelReservation(reservationId) {
+    if (!confirm('Are you sure you want to cancel this reservation?')) {
+        return;
+    }
+    
+    $.ajax({
+        url: `/api/reservations/${reservationId}/cancel`,
+        method: 'POST',
+        success: function(response) {
+            location.reload();
+        },
+        error: function(xhr) {
+            const response = xhr.responseJSON;
+            alert('Error: ' + (response.error || 'Failed to cancel reservation'));
+        }
+    });
+}
@@ -0,0 +1,111 @@
+$(document).ready(function() {
+    // Handle add table form submission
+    $('#tableForm').on('submit', function(e) {
+        e.preventDefault();
+        
+        const formData = {
+            table_number: parseInt($('#tableNumber').val()),
+            capacity: parseInt($('#tableCapacity').val()),
+            location: $('#tableLocation').val(),
+            status: $('#tableStatus').val()
+        };
+        
+        $.ajax({
+            url: '/api/tables',
+            method: 'POST',
+            contentType: 'application/json',
+            data: JSON.stringify(formData),
+            success: function(response) {
+                alert('Table added successfully!');
+                location.reload();
+            },
+            error: function(xhr) {
+                const response = xhr.responseJSON;
+                alert(response.error || 'Error adding table');
+            }
+        });
+    });
+    
+    // Handle edit table form submission
+    $('#editTableForm').on('submit', function(e) {
+        e.preventDefault();
+        
+        const tableId = $('#editTableId').val();
+        const formData = {
+            table_number: parseInt($('#editTableNumber').val()),
+            capacity: parseInt($('#editTableCapacity').val()),
+            location: $('#editTableLocation').val(),
+            status: $('#editTableStatus').val()
+        };
+        
+        $.ajax({
+            url: `/api/tables/${tableId}`,
+            method: 'PUT',
+            contentType: 'application/json',
+            data: JSON.stringify(formData),
+            success: function(response) {
+                alert('Table updated successfully!');
+                closeEditModal();
+                location.reload();
+            },
+            error: function(xhr) {
+                const response = xhr.responseJSON;
+                alert(response.error || 'Error updating table');
+            }
+        });
+    });
+});
+
+function editTable(tableId) {
+    // Fetch table data and populate the form
+    $.ajax({
+        url: `/api/tables/${tableId}`,
+        method: 'GET',
+        success: function(response) {
+            const table = response.table;
+            
+            // Populate form fields
+            $('#editTableId').val(tableId);
+            $('#editTableNumber').val(table.table_number);
+            $('#editTableCapacity').val(table.capacity);
+            $('#editTableLocation').val(table.location || '');
+            $('#editTableStatus').val(table.status);
+            
+            // Show modal
+            $('#editTableModal').show();
+        },
+        error: function(xhr) {
+            alert('Error loading table data');
+        }
+    });
+}
+
+function closeEditModal() {
+    $('#editTableModal').hide();
+}
+
+function removeTable(tableId) {
+    if (!confirm('Are you sure you want to remove this table? This action cannot be undone.')) {
+        return;
+    }
+    
+    $.ajax({
+        url: `/api/tables/${tableId}`,
+        method: 'DELETE',
+        success: function(response) {
+            alert('Table removed successfully!');
+            location.reload();
+        },
+        error: function(xhr) {
+            const response = xhr.responseJSON;
+            alert(response.error || 'Error removing table');
+        }
+    });
+}
+
+// Close modal when clicking outside
+$(document).on('click', '#editTableModal', function(e) {
+    if (e.target === this) {
+        closeEditModal();
+    }
+});
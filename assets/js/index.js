@@ -0,0 +1,345 @@
+$(document).ready(function() {
+    // Set minimum date to today
+    const today = new Date().toISOString().split('T')[0];
+    $('#reservationDate').attr('min', today);
+    
+    // Set maximum date to 30 days from now
+    const maxDate = new Date();
+    maxDate.setDate(maxDate.getDate() + 30);
+    $('#reservationDate').attr('max', maxDate.toISOString().split('T')[0]);
+    
+    // Real-time system status
+    checkSystemStatus();
+    
+    // Update available tables when date, time, or party size changes
+    $('#reservationDate, #reservationTime, #partySize').on('change', function() {
+        updateAvailableTables();
+    });
+    
+    // Handle form submission
+    $('#reservationForm').on('submit', function(e) {
+        e.preventDefault();
+        
+        // Validate form first
+        if (!validateForm()) {
+            return;
+        }
+        
+        const formData = {
+            first_name: $('#customerFirstName').val(),
+            last_name: $('#customerLastName').val(),
+            phone: $('#countryCode').val() + ' ' + $('#customerPhone').val(),
+            email: $('#customerEmail').val(),
+            date: $('#reservationDate').val(),
+            time: $('#reservationTime').val(),
+            party_size: parseInt($('#partySize').val()),
+            special_requests: $('#specialRequests').val(),
+            hold_token: currentHold ? currentHold.hold_token : null
+        };
+        
+        // Debug: Log the phone number being sent
+        console.log('Phone number being sent:', formData.phone);
+        console.log('Country code selected:', $('#countryCode').val());
+        console.log('Phone number entered:', $('#customerPhone').val());
+        console.log('Full phone combination:', $('#countryCode').val() + ' ' + $('#customerPhone').val());
+        
+        // Show debug info on page
+        $('#debugInfo').html(`
+            <div style="background: #f0f0f0; padding: 10px; margin: 10px 0; border-radius: 5px; font-size: 12px;">
+                <strong>Debug Info:</strong><br>
+                Country Code: ${$('#countryCode').val()}<br>
+                Phone: ${$('#customerPhone').val()}<br>
+                Combined: ${$('#countryCode').val() + ' ' + $('#customerPhone').val()}
+            </div>
+        `);
+        
+        // Validate required fields
+        if (!formData.first_name || !formData.last_name || !formData.phone || 
+            !formData.date || !formData.time || !formData.party_size) {
+            showMessage('Please fill in all required fields.', 'error');
+            return;
+        }
+        
+        // Disable submit button
+        $('#submitBtn').prop('disabled', true).text('Creating Reservation...');
+        
+        // A resubmission of the same booking after a lost response reuses its
+        // Idempotency-Key, so the server answers it instead of booking twice
+        const payload = JSON.stringify(formData);
+        if (!pendingBooking || pendingBooking.payload !== payload) {
+            pendingBooking = { payload: payload, key: newIdempotencyKey() };
+        }
+        
+        // Create reservation
+        $.ajax({
+            url: '/api/reservations',
+            method: 'POST',
+            contentType: 'application/json',
+            headers: { 'Idempotency-Key': pendingBooking.key },
+            data: payload,
+            timeout: 15000,
+            success: function(response) {
+                showMessage(
+                    `Reservation successful! Table ${response.reservation.table.table_number} has been reserved for ${formData.first_name} ${formData.last_name} on ${formData.date} at ${formatTime(formData.time)}. Confirmation pending.`,
+                    'success'
+                );
+                
+                // The server turned the hold into the booking
+                currentHold = null;
+                
+                // Reset form
+                $('#reservationForm')[0].reset();
+                updateAvailableTables();
+            },
+            error: function(xhr) {
+                const response = xhr.responseJSON;
+                if (!response) {
+                    showMessage('No answer from the server. Please try again, your booking will not be made twice.', 'error');
+                    return;
+                }
+                showMessage(response.error || 'An error occurred while creating the reservation.', 'error');
+                // The time was taken meanwhile: offer the nearest free ones
+                if (xhr.status === 409 && response.suggestions) {
+                    displaySuggestions(response.suggestions);
+                }
+            },
+            complete: function(xhr) {
+                // Keep the key only when no response arrived, for the retry
+                if (xhr.status !== 0) {
+                    pendingBooking = null;
+                }
+                $('#submitBtn').prop('disabled', false).text('Check Availability & Book');
+            }
+        });
+    });
+});
+
+// Booking whose response has not arrived yet: { payload, key }
+let pendingBooking = null;
+
+function newIdempotencyKey() {
+    if (window.crypto && window.crypto.randomUUID) {
+        return window.crypto.randomUUID();
+    }
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+}
+
+// Hold on the table shown as selected, so nobody else can take it while
+// the customer fills in the form (released when the selection changes)
+let currentHold = null;
+
+function releaseHold() {
+    if (currentHold) {
+        $.ajax({ url: `/api/holds/${currentHold.hold_token}`, method: 'DELETE' });
+        currentHold = null;
+    }
+}
+
+function holdTable(date, time, partySize) {
+    $.ajax({
+        url: '/api/holds',
+        method: 'POST',
+        contentType: 'application/json',
+        data: JSON.stringify({ date: date, time: time, party_size: parseInt(partySize) }),
+        success: function(response) {
+            currentHold = response.hold;
+            const until = new Date(Date.now() + response.hold.expires_in * 1000);
+            $('#availableTables .table-card').each(function() {
+                const held = $(this).data('table-id') === response.table.table_id;
+                $(this).toggleClass('selected', held);
+                $(this).find('h4').text(`Table ${$(this).data('table-number')}${held ? ' 👑 SELECTED' : ''}`);
+                $(this).find('.table-state').text(held
+                    ? `Held for you until ${until.toTimeString().slice(0, 5)}`
+                    : 'Available');
+            });
+        }
+        // Without a hold the booking still searches for a table on submit
+    });
+}
+
+function updateAvailableTables() {
+    const date = $('#reservationDate').val();
+    const time = $('#reservationTime').val();
+    const partySize = $('#partySize').val();
+    
+    releaseHold();
+    
+    if (!date || !time || !partySize) {
+        $('#availableTables').html('<div class="loading">Select date, time, and party size to see available tables</div>');
+        return;
+    }
+    
+    $('#availableTables').html('<div class="loading">Loading available tables...</div>');
+    
+    $.ajax({
+        url: '/api/tables/available',
+        method: 'GET',
+        data: {
+            date: date,
+            time: time,
+            party_size: partySize
+        },
+        success: function(response) {
+            displayAvailableTables(response.available_tables);
+            if (response.available_tables.length > 0) {
+                holdTable(date, time, partySize);
+            } else {
+                loadSuggestions(date, time, partySize);
+            }
+        },
+        error: function(xhr) {
+            const response = xhr.responseJSON;
+            $('#availableTables').html(`<div class="error-message">${response.error || 'Error loading tables'}</div>`);
+        }
+    });
+}
+
+function displayAvailableTables(tables) {
+    const container = $('#availableTables');
+    
+    if (tables.length === 0) {
+        container.html('<div class="error-message">No tables available for the selected date, time, and party size. Please try a different time.</div>');
+        return;
+    }
+    
+    let html = '';
+    tables.forEach(function(table, index) {
+        const isFirst = index === 0;
+        html += `
+            <div class="table-card available ${isFirst ? 'selected' : ''}" data-table-id="${table.table_id}" data-table-number="${table.table_number}">
+                <h4>Table ${table.table_number} ${isFirst ? '👑 SELECTED' : ''}</h4>
+                <p>Capacity: ${table.capacity} people</p>
+                <p>Location: ${table.location || 'Not specified'}</p>
+                <p>Status: <span class="table-state">${isFirst ? 'Will be reserved for you' : 'Available'}</span></p>
+            </div>
+        `;
+    });
+    
+    container.html(html);
+}
+
+function loadSuggestions(date, time, partySize) {
+    $.ajax({
+        url: '/api/availability/next',
+        method: 'GET',
+        data: { date: date, time: time, party_size: partySize },
+        success: function(response) {
+            displaySuggestions(response.suggestions);
+        }
+    });
+}
+
+// Nearest free times as buttons that pick that date and time in the form
+function displaySuggestions(suggestions) {
+    const container = $('#availableTables');
+    
+    if (suggestions.length === 0) {
+        container.html('<div class="error-message">No tables available for this party size in the booking window.</div>');
+        return;
+    }
+    
+    let html = '<div class="error-message">No tables available at this time. Nearest free times:</div>';
+    suggestions.forEach(function(suggestion) {
+        html += `<button type="button" class="btn btn-secondary suggestion" data-date="${suggestion.date}" data-time="${suggestion.time}">${suggestion.date} ${formatTime(suggestion.time)}</button> `;
+    });
+    container.html(html);
+    
+    container.find('.suggestion').on('click', function() {
+        $('#reservationDate').val($(this).data('date'));
+        $('#reservationTime').val($(this).data('time'));
+        updateAvailableTables();
+    });
+}
+
+function showMessage(message, type) {
+    const messageDiv = $('#message');
+    const alertClass = type === 'success' ? 'success-message' : 'error-message';
+    messageDiv.html(`<div class="${alertClass}">${message}</div>`);
+    
+    // Auto-hide after 5 seconds
+    setTimeout(function() {
+        messageDiv.html('');
+    }, 5000);
+    
+    // Scroll to message
+    messageDiv[0].scrollIntoView({ behavior: 'smooth' });
+}
+
+function formatTime(timeStr) {
+    const [hours, minutes] = timeStr.split(':');
+    const hour = parseInt(hours);
+    const ampm = hour >= 12 ? 'PM' : 'AM';
+    const displayHour = hour > 12 ? hour - 12 : (hour === 0 ? 12 : hour);
+    return `${displayHour}:${minutes} ${ampm}`;
+}
+
+function showTab(tabName) {
+    // This function is kept for compatibility but not used in this template
+    // since we're using separate routes for different sections
+}
+
+// Seconds between status checks; the server may override it in its reply
+let statusPollSeconds = 30;
+
+function scheduleStatusCheck() {
+    // +/- 20% jitter so tabs opened together do not poll in step
+    const delay = statusPollSeconds * 1000 * (0.8 + Math.random() * 0.4);
+    setTimeout(checkSystemStatus, delay);
+}
+
+function checkSystemStatus() {
+    // Hidden tabs skip the request and check again when next due
+    if (document.hidden) {
+        scheduleStatusCheck();
+        return;
+    }
+    
+    $.ajax({
+        url: '/api/status',
+        method: 'GET',
+        timeout: 5000,
+        success: function(response) {
+            if (response.poll_seconds) {
+                statusPollSeconds = response.poll_seconds;
+            }
+            $('#systemStatus').text('🟢 Online').removeClass('offline');
+        },
+        error: function() {
+            $('#systemStatus').text('🔴 Offline').addClass('offline');
+        },
+        complete: scheduleStatusCheck
+    });
+}
+
+// Table selection simplified - first available table is auto-selected
+
+function validateForm() {
+    const phone = $('#customerPhone').val().trim();
+    
+    if (phone.length < 3) {
+        showMessage('Please enter a valid phone number (minimum 3 digits)', 'error');
+        return false;
+    }
+    
+    // More flexible phone number validation (allows more characters)
+    const phoneRegex = /^[\d\s\-\(\)\+\.\#\*]+$/;
+    if (!phoneRegex.test(phone)) {
+        showMessage('Please enter a valid phone number', 'error');
+        return false;
+    }
+    
+    // Debug: Log phone validation
+    console.log('Phone validation passed:', phone);
+    
+    const date = new Date($('#reservationDate').val());
+    const today = new Date();
+    const maxDate = new Date();
+    maxDate.setDate(today.getDate() + 30);
+    
+    if (date < today || date > maxDate) {
+        showMessage('Please select a date within the next 30 days', 'error');
+        return false;
+    }
+    
+    return true;
+}
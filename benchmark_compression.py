@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Compression Benchmark for Restaurant Reservation System
+MIT400 Assessment 2
+
+This script seeds a database, fetches the largest dynamic responses
+uncompressed and compresses each one with several gzip levels and brotli
+qualities. For every setting it reports:
+
+    - the compressed size and ratio
+    - the CPU time to compress (median of repeated runs)
+    - the net time saved on a link of --bandwidth Mbit/s: transfer time
+      saved by the smaller body minus the CPU time spent compressing it
+
+The settings used by compression.py (COMPRESSION_GZIP_LEVEL,
+COMPRESSION_BROTLI_QUALITY) are marked with *.
+
+Usage:
+    python benchmark_compression.py
+    python benchmark_compression.py --bandwidth 50 --customers 20000 --months 6
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time as time_module
+from datetime import date
+
+from benchmark_system import seed_benchmark_data
+
+def measure(function, runs):
+    """Median wall time of a function in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        started = time_module.perf_counter()
+        function()
+        timings.append((time_module.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Weigh compression CPU time against bytes saved')
+    parser.add_argument('--tables', type=int, default=30, help='number of tables')
+    parser.add_argument('--customers', type=int, default=2000, help='number of customers')
+    parser.add_argument('--per-day', type=int, default=40, help='reservations per day')
+    parser.add_argument('--months', type=int, default=2, help='months of reservation history')
+    parser.add_argument('--runs', type=int, default=20, help='timed runs per setting')
+    parser.add_argument('--bandwidth', type=float, default=10.0, help='client link speed in Mbit/s')
+    args = parser.parse_args()
+
+    temp_dir = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(temp_dir.name, 'compression.db')}"
+    os.environ['RESPONSE_COMPRESSION'] = 'false'
+
+    from app import create_app
+    from compression import compress_bytes, available_encodings
+
+    app = create_app('production')
+
+    print("🗜  Restaurant Reservation System - Compression benchmark")
+    seed_benchmark_data(app, args.tables, args.customers, args.per_day, args.months)
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    payloads = {
+        'view_database (JSON)': client.get('/api/database/view').get_data(),
+        'search_reservations (JSON)': client.get('/api/reservations/search',
+                                                 query_string={'date': date.today().isoformat()}).get_data(),
+        'admin_reservations (HTML)': client.get('/admin/reservations').get_data(),
+        'admin_dashboard (HTML)': client.get('/admin').get_data()
+    }
+
+    settings = [('gzip', level, {'gzip_level': level}) for level in (1, 6, 9)]
+    if 'br' in available_encodings():
+        settings += [('br', quality, {'brotli_quality': quality}) for quality in (1, 4, 6, 11)]
+    else:
+        print("⚠️  brotli is not installed, measuring gzip only")
+    current = {('gzip', app.config['COMPRESSION_GZIP_LEVEL']), ('br', app.config['COMPRESSION_BROTLI_QUALITY'])}
+    bytes_per_ms = args.bandwidth * 1_000_000 / 8 / 1000
+
+    for name, body in payloads.items():
+        print(f"\n{name}: {len(body):,} bytes, {len(body) / bytes_per_ms:.1f} ms at {args.bandwidth:g} Mbit/s")
+        print(f"  {'setting':<10} {'bytes':>10} {'ratio':>7} {'cpu ms':>8} {'MB/s':>8} {'net saved ms':>13}")
+        for encoding, level, options in settings:
+            compressed = compress_bytes(body, encoding, **options)
+            cpu_ms = measure(lambda: compress_bytes(body, encoding, **options), args.runs)
+            saved_ms = (len(body) - len(compressed)) / bytes_per_ms - cpu_ms
+            marker = '*' if (encoding, level) in current else ' '
+            print(f" {marker}{encoding + ' ' + str(level):<10} {len(compressed):>10,} {len(body) / len(compressed):>6.1f}x "
+                  f"{cpu_ms:>8.2f} {len(body) / 1000 / max(cpu_ms, 1e-6):>8.1f} {saved_ms:>13.1f}")
+
+    temp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Occupancy Matrix Benchmark for Restaurant Reservation System
+MIT400 Assessment 2
+
+This script seeds a database like benchmark_system.py and answers the same
+day-level questions two ways:
+
+    - loop: one find_available_tables call per date x slot, as a report
+      built on the single lookup would
+    - matrix: OccupancyMatrix.load for the range, then free_table_counts,
+      fill_rate and next_free_slot
+
+Both must agree on every (date, slot, party size); the script stops with
+status 1 if they do not.
+
+Usage:
+    python benchmark_occupancy.py
+    python benchmark_occupancy.py --tables 80 --per-day 150 --days 30
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time as time_module
+from datetime import date, timedelta
+
+from benchmark_system import seed_benchmark_data
+
+PARTY_SIZES = [2, 4, 6]
+
+def time_runs(function, repeats):
+    """Median milliseconds of a callable, and its last result"""
+    samples = []
+    for _ in range(repeats):
+        started = time_module.perf_counter()
+        result = function()
+        samples.append((time_module.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Compare looped availability lookups with the occupancy matrix')
+    parser.add_argument('--tables', type=int, default=30, help='number of tables')
+    parser.add_argument('--per-day', type=int, default=40, help='reservations per day')
+    parser.add_argument('--days', type=int, default=14, help='dates covered by the report')
+    parser.add_argument('--repeats', type=int, default=5, help='timed runs of each approach')
+    args = parser.parse_args()
+
+    temp_dir = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(temp_dir.name, 'benchmark.db')}"
+
+    from app import create_app
+    from models import find_available_tables
+    from occupancy import OccupancyMatrix, bookable_slots
+    app = create_app('production')
+
+    print("📊 Restaurant Reservation System - Occupancy Matrix Benchmark")
+    seed_benchmark_data(app, args.tables, 1000, args.per_day, 1)
+    config = app.config
+    slots = bookable_slots(config['OPENING_TIME'], config['CLOSING_TIME'], config['TIME_SLOT_DURATION'])
+    start = date.today() + timedelta(days=1)
+    dates = [start + timedelta(days=offset) for offset in range(args.days)]
+
+    def loop():
+        return {(day, slot, size): [table.table_id for table in find_available_tables(day, slot, size)]
+                for day in dates for slot in slots for size in PARTY_SIZES}
+
+    def matrix():
+        occupancy = OccupancyMatrix.load(start, args.days, slots)
+        occupancy.fill_rate()
+        for size in PARTY_SIZES:
+            occupancy.free_table_counts(size)
+            occupancy.next_free_slot(size)
+        return occupancy
+
+    with app.app_context():
+        loop_ms, expected = time_runs(loop, args.repeats)
+        matrix_ms, occupancy = time_runs(matrix, args.repeats)
+
+    mismatches = [key for key, table_ids in expected.items() if occupancy.available_tables(*key) != table_ids]
+    temp_dir.cleanup()
+
+    print(f"{args.days} days x {len(slots)} slots x {len(PARTY_SIZES)} party sizes, {args.tables} tables")
+    print(f"{'loop (find_available_tables)':<32} {loop_ms:>10.2f} ms")
+    print(f"{'matrix (OccupancyMatrix)':<32} {matrix_ms:>10.2f} ms")
+    print(f"Speed-up: {loop_ms / matrix_ms:.1f}x")
+
+    if mismatches:
+        print(f"❌ {len(mismatches)} answers differ, e.g. {mismatches[0]}")
+        sys.exit(1)
+    print(f"✅ All {len(expected)} answers identical")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Page Rendering Benchmark for Restaurant Reservation System
+MIT400 Assessment 2
+
+This script measures time to first byte (TTFB) of the HTML pages with the
+template caches of page_cache.py turned on and off:
+
+    - cold: the first request to each page in a fresh process, which pays
+      for compiling its templates (or loading them from the on-disk
+      bytecode cache, filled by an earlier process)
+    - warm: the median over repeated requests once the process is warm,
+      where pre-rendered pages and cached fragments skip rendering
+
+Every measurement runs wsgi:app behind a real HTTP server in a new Python
+process; TTFB is the time from sending the request until the status line
+and headers have arrived.
+
+Usage:
+    python benchmark_pages.py
+    python benchmark_pages.py --requests 200 --tables 60
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Code run in each fresh interpreter; prints one JSON line of timings
+MEASURE_SCRIPT = r'''
+import http.client, json, statistics, sys, threading, time
+from urllib.parse import urlencode
+from werkzeug.serving import make_server
+
+requests_per_page, table_count = int(sys.argv[1]), int(sys.argv[2])
+
+import wsgi
+from models import db, Table
+with wsgi.app.app_context():
+    db.create_all()
+    if Table.query.count() == 0:
+        db.session.add_all([Table(table_number=number, capacity=2 + 2 * (number % 4), location=f'Area {number % 5}')
+                            for number in range(1, table_count + 1)])
+        db.session.commit()
+
+server = make_server('127.0.0.1', 0, wsgi.app, threaded=True)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+connection = http.client.HTTPConnection('127.0.0.1', server.server_port)
+
+def fetch(method, path, body=None, headers=None):
+    started = time.perf_counter()
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    first_byte = (time.perf_counter() - started) * 1000
+    response.read()
+    return response, first_byte
+
+response, _ = fetch('POST', '/login', urlencode({'username': 'admin', 'password': 'admin123'}),
+                    {'Content-Type': 'application/x-www-form-urlencoded'})
+staff = {'Cookie': response.getheader('Set-Cookie').split(';')[0]}
+fetch('GET', '/admin', headers=staff)   # consumes the welcome flash message
+
+timings = {}
+for name, path, headers in [('index', '/', {}), ('login', '/login', {}), ('admin_tables', '/admin/tables', staff)]:
+    response, timings[f'{name}_cold_ms'] = fetch('GET', path, headers=headers)
+    assert response.status == 200, (path, response.status)
+    samples = [fetch('GET', path, headers=headers)[1] for _ in range(requests_per_page)]
+    timings[f'{name}_warm_ms'] = statistics.median(samples)
+
+server.shutdown()
+print(json.dumps(timings))
+'''
+
+def measure(database_url, cache_enabled, bytecode_dir, requests_per_page, table_count):
+    """Run one fresh process and return its timings"""
+    env = dict(os.environ, DATABASE_URL=database_url,
+               TEMPLATE_CACHE_ENABLED='true' if cache_enabled else 'false',
+               JINJA_BYTECODE_CACHE_DIR=bytecode_dir, SCHEDULER_ENABLED='false', METRICS_ENABLED='false')
+    output = subprocess.run(
+        [sys.executable, '-c', MEASURE_SCRIPT, str(requests_per_page), str(table_count)],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Measure time to first byte of the HTML pages')
+    parser.add_argument('--requests', type=int, default=100, help='warm requests per page')
+    parser.add_argument('--tables', type=int, default=40, help='tables on the floor plan')
+    args = parser.parse_args()
+
+    print("⏱️  Restaurant Reservation System - Page TTFB benchmark")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_url = f"sqlite:///{os.path.join(temp_dir, 'pages.db')}"
+        bytecode_dir = os.path.join(temp_dir, 'jinja')
+
+        uncached = measure(database_url, False, '', args.requests, args.tables)
+        # The first cached process fills the bytecode cache, the second loads from it
+        measure(database_url, True, bytecode_dir, 1, args.tables)
+        cached = measure(database_url, True, bytecode_dir, args.requests, args.tables)
+
+    print(f"\n  {'':<24} {'uncached':>10} {'cached':>10} {'speedup':>9}")
+    for name in uncached:
+        speedup = uncached[name] / cached[name] if cached[name] else float('inf')
+        print(f"  {name:.<24} {uncached[name]:>8.2f}ms {cached[name]:>8.2f}ms {speedup:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
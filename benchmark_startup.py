@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark for Restaurant Reservation System
+MIT400 Assessment 2
+
+This script measures what a fresh gunicorn worker pays before it can
+serve traffic: the time to import wsgi:app and the latency of the first
+requests it handles (templates compiled on first render, the database
+connection opened on first query).
+
+Each run happens in a new Python process with its own empty Jinja
+bytecode cache directory (JINJA_BYTECODE_CACHE_DIR), so nothing is cached
+between runs. The median over all runs is reported, and can be saved as
+JSON and compared against an earlier run.
+
+Usage:
+    python benchmark_startup.py
+    python benchmark_startup.py --runs 10 --output startup.json
+    python benchmark_startup.py --baseline startup.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Code run in each fresh interpreter; prints one JSON line of timings
+MEASURE_SCRIPT = r'''
+import json, time
+started = time.perf_counter()
+import wsgi
+timings = {'import_ms': (time.perf_counter() - started) * 1000}
+
+from models import db
+with wsgi.app.app_context():
+    db.create_all()
+
+client = wsgi.app.test_client()
+for name, path in [('first_request_ms', '/health'),
+                   ('first_page_ms', '/'),
+                   ('first_query_ms', '/api/stats')]:
+    started = time.perf_counter()
+    response = client.get(path)
+    timings[name] = (time.perf_counter() - started) * 1000
+    assert response.status_code == 200, (path, response.status_code)
+
+print(json.dumps(timings))
+'''
+
+def measure_once(database_url, cache_dir):
+    """Run one cold start in a new interpreter and return its timings"""
+    env = dict(os.environ, DATABASE_URL=database_url, JINJA_BYTECODE_CACHE_DIR=cache_dir)
+    output = subprocess.run(
+        [sys.executable, '-c', MEASURE_SCRIPT],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Measure import and first-request latency of wsgi:app')
+    parser.add_argument('--runs', type=int, default=5, help='number of cold starts to measure')
+    parser.add_argument('--output', help='write the median timings as JSON to this file')
+    parser.add_argument('--baseline', help='JSON file from an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown against the baseline (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    print("⏱️  Restaurant Reservation System - Startup benchmark")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_url = f"sqlite:///{os.path.join(temp_dir, 'startup.db')}"
+        # A fresh bytecode cache per run, or templates after the first run load precompiled
+        runs = [measure_once(database_url, os.path.join(temp_dir, f'jinja-cache-{run}')) for run in range(args.runs)]
+
+    results = {name: round(statistics.median(run[name] for run in runs), 2) for name in runs[0]}
+
+    for name, value in results.items():
+        print(f"  {name:.<30} {value:>8.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = [name for name, value in results.items()
+                       if name in baseline and value > baseline[name] * (1 + args.tolerance)]
+        for name in regressions:
+            print(f"❌ {name} regressed: {baseline[name]:.2f} ms -> {results[name]:.2f} ms")
+        if regressions:
+            sys.exit(1)
+        print("✅ No startup regressions against baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for Restaurant Reservation System
+MIT400 Assessment 2
+
+This script seeds a database with a configurable volume of tables,
+customers and reservation history, then times the reservation hot paths:
+
+    - find_available_tables
+    - POST /api/reservations
+    - search_reservations (/api/reservations/search)
+    - admin_dashboard (/admin)
+    - admin_reservations pagination (/admin/reservations?page=N)
+    - view_database (/api/database/view)
+
+Results are written as JSON so runs can be compared. When a baseline is
+given, any path whose median time grew by more than the tolerance is
+reported and the script exits with status 1.
+
+Usage:
+    python benchmark_system.py
+    python benchmark_system.py --tables 40 --customers 20000 --per-day 60 --months 12
+    python benchmark_system.py --output baseline.json
+    python benchmark_system.py --baseline baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time as time_module
+from datetime import datetime, date, time, timedelta
+
+# Bookable slots between OPENING_TIME and CLOSING_TIME
+SLOTS = [time(hour, minute) for hour in range(17, 22) for minute in (0, 30)]
+
+def seed_benchmark_data(app, tables, customers, per_day, months, seed=42):
+    """
+    Fill the database with a floor plan, customers and reservation history
+
+    Args:
+        app (Flask): Application whose database is seeded
+        tables (int): Number of tables
+        customers (int): Number of customers
+        per_day (int): Average reservations per day
+        months (int): Months of history before today (plus one month ahead)
+        seed (int): Random seed so runs see the same data
+    """
+    from models import db
+    from generate_data import generate
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        generate(db.engine, tables=tables, customers=customers,
+                 start_date=date.today() - timedelta(days=30 * months),
+                 end_date=date.today() + timedelta(days=30),
+                 per_day=per_day, seed=seed, log=None)
+
+def time_path(function, iterations, warmup=2):
+    """
+    Time a callable and summarise the runs
+
+    Returns:
+        dict: Iterations and mean/median/p95 in milliseconds
+    """
+    for _ in range(warmup):
+        function()
+
+    samples = []
+    for _ in range(iterations):
+        started = time_module.perf_counter()
+        function()
+        samples.append((time_module.perf_counter() - started) * 1000)
+
+    samples.sort()
+    return {
+        'iterations': iterations,
+        'mean_ms': round(statistics.mean(samples), 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[max(0, int(len(samples) * 0.95) - 1)], 3)
+    }
+
+def expect_status(response, *statuses):
+    """Fail loudly if a benchmarked request did not succeed"""
+    if response.status_code not in statuses:
+        raise RuntimeError(f"{response.request.path} returned {response.status_code}")
+    return response
+
+def run_benchmarks(app, iterations, seed=42):
+    """
+    Time every hot path against the seeded database
+
+    Returns:
+        dict: Timing summary per path
+    """
+    from models import db, Reservation, find_available_tables
+
+    rng = random.Random(seed)
+    client = app.test_client()
+    expect_status(client.post('/login', data={'username': 'admin', 'password': 'admin123'}), 302)
+
+    with app.app_context():
+        total = db.session.scalar(db.select(db.func.count()).select_from(Reservation))
+    pages = max(1, -(-total // app.config['RESERVATIONS_PER_PAGE']))
+
+    def random_future_day():
+        return date.today() + timedelta(days=rng.randint(1, 30))
+
+    def available_tables():
+        with app.app_context():
+            find_available_tables(random_future_day(), rng.choice(SLOTS), rng.choice([2, 4, 6]))
+
+    booking_number = iter(range(10 ** 9))
+
+    def create_reservation():
+        number = next(booking_number)
+        expect_status(client.post('/api/reservations', json={
+            'first_name': 'Bench', 'last_name': 'Guest', 'phone': f'+1 666 {number:07d}',
+            'date': random_future_day().isoformat(), 'time': rng.choice(SLOTS).strftime('%H:%M'),
+            'party_size': rng.choice([2, 2, 4])
+        }), 201, 409)
+
+    def search():
+        expect_status(client.get('/api/reservations/search', query_string={
+            'q': rng.choice(['smith', 'chen', '555 0000012', 'wilson'])}), 200)
+
+    def dashboard():
+        expect_status(client.get('/admin'), 200)
+
+    def reservation_pages():
+        page = rng.choice([1, 2, pages // 2, pages])
+        expect_status(client.get('/admin/reservations', query_string={'page': page}), 200)
+
+    def database_view():
+        expect_status(client.get('/api/database/view'), 200)
+
+    return {
+        'find_available_tables': time_path(available_tables, iterations),
+        'create_reservation_api': time_path(create_reservation, iterations),
+        'search_reservations': time_path(search, iterations),
+        'admin_dashboard': time_path(dashboard, iterations),
+        'admin_reservations': time_path(reservation_pages, iterations),
+        # The full dump is by far the slowest path, a few runs are enough
+        'view_database': time_path(database_view, max(3, iterations // 10), warmup=1)
+    }
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    Find paths that slowed down beyond the tolerance
+
+    Returns:
+        list: (path, baseline median, current median) for each regression
+    """
+    regressions = []
+    for path, timing in results.items():
+        previous = baseline.get('results', {}).get(path)
+        if previous and timing['median_ms'] > previous['median_ms'] * (1 + tolerance):
+            regressions.append((path, previous['median_ms'], timing['median_ms']))
+    return regressions
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Benchmark the reservation hot paths')
+    parser.add_argument('--tables', type=int, default=30, help='number of tables')
+    parser.add_argument('--customers', type=int, default=5000, help='number of customers')
+    parser.add_argument('--per-day', type=int, default=40, help='reservations per day')
+    parser.add_argument('--months', type=int, default=6, help='months of reservation history')
+    parser.add_argument('--iterations', type=int, default=50, help='timed runs per path')
+    parser.add_argument('--database-url', help='database to use (default: temporary SQLite file); it is wiped')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results from an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed median slowdown (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    temp_dir = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(temp_dir.name, 'benchmark.db')}"
+
+    from app import create_app
+    app = create_app('production')
+
+    print("📊 Restaurant Reservation System - Benchmark Suite")
+    print(f"Seeding {args.tables} tables, {args.customers} customers, "
+          f"{args.per_day} reservations/day over {args.months} months...")
+    started = time_module.perf_counter()
+    seed_benchmark_data(app, args.tables, args.customers, args.per_day, args.months)
+    print(f"✓ Seeded in {time_module.perf_counter() - started:.1f}s\n")
+
+    results = run_benchmarks(app, args.iterations)
+
+    print(f"{'path':<26} {'median ms':>10} {'p95 ms':>10} {'mean ms':>10}")
+    for path, timing in results.items():
+        print(f"{path:<26} {timing['median_ms']:>10.2f} {timing['p95_ms']:>10.2f} {timing['mean_ms']:>10.2f}")
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'volumes': {'tables': args.tables, 'customers': args.customers,
+                    'per_day': args.per_day, 'months': args.months},
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+
+    temp_dir.cleanup()
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        if baseline.get('volumes') != report['volumes']:
+            print("⚠️  Baseline was recorded with different data volumes")
+
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        for path, previous, current in regressions:
+            print(f"❌ {path} regressed: {previous:.2f} ms -> {current:.2f} ms")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No path slowed down more than {args.tolerance:.0%} against the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,566 @@
+"""
+Booking Logic for Restaurant Reservation System
+MIT400 Assessment 2
+
+This module holds the request validation and booking steps shared by the
+Flask views in app.py and the async public API in asgi.py, so both front
+ends accept the same payloads and book tables the same way.
+
+Functions return plain dictionaries and HTTP status codes rather than
+Flask responses, which lets each front end wrap them in its own response
+type.
+"""
+
+from datetime import datetime, date, time, timedelta
+from models import (db, Table, Reservation, WaitlistEntry, ACTIVE_RESERVATION_STATUSES, find_available_tables,
+                    create_customer, create_reservation)
+from holds import new_hold
+from waitlist import match_entry
+
+# Fields every reservation request must include
+REQUIRED_RESERVATION_FIELDS = ['first_name', 'last_name', 'phone', 'date', 'time', 'party_size']
+
+# Most suggestions one GET /api/availability/next may ask for
+MAX_SUGGESTIONS = 20
+
+# Days either side of the requested date searched first for suggestions
+SUGGESTION_WINDOW_DAYS = 3
+
+# Fields every waitlist request must include
+REQUIRED_WAITLIST_FIELDS = ['first_name', 'last_name', 'phone', 'date', 'earliest_time', 'latest_time', 'party_size']
+
+def parse_availability_query(args):
+    """
+    Validate and parse availability query parameters
+
+    Args:
+        args (Mapping): Query parameters with 'date', 'time' and 'party_size'
+
+    Returns:
+        tuple: ((date, time, party_size), None) or (None, error message)
+    """
+    reservation_date = args.get('date')
+    reservation_time = args.get('time')
+    try:
+        party_size = int(args.get('party_size'))
+    except (TypeError, ValueError):
+        party_size = None
+
+    if not all([reservation_date, reservation_time, party_size]):
+        return None, 'Missing required parameters'
+
+    try:
+        res_date = datetime.strptime(reservation_date, '%Y-%m-%d').date()
+        res_time = datetime.strptime(reservation_time, '%H:%M').time()
+    except ValueError:
+        return None, 'Invalid date or time format'
+
+    return (res_date, res_time, party_size), None
+
+def parse_availability_batch(data, limit):
+    """
+    Validate and parse a batch availability request payload
+
+    Args:
+        data (dict): JSON payload {"queries": [{"date", "time", "party_size"}, ...]}
+        limit (int): Most queries accepted in one batch
+
+    Returns:
+        tuple: (list of (date, time, party_size), None) or (None, error message)
+    """
+    queries = data.get('queries') if isinstance(data, dict) else None
+    if not isinstance(queries, list) or not queries:
+        return None, 'Request body must be a JSON object with a non-empty "queries" list'
+    if len(queries) > limit:
+        return None, f'At most {limit} queries per batch'
+
+    parsed = []
+    for index, query in enumerate(queries):
+        if not isinstance(query, dict):
+            return None, f'queries[{index}]: must be an object'
+        values, error = parse_availability_query(query)
+        if error:
+            return None, f'queries[{index}]: {error}'
+        parsed.append(values)
+    return parsed, None
+
+def batch_available_tables(queries, session=None, holds=None):
+    """
+    Answer many availability queries from one read of the data they need
+
+    The table catalog is loaded once and the active reservations of every
+    date in the batch with one more query; each query is then answered in
+    memory with the same rules and ordering as find_available_tables.
+
+    Args:
+        queries (list): (date, time, party_size) tuples
+        session (Session, optional): Session to use, defaults to db.session
+        holds (optional): Hold store from holds.py; held tables count as taken
+
+    Returns:
+        tuple: (list of available table id lists, one per query in order,
+            dict of table dicts by table_id for every table listed)
+    """
+    session = session if session is not None else db.session
+    tables = session.scalars(
+        db.select(Table).where(Table.status == 'available').order_by(Table.capacity, Table.table_id)).all()
+
+    # Booked tables per slot for every date in the batch
+    dates = sorted({reservation_date for reservation_date, _, _ in queries})
+    booked = {}
+    for reservation_date, reservation_time, table_id in session.execute(db.select(
+            Reservation.reservation_date, Reservation.reservation_time, Reservation.table_id).where(
+            Reservation.reservation_date.in_(dates),
+            Reservation.status.in_(ACTIVE_RESERVATION_STATUSES))):
+        booked.setdefault((reservation_date, reservation_time), set()).add(table_id)
+
+    # One hold lookup per distinct slot
+    if holds is not None:
+        for slot in {(reservation_date, reservation_time) for reservation_date, reservation_time, _ in queries}:
+            held = holds.held_tables(*slot)
+            if held:
+                booked.setdefault(slot, set()).update(held)
+
+    results = []
+    listed = set()
+    for reservation_date, reservation_time, party_size in queries:
+        taken = booked.get((reservation_date, reservation_time), ())
+        table_ids = [table.table_id for table in tables if table.capacity >= party_size and table.table_id not in taken]
+        listed.update(table_ids)
+        results.append(table_ids)
+    return results, {table.table_id: table.to_dict() for table in tables if table.table_id in listed}
+
+def parse_reservation_request(data):
+    """
+    Validate and parse a reservation request payload
+
+    Args:
+        data (dict): JSON payload posted to /api/reservations
+
+    Returns:
+        tuple: (fields dict, None) or (None, error message)
+    """
+    if not isinstance(data, dict):
+        return None, 'Request body must be a JSON object'
+
+    # Validate required fields
+    for field in REQUIRED_RESERVATION_FIELDS:
+        if field not in data:
+            return None, f'Missing required field: {field}'
+
+    # Parse date and time
+    try:
+        res_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+        res_time = datetime.strptime(data['time'], '%H:%M').time()
+    except (TypeError, ValueError):
+        return None, 'Invalid date or time format'
+
+    try:
+        party_size = int(data['party_size'])
+    except (TypeError, ValueError):
+        return None, 'Invalid party size'
+
+    if party_size < 1:
+        return None, 'Invalid party size'
+
+    # Validate future date
+    if res_date < date.today():
+        return None, 'Reservation date must be in the future'
+
+    return {
+        'first_name': data['first_name'],
+        'last_name': data['last_name'],
+        'phone': data['phone'],
+        'email': data.get('email'),
+        'date': res_date,
+        'time': res_time,
+        'party_size': party_size,
+        'special_requests': data.get('special_requests'),
+        'hold_token': data.get('hold_token')
+    }, None
+
+def parse_hold_request(data):
+    """
+    Validate and parse a slot hold request payload
+
+    Args:
+        data (dict): JSON payload posted to /api/holds
+
+    Returns:
+        tuple: ((date, time, party_size, table_id or None), None) or (None, error message)
+    """
+    if not isinstance(data, dict):
+        return None, 'Request body must be a JSON object'
+
+    query, error = parse_availability_query(data)
+    if error:
+        return None, error
+    if query[0] < date.today():
+        return None, 'Reservation date must be in the future'
+
+    table_id = data.get('table_id')
+    if table_id is not None:
+        try:
+            table_id = int(table_id)
+        except (TypeError, ValueError):
+            return None, 'Invalid table_id'
+
+    return query + (table_id,), None
+
+def place_hold(hold_request, holds, ttl, session=None):
+    """
+    Hold the smallest suitable free table (or the requested one) for a slot
+
+    Args:
+        hold_request (tuple): Output of parse_hold_request
+        holds: Hold store from holds.py
+        ttl (int): Seconds the hold lasts
+        session (Session, optional): Session to use, defaults to db.session
+
+    Returns:
+        tuple: (response body dict, HTTP status code)
+    """
+    reservation_date, reservation_time, party_size, table_id = hold_request
+    available_tables = find_available_tables(
+        reservation_date, reservation_time, party_size, session=session,
+        exclude_table_ids=holds.held_tables(reservation_date, reservation_time))
+    if table_id is not None:
+        available_tables = [table for table in available_tables if table.table_id == table_id]
+
+    # Another customer may hold a candidate by now, try the next one
+    for table in available_tables:
+        hold = new_hold(table, reservation_date, reservation_time, party_size, ttl)
+        if holds.create(hold, ttl):
+            return {'message': 'Table held', 'hold': hold, 'table': table.to_dict()}, 201
+
+    return {
+        'error': f'No tables available for {party_size} people on '
+                 f'{reservation_date.isoformat()} at {reservation_time.strftime("%H:%M")}'
+    }, 409
+
+def suggest_slots(reservation_date, reservation_time, party_size, slots, max_days, limit,
+                  session=None, holds=None, now=None):
+    """
+    Free slots nearest to a requested time, for a party that could not book it
+
+    The days around the requested date (SUGGESTION_WINDOW_DAYS either side)
+    are loaded into an OccupancyMatrix and their free slots ranked by
+    distance from the request; holds are checked only for the slots
+    actually offered. The window is widened, up to the booking window
+    (today to max_days ahead), only while a slot outside it could still be
+    nearer than the suggestions found.
+
+    Args:
+        reservation_date (date): Requested date
+        reservation_time (time): Requested time
+        party_size (int): Number of people
+        slots (list): Bookable slot times (occupancy.bookable_slots)
+        max_days (int): Days ahead bookings are taken (MAX_ADVANCE_BOOKING_DAYS)
+        limit (int): Number of suggestions
+        session (Session, optional): Session to use, defaults to db.session
+        holds (optional): Hold store from holds.py; held tables are not offered
+        now (datetime, optional): Current time, slots before it are skipped
+
+    Returns:
+        list: Dicts with date, time, table_id and capacity, nearest first,
+            one per slot (its smallest free table)
+    """
+    from occupancy import OccupancyMatrix
+
+    now = now or datetime.now()
+    first_day, last_day = now.date(), now.date() + timedelta(days=max_days)
+    requested = datetime.combine(reservation_date, reservation_time)
+    centre = min(max(reservation_date, first_day), last_day)
+    radius = SUGGESTION_WINDOW_DAYS
+
+    while True:
+        start = max(centre - timedelta(days=radius), first_day)
+        end = min(centre + timedelta(days=radius), last_day)
+        matrix = OccupancyMatrix.load(start, (end - start).days + 1, slots, session)
+        capacities = dict(zip(matrix.table_ids.tolist(), matrix.capacities.tolist()))
+
+        suggestions = []
+        distance = None
+        for slot_date, slot_time, table_ids in matrix.nearest_free_slots(party_size, reservation_date,
+                                                                         reservation_time, not_before=now):
+            held_tables = holds.held_tables(slot_date, slot_time) if holds is not None else ()
+            table_id = next((table_id for table_id in table_ids if table_id not in held_tables), None)
+            if table_id is None:
+                continue
+            suggestions.append({
+                'date': slot_date.isoformat(),
+                'time': slot_time.strftime('%H:%M'),
+                'table_id': table_id,
+                'capacity': capacities[table_id]
+            })
+            distance = abs(datetime.combine(slot_date, slot_time) - requested)
+            if len(suggestions) == limit:
+                break
+
+        # Every slot outside the window is at least this far from the request
+        outside = []
+        if start > first_day:
+            outside.append(requested - datetime.combine(start, time.min))
+        if end < last_day:
+            outside.append(datetime.combine(end + timedelta(days=1), time.min) - requested)
+        if not outside or (len(suggestions) == limit and distance <= min(outside)):
+            return suggestions
+        radius *= 4
+
+def slot_suggester(config, holds=None):
+    """
+    Bind suggest_slots to the opening hours and booking window of a config
+
+    Args:
+        config (Mapping): Application config
+        holds (optional): Hold store from holds.py
+
+    Returns:
+        callable: suggest(date, time, party_size, session=None, limit=None)
+    """
+    def suggest(reservation_date, reservation_time, party_size, session=None, limit=None):
+        from occupancy import bookable_slots
+
+        slots = bookable_slots(config['OPENING_TIME'], config['CLOSING_TIME'], config['TIME_SLOT_DURATION'])
+        return suggest_slots(reservation_date, reservation_time, party_size, slots,
+                             config['MAX_ADVANCE_BOOKING_DAYS'], limit or config['AVAILABILITY_SUGGESTIONS'],
+                             session=session, holds=holds)
+    return suggest
+
+def book_reservation(fields, session=None, holds=None, suggest=None):
+    """
+    Book the smallest suitable table for a parsed reservation request
+
+    With a valid hold_token the held table is booked directly; otherwise
+    tables other customers hold are skipped.
+
+    Args:
+        fields (dict): Output of parse_reservation_request
+        session (Session, optional): Session to use, defaults to db.session
+        holds (optional): Hold store from holds.py
+        suggest (callable, optional): slot_suggester function; when no table
+            is free its nearest free slots are returned as 'suggestions'
+
+    Returns:
+        tuple: (response body dict, HTTP status code)
+    """
+    hold = None
+    if holds is not None and fields.get('hold_token'):
+        # An expired or unknown token just means searching as usual
+        hold = holds.get(fields['hold_token'])
+        requested_slot = (fields['date'].isoformat(), fields['time'].strftime('%H:%M'))
+        if hold is not None and ((hold['date'], hold['time']) != requested_slot
+                                 or hold['capacity'] < fields['party_size']):
+            return {'error': 'Hold does not match the reservation date, time or party size'}, 400
+
+    # Create or get customer
+    customer = create_customer(
+        first_name=fields['first_name'],
+        last_name=fields['last_name'],
+        phone=fields['phone'],
+        email=fields['email'],
+        session=session
+    )
+
+    if not customer:
+        return {'error': 'Failed to create customer'}, 500
+
+    # Find available table
+    held_table = None
+    if hold is not None:
+        session = session if session is not None else db.session
+        held_table = session.get(Table, hold['table_id'])
+        if held_table is None:
+            # The held table was deleted during the hold: search as for an expired hold
+            holds.release(hold['hold_token'])
+            hold = None
+    if held_table is not None:
+        available_tables = [held_table]
+    else:
+        held_tables = holds.held_tables(fields['date'], fields['time']) if holds is not None else ()
+        available_tables = find_available_tables(fields['date'], fields['time'], fields['party_size'],
+                                                 session=session, exclude_table_ids=held_tables)
+
+    no_tables_error = {
+        'error': f'No tables available for {fields["party_size"]} people on '
+                 f'{fields["date"].isoformat()} at {fields["time"].strftime("%H:%M")}'
+    }
+
+    # Use the smallest suitable table; if the insert loses a race for it
+    # (uq_reservations_active_slot rejects it), move on to the next one
+    for selected_table in available_tables:
+        reservation = create_reservation(
+            customer_id=customer.customer_id,
+            table_id=selected_table.table_id,
+            reservation_date=fields['date'],
+            reservation_time=fields['time'],
+            party_size=fields['party_size'],
+            special_requests=fields['special_requests'],
+            session=session
+        )
+        if reservation:
+            break
+    else:
+        if suggest is not None:
+            no_tables_error['suggestions'] = suggest(fields['date'], fields['time'], fields['party_size'],
+                                                     session=session)
+        return no_tables_error, 409
+
+    if hold is not None:
+        holds.release(hold['hold_token'])
+
+    return {
+        'message': 'Reservation created successfully',
+        'reservation': reservation.to_dict()
+    }, 201
+
+def parse_waitlist_request(data):
+    """
+    Validate and parse a waitlist request payload
+
+    Args:
+        data (dict): JSON payload posted to /api/waitlist
+
+    Returns:
+        tuple: (fields dict, None) or (None, error message)
+    """
+    if not isinstance(data, dict):
+        return None, 'Request body must be a JSON object'
+
+    for field in REQUIRED_WAITLIST_FIELDS:
+        if field not in data:
+            return None, f'Missing required field: {field}'
+
+    try:
+        res_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+        earliest_time = datetime.strptime(data['earliest_time'], '%H:%M').time()
+        latest_time = datetime.strptime(data['latest_time'], '%H:%M').time()
+    except (TypeError, ValueError):
+        return None, 'Invalid date or time format'
+
+    if earliest_time > latest_time:
+        return None, 'earliest_time must not be after latest_time'
+
+    try:
+        party_size = int(data['party_size'])
+        priority = int(data.get('priority') or 0)
+    except (TypeError, ValueError):
+        return None, 'Invalid party size or priority'
+
+    if party_size < 1:
+        return None, 'Invalid party size'
+
+    if res_date < date.today():
+        return None, 'Reservation date must be in the future'
+
+    return {
+        'first_name': data['first_name'],
+        'last_name': data['last_name'],
+        'phone': data['phone'],
+        'email': data.get('email'),
+        'date': res_date,
+        'earliest_time': earliest_time,
+        'latest_time': latest_time,
+        'party_size': party_size,
+        'priority': priority,
+        'special_requests': data.get('special_requests')
+    }, None
+
+def join_waitlist(fields, step_minutes, session=None, holds=None):
+    """
+    Put a parsed request on the waitlist, booking at once if a table is free
+
+    Args:
+        fields (dict): Output of parse_waitlist_request
+        step_minutes (int): Minutes between slots (TIME_SLOT_DURATION)
+        session (Session, optional): Session to use, defaults to db.session
+        holds (optional): Hold store from holds.py
+
+    Returns:
+        tuple: (response body dict, HTTP status code)
+    """
+    session = session if session is not None else db.session
+    customer = create_customer(
+        first_name=fields['first_name'],
+        last_name=fields['last_name'],
+        phone=fields['phone'],
+        email=fields['email'],
+        session=session
+    )
+
+    if not customer:
+        return {'error': 'Failed to create customer'}, 500
+
+    entry = WaitlistEntry(
+        customer_id=customer.customer_id,
+        reservation_date=fields['date'],
+        earliest_time=fields['earliest_time'],
+        latest_time=fields['latest_time'],
+        party_size=fields['party_size'],
+        priority=fields['priority'],
+        special_requests=fields['special_requests']
+    )
+    session.add(entry)
+    session.commit()
+
+    reservation = match_entry(entry, step_minutes, session=session, holds=holds)
+    if reservation:
+        return {
+            'message': 'A table was free, reservation created',
+            'entry': entry.to_dict(),
+            'reservation': reservation.to_dict()
+        }, 201
+
+    return {'message': 'Added to the waitlist', 'entry': entry.to_dict()}, 201
+
+def restaurant_stats(restaurant_name, session=None):
+    """
+    Collect the public restaurant statistics
+
+    Args:
+        restaurant_name (str): Name to report
+        session (Session, optional): Session to use, defaults to db.session
+
+    Returns:
+        dict: Table and reservation counts for today
+    """
+    session = session if session is not None else db.session
+    total_tables = session.query(Table).filter_by(status='available').count()
+    today_reservations = session.query(Reservation).filter_by(reservation_date=date.today()).count()
+
+    return {
+        'total_tables': total_tables,
+        'today_reservations': today_reservations,
+        'restaurant_name': restaurant_name,
+        'status': 'online'
+    }
+
+def daily_summary(service_date, session=None):
+    """
+    Summarise one service day, one row of the cross-tenant admin report
+
+    Args:
+        service_date (date): Day to summarise
+        session (Session, optional): Session to use, defaults to db.session
+
+    Returns:
+        dict: Reservation counts by status, covers booked, tables in service
+            and parties still waiting
+    """
+    session = session if session is not None else db.session
+    rows = session.query(Reservation.status, db.func.count(), db.func.sum(Reservation.party_size)).filter(
+        Reservation.reservation_date == service_date).group_by(Reservation.status).all()
+    summary = {status: 0 for status in ['pending', 'confirmed', 'cancelled', 'completed']}
+    covers = 0
+    for status, count, party_total in rows:
+        summary[status] = count
+        if status != 'cancelled':
+            covers += party_total or 0
+
+    summary.update({
+        'reservations': sum(count for _, count, _ in rows),
+        'covers': covers,
+        'tables': session.query(Table).filter_by(status='available').count(),
+        'waitlist': session.query(WaitlistEntry).filter_by(reservation_date=service_date, status='waiting').count()
+    })
+    return summary
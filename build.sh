@@ -7,6 +7,9 @@ echo "🔧 Installing dependencies..."
 pip install --upgrade pip
 pip install -r requirements.txt
 
+echo "📦 Building static assets..."
+python assets.py --prune
+
 echo "🗄️ Setting up database..."
 python setup_database.py || echo "⚠️ Database setup failed, continuing with app startup..."
 
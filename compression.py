@@ -0,0 +1,166 @@
+"""
+Response Compression for Restaurant Reservation System
+MIT400 Assessment 2
+
+Compresses dynamic responses - HTML pages, JSON from the admin and
+search APIs - with brotli or gzip, whichever the client prefers in
+Accept-Encoding (brotli first when it is installed and accepted).
+
+    - responses below COMPRESSION_MIN_SIZE bytes are sent as they are; the
+      saving would not cover the CPU time and headers
+    - responses that already carry a Content-Encoding (precompressed
+      assets from assets.py), file responses and formats that are already
+      compressed (images, archives) are skipped
+    - streamed (chunked) responses are compressed chunk by chunk and
+      flushed after each one, so the client still receives data as soon
+      as it is produced
+    - ETags are made weak, since the compressed bytes differ from the
+      identity body but are semantically the same
+
+Dynamic content uses fast settings (gzip level 6, brotli quality 4);
+benchmark_compression.py weighs the CPU time of each setting against the
+bytes it saves.
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Text formats worth compressing
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/javascript', 'application/javascript',
+    'application/json', 'application/xml', 'image/svg+xml'
+}
+
+class _GzipStream:
+    """Incremental gzip compressor"""
+
+    def __init__(self, level):
+        # wbits 31 writes the gzip header and trailer
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush(zlib.Z_FINISH)
+
+class _BrotliStream:
+    """Incremental brotli compressor"""
+
+    def __init__(self, quality):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+def available_encodings():
+    """Encodings this process can produce, in order of preference"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def negotiate_encoding(accept_encodings):
+    """
+    Pick the preferred encoding the client accepts
+
+    Args:
+        accept_encodings (Accept): request.accept_encodings
+
+    Returns:
+        str: 'br', 'gzip' or None for identity
+    """
+    return next((encoding for encoding in available_encodings() if accept_encodings[encoding]), None)
+
+def compressor(encoding, gzip_level=6, brotli_quality=4):
+    """Create an incremental compressor for an encoding"""
+    if encoding == 'br':
+        return _BrotliStream(brotli_quality)
+    return _GzipStream(gzip_level)
+
+def compress_bytes(data, encoding, gzip_level=6, brotli_quality=4):
+    """
+    Compress a complete body
+
+    Returns:
+        bytes: Compressed body
+    """
+    stream = compressor(encoding, gzip_level, brotli_quality)
+    return stream.compress(data) + stream.finish()
+
+def compress_chunks(chunks, encoding, gzip_level=6, brotli_quality=4):
+    """
+    Compress a streamed body, flushing after every chunk
+
+    Args:
+        chunks (iterable): Body chunks as bytes
+
+    Yields:
+        bytes: Compressed chunks
+    """
+    stream = compressor(encoding, gzip_level, brotli_quality)
+    try:
+        for chunk in chunks:
+            compressed = stream.compress(chunk) + stream.flush()
+            if compressed:
+                yield compressed
+        yield stream.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+def init_compression(app):
+    """
+    Compress the responses of an application
+
+    Args:
+        app (Flask): Application configured with COMPRESSION_MIN_SIZE,
+            COMPRESSION_GZIP_LEVEL and COMPRESSION_BROTLI_QUALITY
+    """
+    from flask import request
+
+    min_size = app.config.get('COMPRESSION_MIN_SIZE', 500)
+    gzip_level = app.config.get('COMPRESSION_GZIP_LEVEL', 6)
+    brotli_quality = app.config.get('COMPRESSION_BROTLI_QUALITY', 4)
+
+    @app.after_request
+    def compress_response(response):
+        if (response.mimetype not in COMPRESSIBLE_MIMETYPES or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.status_code < 200 or response.status_code in (204, 304)):
+            return response
+
+        # Caches must keep compressed and identity copies apart
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate_encoding(request.accept_encodings)
+        if encoding is None or request.method == 'HEAD':
+            return response
+
+        if response.is_streamed:
+            response.response = compress_chunks(response.iter_encoded(), encoding, gzip_level, brotli_quality)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < min_size:
+                return response
+            compressed = compress_bytes(body, encoding, gzip_level, brotli_quality)
+            if len(compressed) >= len(body):
+                return response
+            response.set_data(compressed)
+
+        response.content_encoding = encoding
+        etag, _ = response.get_etag()
+        if etag:
+            response.set_etag(etag, weak=True)
+        return response
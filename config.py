@@ -2,6 +2,7 @@
 # MIT400 Assessment 2 - Database Configuration
 
 import os
+import tempfile
 from datetime import timedelta
 
 class Config:
@@ -61,6 +62,78 @@ class Config:
     # Pagination
     RESERVATIONS_PER_PAGE = 10
     
+    # Archival (archive.py) - finished reservations older than this move to reservations_archive
+    RESERVATION_RETENTION_DAYS = int(os.environ.get('RESERVATION_RETENTION_DAYS') or 180)
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE') or 1000)
+    
+    # Background scheduler (scheduler.py) running the housekeeping jobs (housekeeping.py)
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() in ['true', 'on', '1']
+    SCHEDULER_TICK_SECONDS = int(os.environ.get('SCHEDULER_TICK_SECONDS') or 15)
+    SCHEDULER_LEASE_SECONDS = int(os.environ.get('SCHEDULER_LEASE_SECONDS') or 60)
+    HOUSEKEEPING_INTERVAL_SECONDS = int(os.environ.get('HOUSEKEEPING_INTERVAL_SECONDS') or 300)
+    HOUSEKEEPING_BATCH_SIZE = int(os.environ.get('HOUSEKEEPING_BATCH_SIZE') or 500)
+    COMPLETE_AFTER_MINUTES = int(os.environ.get('COMPLETE_AFTER_MINUTES') or 120)  # length of a sitting
+    # Pending bookings expire once their slot passes; set minutes to also expire
+    # ones left unconfirmed that long after booking, however far off the slot is
+    PENDING_EXPIRY_MINUTES = int(os.environ.get('PENDING_EXPIRY_MINUTES') or 0)
+    OPTIMIZE_AHEAD_DAYS = int(os.environ.get('OPTIMIZE_AHEAD_DAYS') or 1)  # table re-assignment: today + N days
+    
+    # Monitoring - per-endpoint latency and SQL metrics at /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    
+    # Slot holds (holds.py) - how long a table stays held during checkout, and
+    # the Redis server shared by all workers (in-process store when unset)
+    HOLD_TTL_SECONDS = int(os.environ.get('HOLD_TTL_SECONDS') or 300)
+    REDIS_URL = os.environ.get('REDIS_URL')
+    
+    # Template caching (page_cache.py) - fragment cache and pages pre-rendered at boot,
+    # plus compiled templates on disk shared by every worker ('' turns that off)
+    TEMPLATE_CACHE_ENABLED = os.environ.get('TEMPLATE_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    TEMPLATE_FRAGMENT_CACHE_SIZE = int(os.environ.get('TEMPLATE_FRAGMENT_CACHE_SIZE') or 256)
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR',
+                                              os.path.join(tempfile.gettempdir(), 'restaurant-jinja-cache'))
+    
+    # Response compression (compression.py) - gzip/brotli for dynamic responses above a minimum size
+    RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', 'true').lower() in ['true', 'on', '1']
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE') or 500)  # bytes
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL') or 6)
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY') or 4)
+    
+    # Multi-restaurant tenancy (tenancy.py) - 'id=value' pairs separated by ';'. Each tenant
+    # has its own database, chosen per request by host name or a /t/<id>/ path prefix
+    TENANT_DATABASES = os.environ.get('TENANT_DATABASES', '')   # e.g. harbour=mysql+pymysql://.../harbour
+    TENANT_NAMES = os.environ.get('TENANT_NAMES', '')           # e.g. harbour=Bella Vista Harbour
+    TENANT_HOSTS = os.environ.get('TENANT_HOSTS', '')           # e.g. book.harbour.example=harbour
+    TENANT_POOL_SIZE = int(os.environ.get('TENANT_POOL_SIZE') or 5)
+    TENANT_MAX_OVERFLOW = int(os.environ.get('TENANT_MAX_OVERFLOW') or 5)
+    TENANT_POOL_TIMEOUT = int(os.environ.get('TENANT_POOL_TIMEOUT') or 10)  # seconds
+    TENANT_REPORT_TIMEOUT = int(os.environ.get('TENANT_REPORT_TIMEOUT') or 10)  # seconds per cross-tenant report
+    TENANT_REPORT_WORKERS = int(os.environ.get('TENANT_REPORT_WORKERS') or 8)
+    
+    # Transactional outbox (outbox.py) - reservation/table change events for subscribers
+    OUTBOX_DISPATCH_SECONDS = int(os.environ.get('OUTBOX_DISPATCH_SECONDS') or 15)  # at most one scheduler tick apart
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE') or 200)
+    OUTBOX_SETTLE_SECONDS = int(os.environ.get('OUTBOX_SETTLE_SECONDS') or 2)  # longer than any write transaction
+    OUTBOX_RETENTION_HOURS = int(os.environ.get('OUTBOX_RETENTION_HOURS') or 72)
+    
+    # Idempotency-Key replays for POST /api/reservations (idempotency.py)
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS') or 24 * 3600)
+    IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get('IDEMPOTENCY_LOCK_SECONDS') or 30)  # claim of a request in flight
+    IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS') or 10)  # retries wait this long for it
+    
+    # System status (status.py) - cached database probe behind GET /api/status
+    STATUS_PROBE_INTERVAL_SECONDS = int(os.environ.get('STATUS_PROBE_INTERVAL_SECONDS') or 15)
+    STATUS_POLL_SECONDS = int(os.environ.get('STATUS_POLL_SECONDS') or 30)  # before client jitter
+    
+    # Share one database lookup between concurrent identical availability requests
+    AVAILABILITY_COALESCING = os.environ.get('AVAILABILITY_COALESCING', 'true').lower() in ['true', 'on', '1']
+    
+    # Most (date, time, party_size) queries one POST /api/tables/available/batch may ask
+    AVAILABILITY_BATCH_LIMIT = int(os.environ.get('AVAILABILITY_BATCH_LIMIT') or 500)
+    
+    # Free slots suggested by GET /api/availability/next and with a full-slot 409 (booking.suggest_slots)
+    AVAILABILITY_SUGGESTIONS = int(os.environ.get('AVAILABILITY_SUGGESTIONS') or 5)
+    
     # Email Configuration (for future implementation)
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
@@ -77,12 +150,30 @@ class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
     SQLALCHEMY_ECHO = False
+    
+    # Long-lived gunicorn workers keep pooled connections across requests;
+    # check them before use and recycle before MySQL's idle timeout
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 280))
+    }
 
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    
+    # Query budgets (query_budget.py) - every request in the test suite
+    # fails if it runs more statements than this, or repeats one in a loop
+    QUERY_BUDGET = 20
+    QUERY_REPEAT_LIMIT = 3
+    
+    # Tests run scheduled jobs directly
+    SCHEDULER_ENABLED = False
+    
+    # Tests read outbox events as soon as they commit
+    OUTBOX_SETTLE_SECONDS = 0
 
 # Configuration dictionary
 config = {
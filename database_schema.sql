@@ -79,16 +79,107 @@ CREATE TABLE reservations (
         FOREIGN KEY (table_id) REFERENCES tables(table_id) 
         ON DELETE CASCADE ON UPDATE CASCADE,
     
-    -- Unique constraint to prevent double booking
-    CONSTRAINT unique_table_datetime 
-        UNIQUE (table_id, reservation_date, reservation_time),
+    -- Prevent double booking: one active (pending/confirmed) reservation per
+    -- table and slot. The functional key part is NULL for cancelled and
+    -- completed rows, so they never block the slot (MySQL 8.0.13+)
+    UNIQUE INDEX uq_reservations_active_slot (
+        (CASE WHEN status IN ('pending', 'confirmed') THEN table_id END),
+        reservation_date, reservation_time),
     
-    -- Indexes for better performance
-    INDEX idx_customer_id (customer_id),
-    INDEX idx_table_id (table_id),
-    INDEX idx_reservation_date (reservation_date),
-    INDEX idx_status (status),
-    INDEX idx_datetime (reservation_date, reservation_time)
+    -- Composite indexes for the reservation queries (see migrate_indexes.py)
+    INDEX ix_reservations_customer_id (customer_id),
+    INDEX ix_reservations_table_slot (table_id, reservation_date, reservation_time, status),
+    INDEX ix_reservations_slot (reservation_date, reservation_time, status, table_id),
+    INDEX ix_reservations_date_status (reservation_date, status)
+);
+
+-- Table: RESERVATIONS_ARCHIVE
+-- Finished reservations moved out of RESERVATIONS by archive.py once they
+-- are older than the retention window; keeps the original reservation_id
+CREATE TABLE reservations_archive (
+    reservation_id INT PRIMARY KEY,
+    customer_id INT NOT NULL,
+    table_id INT NOT NULL,
+    reservation_date DATE NOT NULL,
+    reservation_time TIME NOT NULL,
+    party_size INT NOT NULL,
+    status ENUM('pending', 'confirmed', 'cancelled', 'completed') DEFAULT 'pending',
+    special_requests TEXT,
+    created_at TIMESTAMP NULL,
+    updated_at TIMESTAMP NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    INDEX ix_reservations_archive_customer_id (customer_id),
+    INDEX ix_reservations_archive_date (reservation_date, reservation_time)
+);
+
+-- Table: WAITLIST_ENTRIES
+-- Customers waiting for a table in a time window; waitlist.py books the
+-- best-fitting entry whenever a table frees up
+CREATE TABLE waitlist_entries (
+    entry_id INT AUTO_INCREMENT PRIMARY KEY,
+    customer_id INT NOT NULL,
+    reservation_date DATE NOT NULL,
+    earliest_time TIME NOT NULL,
+    latest_time TIME NOT NULL,
+    party_size INT NOT NULL,
+    priority INT NOT NULL DEFAULT 0,
+    status ENUM('waiting', 'promoted', 'removed', 'expired') NOT NULL DEFAULT 'waiting',
+    special_requests TEXT,
+    reservation_id INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    promoted_at TIMESTAMP NULL,
+    
+    FOREIGN KEY (customer_id) REFERENCES customers(customer_id) ON DELETE CASCADE,
+    CONSTRAINT check_waitlist_party_size_positive CHECK (party_size > 0),
+    INDEX ix_waitlist_entries_customer_id (customer_id),
+    INDEX ix_waitlist_match (reservation_date, status, earliest_time, latest_time)
+);
+
+-- Outbox: one event per reservation/table change, written in the same transaction (outbox.py)
+CREATE TABLE outbox_events (
+    event_id INT AUTO_INCREMENT PRIMARY KEY,
+    event_type VARCHAR(50) NOT NULL,
+    aggregate_type VARCHAR(30) NOT NULL,
+    aggregate_id INT NULL,
+    payload TEXT NOT NULL,
+    created_at DATETIME NOT NULL,
+    
+    INDEX ix_outbox_events_created_at (created_at)
+);
+
+-- Idempotency-Key of each booking POST and its stored response (idempotency.py)
+CREATE TABLE idempotency_keys (
+    `key` VARCHAR(255) PRIMARY KEY,
+    request_hash CHAR(64) NOT NULL,
+    state ENUM('in_flight', 'done') NOT NULL DEFAULT 'in_flight',
+    status_code INT NULL,
+    response_body TEXT NULL,
+    content_type VARCHAR(100) NULL,
+    created_at DATETIME NOT NULL,
+    expires_at DATETIME NOT NULL,
+    
+    INDEX ix_idempotency_keys_expires_at (expires_at)
+);
+
+-- Position of each outbox consumer
+CREATE TABLE outbox_cursors (
+    name VARCHAR(50) PRIMARY KEY,
+    last_event_id INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Lease electing the one process that runs leader-only scheduled jobs (scheduler.py)
+CREATE TABLE scheduler_leases (
+    name VARCHAR(50) PRIMARY KEY,
+    holder VARCHAR(100) NOT NULL,
+    expires_at DATETIME NOT NULL
+);
+
+-- Last start of each leader-only scheduled job, keyed '<lease name>:<job name>'
+CREATE TABLE scheduler_job_runs (
+    name VARCHAR(100) PRIMARY KEY,
+    last_run_at DATETIME NOT NULL
 );
 
 -- Insert sample data
@@ -167,6 +258,16 @@ SELECT
 FROM reservations
 WHERE reservation_date = CURDATE();
 
+-- View: Every reservation, live or archived (admin search and exports)
+CREATE VIEW reservation_history AS
+SELECT reservation_id, customer_id, table_id, reservation_date, reservation_time,
+       party_size, status, special_requests, created_at, updated_at, FALSE AS archived
+FROM reservations
+UNION ALL
+SELECT reservation_id, customer_id, table_id, reservation_date, reservation_time,
+       party_size, status, special_requests, created_at, updated_at, TRUE AS archived
+FROM reservations_archive;
+
 -- Note: Stored procedures and triggers removed for compatibility
 -- These can be implemented in Python application logic
 
@@ -175,10 +276,12 @@ ALTER TABLE customers COMMENT = 'Stores customer information for the restaurant
 ALTER TABLE tables COMMENT = 'Stores restaurant table information including capacity and status';
 ALTER TABLE reservations COMMENT = 'Stores all reservation data with foreign key relationships to customers and tables';
 ALTER TABLE users COMMENT = 'Stores system users for authentication and role-based access';
+ALTER TABLE reservations_archive COMMENT = 'Finished reservations older than the retention window';
 
 -- Show database structure
 SHOW TABLES;
 DESCRIBE customers;
 DESCRIBE tables;
 DESCRIBE reservations;
+DESCRIBE reservations_archive;
 DESCRIBE users;
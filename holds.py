@@ -0,0 +1,217 @@
+"""
+Slot Holds for Restaurant Reservation System
+MIT400 Assessment 2
+
+A hold reserves one table at a date and time for HOLD_TTL_SECONDS while
+a customer fills in the booking form. Held tables count as occupied in
+availability checks, and POST /api/reservations with the hold token
+books the held table directly instead of searching again.
+
+Holds are short-lived and never need to survive a restart, so they live
+in a TTL store rather than the database:
+
+    RedisHoldStore  used when REDIS_URL is set; shared by every worker
+                    and host, expiry handled by Redis
+    LocalHoldStore  in-process stand-in for development, tests and
+                    single-process deployments; holds are only visible
+                    to the worker that created them
+
+Both stores create a hold atomically: two customers can never hold the
+same table for the same slot.
+"""
+
+import json
+import secrets
+import threading
+import time as time_module
+from datetime import datetime, timedelta
+from tenancy import DEFAULT_TENANT
+
+def new_hold(table, reservation_date, reservation_time, party_size, ttl):
+    """
+    Build a hold record for a table
+
+    Args:
+        table (Table): Table to hold
+        reservation_date (date): Date of the slot
+        reservation_time (time): Time of the slot
+        party_size (int): Party the table is held for
+        ttl (int): Seconds until the hold expires
+
+    Returns:
+        dict: JSON-serialisable hold, including its token
+    """
+    return {
+        'hold_token': secrets.token_urlsafe(16),
+        'table_id': table.table_id,
+        'capacity': table.capacity,
+        'date': reservation_date.isoformat(),
+        'time': reservation_time.strftime('%H:%M'),
+        'party_size': party_size,
+        'expires_at': (datetime.utcnow() + timedelta(seconds=ttl)).isoformat() + 'Z',
+        'expires_in': ttl
+    }
+
+class LocalHoldStore:
+    """In-process hold store with lazy expiry"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slots = {}   # (date, time, table_id) -> (token, expires)
+        self.holds = {}   # token -> (hold, expires)
+
+    def _purge(self, now):
+        """Drop expired holds (caller holds the lock)"""
+        for token in [token for token, (_, expires) in self.holds.items() if expires <= now]:
+            hold, _ = self.holds.pop(token)
+            self.slots.pop((hold['date'], hold['time'], hold['table_id']), None)
+
+    def create(self, hold, ttl):
+        """
+        Store a hold unless the table is already held for the slot
+
+        Returns:
+            bool: True if the hold was stored
+        """
+        key = (hold['date'], hold['time'], hold['table_id'])
+        now = time_module.monotonic()
+        with self.lock:
+            self._purge(now)
+            if key in self.slots:
+                return False
+            self.slots[key] = (hold['hold_token'], now + ttl)
+            self.holds[hold['hold_token']] = (hold, now + ttl)
+            return True
+
+    def get(self, token):
+        """Return an unexpired hold by token, or None"""
+        with self.lock:
+            self._purge(time_module.monotonic())
+            entry = self.holds.get(token)
+            return entry[0] if entry else None
+
+    def release(self, token):
+        """
+        Delete a hold
+
+        Returns:
+            bool: True if the hold existed
+        """
+        with self.lock:
+            entry = self.holds.pop(token, None)
+            if entry is None:
+                return False
+            hold = entry[0]
+            self.slots.pop((hold['date'], hold['time'], hold['table_id']), None)
+            return True
+
+    def held_tables(self, reservation_date, reservation_time):
+        """Table IDs held for a slot"""
+        slot = (reservation_date.isoformat(), reservation_time.strftime('%H:%M'))
+        with self.lock:
+            self._purge(time_module.monotonic())
+            return {table_id for (date_key, time_key, table_id) in self.slots if (date_key, time_key) == slot}
+
+class RedisHoldStore:
+    """
+    Redis hold store shared by every worker
+
+    Each slot is a sorted set of held table IDs scored by expiry time, and
+    each token maps to its hold with a matching TTL.
+
+    Args:
+        client (redis.Redis): Connected client
+        prefix (str): Key prefix
+    """
+
+    # Drop expired members, then add the table only if nobody holds it
+    CREATE_SCRIPT = """
+        redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[2])
+        if redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+            return 0
+        end
+        redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+        redis.call('PEXPIREAT', KEYS[1], ARGV[3])
+        redis.call('SET', KEYS[2], ARGV[4], 'PX', ARGV[5])
+        return 1
+    """
+
+    def __init__(self, client, prefix='holds'):
+        self.client = client
+        self.prefix = prefix
+        self.create_script = client.register_script(self.CREATE_SCRIPT)
+
+    def _slot_key(self, date_key, time_key):
+        return f'{self.prefix}:slot:{date_key}:{time_key}'
+
+    def _token_key(self, token):
+        return f'{self.prefix}:token:{token}'
+
+    def create(self, hold, ttl):
+        """
+        Store a hold unless the table is already held for the slot
+
+        Returns:
+            bool: True if the hold was stored
+        """
+        now_ms = int(time_module.time() * 1000)
+        return bool(self.create_script(
+            keys=[self._slot_key(hold['date'], hold['time']), self._token_key(hold['hold_token'])],
+            args=[hold['table_id'], now_ms, now_ms + ttl * 1000, json.dumps(hold), ttl * 1000]))
+
+    def get(self, token):
+        """Return an unexpired hold by token, or None"""
+        payload = self.client.get(self._token_key(token))
+        return json.loads(payload) if payload else None
+
+    def release(self, token):
+        """
+        Delete a hold
+
+        Returns:
+            bool: True if the hold existed
+        """
+        hold = self.get(token)
+        if hold is None:
+            return False
+        pipeline = self.client.pipeline()
+        pipeline.zrem(self._slot_key(hold['date'], hold['time']), hold['table_id'])
+        pipeline.delete(self._token_key(token))
+        pipeline.execute()
+        return True
+
+    def held_tables(self, reservation_date, reservation_time):
+        """Table IDs held for a slot"""
+        now_ms = int(time_module.time() * 1000)
+        members = self.client.zrangebyscore(
+            self._slot_key(reservation_date.isoformat(), reservation_time.strftime('%H:%M')), now_ms, '+inf')
+        return {int(member) for member in members}
+
+def init_holds(app):
+    """
+    Create the hold store for an application
+
+    With tenancy (tenancy.py) installed every tenant gets its own store,
+    since table ids are only unique within one tenant database.
+
+    Args:
+        app (Flask): Application, configured with REDIS_URL or not
+
+    Returns:
+        Store stored in app.extensions['holds']
+    """
+    redis_url = app.config.get('REDIS_URL')
+    client = None
+    if redis_url:
+        import redis
+        client = redis.Redis.from_url(redis_url)
+
+    def make_store(tenant=DEFAULT_TENANT):
+        if client is None:
+            return LocalHoldStore()
+        return RedisHoldStore(client, 'holds' if tenant == DEFAULT_TENANT else f'holds:{tenant}')
+
+    tenancy = app.extensions.get('tenancy')
+    store = tenancy.scoped(make_store) if tenancy is not None else make_store()
+    app.extensions['holds'] = store
+    return store
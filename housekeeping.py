@@ -0,0 +1,146 @@
+"""
+Reservation Housekeeping Jobs for Restaurant Reservation System
+MIT400 Assessment 2
+
+Periodic jobs run by the scheduler (scheduler.py) so reservations move
+through their lifecycle without staff clicking through them:
+
+    - complete_past_reservations: confirmed bookings whose sitting is over
+      become 'completed'
+    - expire_pending_reservations: bookings nobody confirmed in time, or
+      whose slot has passed while still pending, become 'cancelled'; the
+      upcoming slots this frees are offered to the waitlist
+    - refresh_statistics: refresh the query planner's table statistics
+
+Status changes go through Reservation.complete() and cancel() in batches
+of HOUSEKEEPING_BATCH_SIZE, committing after each batch so no long
+transaction holds locks while bookings come in. Every job returns the
+number of rows it changed.
+"""
+
+from datetime import datetime, timedelta
+from models import db, Reservation
+from waitlist import promote_waitlist
+
+def slot_before(cutoff):
+    """
+    Condition for reservations whose date and time are before a moment
+
+    Args:
+        cutoff (datetime): Local date and time
+
+    Returns:
+        ColumnElement: Portable condition on reservation_date/reservation_time
+    """
+    return db.or_(
+        Reservation.reservation_date < cutoff.date(),
+        db.and_(Reservation.reservation_date == cutoff.date(),
+                Reservation.reservation_time <= cutoff.time())
+    )
+
+def _update_in_batches(condition, change, batch_size, session=None, on_freed=None):
+    """
+    Apply a model method to every reservation matching a condition
+
+    Args:
+        condition (ColumnElement): Which reservations to change
+        change (callable): Called with each Reservation, e.g. Reservation.complete
+        batch_size (int): Reservations per transaction
+        session (Session, optional): Session to use, defaults to db.session
+        on_freed (callable, optional): Called after each commit with the
+            (table_id, date, time) slots of the batch
+
+    Returns:
+        int: Number of reservations changed
+    """
+    session = session if session is not None else db.session
+    changed = 0
+    while True:
+        batch = session.scalars(
+            db.select(Reservation).where(condition).order_by(Reservation.reservation_id).limit(batch_size)).all()
+        if not batch:
+            return changed
+        for reservation in batch:
+            change(reservation)
+        slots = [(r.table_id, r.reservation_date, r.reservation_time) for r in batch]
+        session.commit()
+        changed += len(batch)
+        if on_freed is not None:
+            on_freed(slots)
+
+def complete_past_reservations(after_minutes, batch_size=500, now=None, session=None):
+    """
+    Mark confirmed reservations as completed once their sitting is over
+
+    Args:
+        after_minutes (int): Minutes after the reservation time a sitting ends
+        batch_size (int): Reservations per transaction
+        now (datetime, optional): Current local time, defaults to datetime.now()
+        session (Session, optional): Session to use, defaults to db.session
+
+    Returns:
+        int: Number of reservations completed
+    """
+    cutoff = (now or datetime.now()) - timedelta(minutes=after_minutes)
+    condition = db.and_(Reservation.status == 'confirmed', slot_before(cutoff))
+    return _update_in_batches(condition, Reservation.complete, batch_size, session)
+
+def expire_pending_reservations(expiry_minutes, batch_size=500, now=None, session=None, holds=None):
+    """
+    Cancel pending reservations nobody confirmed in time
+
+    A pending reservation expires when its slot has already started. With
+    expiry_minutes set (opt-in, PENDING_EXPIRY_MINUTES) it also expires once
+    it was made more than expiry_minutes ago, even for a slot weeks away.
+
+    Args:
+        expiry_minutes (int): Minutes a reservation may stay pending, 0 for
+            no limit before its slot
+        batch_size (int): Reservations per transaction
+        now (datetime, optional): Current local time, defaults to datetime.now()
+        session (Session, optional): Session to use, defaults to db.session
+        holds (optional): Hold store from holds.py; freed tables a customer
+            holds are not offered to the waitlist
+
+    Returns:
+        int: Number of reservations cancelled
+    """
+    now = now or datetime.now()
+    expired = slot_before(now)
+    if expiry_minutes:
+        # created_at is stored in UTC
+        created_before = datetime.utcnow() - timedelta(minutes=expiry_minutes)
+        expired = db.or_(expired, Reservation.created_at < created_before)
+    condition = db.and_(Reservation.status == 'pending', expired)
+
+    def offer_to_waitlist(slots):
+        for table_id, reservation_date, reservation_time in slots:
+            promote_waitlist(table_id, reservation_date, reservation_time, session=session, holds=holds)
+
+    return _update_in_batches(condition, Reservation.cancel, batch_size, session, on_freed=offer_to_waitlist)
+
+def refresh_statistics(engine):
+    """
+    Refresh the table statistics the query planner chooses indexes from
+
+    Housekeeping and archival move many rows between statuses and tables,
+    which leaves the planner's row estimates stale.
+
+    Args:
+        engine (Engine): Database to analyze
+
+    Returns:
+        int: Number of tables analyzed
+    """
+    tables = ['reservations', 'reservations_archive', 'tables', 'customers']
+    backend = engine.dialect.name
+    with engine.connect() as connection:
+        if backend == 'sqlite':
+            connection.exec_driver_sql('PRAGMA optimize')
+        elif backend == 'mysql':
+            connection.exec_driver_sql(f"ANALYZE TABLE {', '.join(tables)}").all()
+        else:
+            for table in tables:
+                connection.exec_driver_sql(f'ANALYZE {table}')
+        connection.commit()
+    return len(tables)
@@ -0,0 +1,163 @@
+"""
+Idempotent Requests for Restaurant Reservation System
+MIT400 Assessment 2
+
+Clients that retry a POST after a timeout send the same Idempotency-Key
+header with every attempt. The first attempt to claim a key runs the
+view; its response is stored in idempotency_keys for
+IDEMPOTENCY_TTL_SECONDS and every later attempt with that key gets the
+stored response back (marked Idempotent-Replayed: true) without the view
+running again.
+
+    - claiming is an INSERT on the key's primary key, so of several
+      concurrent attempts - in any worker or on any host - exactly one
+      runs the view; the others poll the row until the response is stored
+      (IDEMPOTENCY_WAIT_SECONDS at most, then 409)
+    - a key reused with a different request body is rejected with 422
+    - 5xx responses are not stored: the key is released so the retry runs
+      the view again
+    - a claim whose request died without storing a response lapses after
+      IDEMPOTENCY_LOCK_SECONDS and can be claimed again
+"""
+
+import hashlib
+import time as time_module
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+from sqlalchemy.exc import IntegrityError
+from models import db, IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# Seconds between checks on an attempt in flight
+POLL_SECONDS = 0.05
+
+def request_fingerprint(method, path, body):
+    """Hash identifying the request a key was first used for"""
+    return hashlib.sha256(b'\n'.join([method.encode(), path.encode(), body])).hexdigest()
+
+def claim_key(key, fingerprint, lock_seconds, wait_seconds, session=None):
+    """
+    Claim a key for this request, or find the response stored for it
+
+    Args:
+        key (str): Idempotency key from the client
+        fingerprint (str): request_fingerprint of this request
+        lock_seconds (int): How long a claim lasts without a stored response
+        wait_seconds (float): How long to wait for an attempt in flight
+        session (Session, optional): Session to use, defaults to db.session
+
+    Returns:
+        tuple: (outcome, row) where outcome is 'claimed', 'replay' (row holds
+            the stored response), 'mismatch' or 'in_flight'
+    """
+    session = session if session is not None else db.session
+    keys = IdempotencyKey.__table__
+    deadline = time_module.monotonic() + wait_seconds
+    while True:
+        now = datetime.utcnow()
+        try:
+            session.execute(keys.insert().values(
+                key=key, request_hash=fingerprint, state='in_flight',
+                created_at=now, expires_at=now + timedelta(seconds=lock_seconds)))
+            session.commit()
+            return 'claimed', None
+        except IntegrityError:
+            session.rollback()
+
+        row = session.execute(db.select(keys).where(keys.c.key == key)).first()
+        # End the read so the next poll sees newly committed responses
+        session.rollback()
+        if row is None:
+            continue
+        if row.expires_at <= now:
+            # Stored response past its TTL, or a claim whose request died:
+            # take the key over unless another attempt just did
+            taken = session.execute(keys.update().where(
+                keys.c.key == key, keys.c.expires_at == row.expires_at
+            ).values(request_hash=fingerprint, state='in_flight', status_code=None, response_body=None,
+                     content_type=None, created_at=now, expires_at=now + timedelta(seconds=lock_seconds))).rowcount
+            session.commit()
+            if taken:
+                return 'claimed', None
+            continue
+        if row.request_hash != fingerprint:
+            return 'mismatch', row
+        if row.state == 'done':
+            return 'replay', row
+        if time_module.monotonic() >= deadline:
+            return 'in_flight', row
+        time_module.sleep(POLL_SECONDS)
+
+def store_response(key, response, ttl_seconds, session=None):
+    """Keep the response of a claimed key for replays"""
+    session = session if session is not None else db.session
+    keys = IdempotencyKey.__table__
+    session.execute(keys.update().where(keys.c.key == key).values(
+        state='done', status_code=response.status_code, response_body=response.get_data(as_text=True),
+        content_type=response.content_type, expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds)))
+    session.commit()
+
+def release_key(key, session=None):
+    """Forget a claimed key so the next attempt runs the request again"""
+    session = session if session is not None else db.session
+    session.rollback()
+    keys = IdempotencyKey.__table__
+    session.execute(keys.delete().where(keys.c.key == key, keys.c.state == 'in_flight'))
+    session.commit()
+
+def prune_idempotency_keys(session=None):
+    """
+    Delete keys whose stored response has expired
+
+    Returns:
+        int: Number of keys deleted
+    """
+    session = session if session is not None else db.session
+    keys = IdempotencyKey.__table__
+    deleted = session.execute(keys.delete().where(keys.c.expires_at < datetime.utcnow())).rowcount
+    session.commit()
+    return deleted
+
+def idempotent(view):
+    """
+    Make a view replay its first response for a repeated Idempotency-Key
+
+    Requests without the header run the view as usual.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters'}), 400
+
+        config = current_app.config
+        fingerprint = request_fingerprint(request.method, request.path, request.get_data())
+        outcome, row = claim_key(key, fingerprint, config['IDEMPOTENCY_LOCK_SECONDS'],
+                                 config['IDEMPOTENCY_WAIT_SECONDS'])
+        if outcome == 'replay':
+            response = current_app.response_class(row.response_body, status=row.status_code,
+                                                  content_type=row.content_type)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        if outcome == 'mismatch':
+            return jsonify({'error': f'{HEADER} was already used for a different request'}), 422
+        if outcome == 'in_flight':
+            return jsonify({'error': f'A request with this {HEADER} is still being processed, retry shortly'}), 409
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            release_key(key)
+            raise
+        if response.status_code >= 500:
+            release_key(key)
+        else:
+            store_response(key, response, config['IDEMPOTENCY_TTL_SECONDS'])
+        return response
+
+    return wrapper
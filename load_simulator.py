@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Concurrent Booking Load Simulator
+MIT400 Assessment 2
+
+This script simulates a Saturday evening rush: many clients check table
+availability and post bookings at the same time, with party sizes and
+times drawn from realistic distributions (most parties of two, most
+bookings close to 7pm).
+
+It reports throughput, p50/p95/p99 latency, the conflict rate (409 - no
+table left) and the error rate, and then audits the database for tables
+booked twice for the same slot or parties seated at too small a table.
+
+Load can be sent to a running server (gunicorn wsgi:app, uvicorn asgi:app)
+or, without --url, to the Flask test client in this process using a fresh
+SQLite database.
+
+Usage:
+    python load_simulator.py
+    python load_simulator.py --clients 32 --requests 2000
+    python load_simulator.py --url http://127.0.0.1:5000 --database-url sqlite:////path/to/restaurant.db --processes 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time as time_module
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+# Booking times and how popular they are on a Saturday night
+TIME_WEIGHTS = {
+    '17:00': 2, '17:30': 3, '18:00': 6, '18:30': 9, '19:00': 14,
+    '19:30': 12, '20:00': 9, '20:30': 5, '21:00': 3, '21:30': 1
+}
+# Party sizes and how often they occur
+PARTY_WEIGHTS = {1: 3, 2: 45, 3: 10, 4: 25, 5: 5, 6: 7, 7: 2, 8: 3}
+
+def next_saturday():
+    """Date of the coming Saturday (never today)"""
+    days_ahead = (5 - date.today().weekday()) % 7 or 7
+    return date.today() + timedelta(days=days_ahead)
+
+def build_plan(total_requests, booking_share, target_date, seed):
+    """
+    Draw the sequence of requests to send
+
+    Returns:
+        list: (kind, payload) tuples, kind is 'availability' or 'booking'
+    """
+    rng = random.Random(seed)
+    times = list(TIME_WEIGHTS)
+    sizes = list(PARTY_WEIGHTS)
+
+    plan = []
+    for number in range(total_requests):
+        slot = rng.choices(times, list(TIME_WEIGHTS.values()))[0]
+        party_size = rng.choices(sizes, list(PARTY_WEIGHTS.values()))[0]
+        if rng.random() < booking_share:
+            plan.append(('booking', {
+                'first_name': 'Load', 'last_name': f'Guest{number}', 'phone': f'+1 777 {seed % 1000:03d}{number:07d}',
+                'date': target_date.isoformat(), 'time': slot, 'party_size': party_size
+            }))
+        else:
+            plan.append(('availability', {'date': target_date.isoformat(), 'time': slot, 'party_size': party_size}))
+    return plan
+
+def http_sender(base_url):
+    """Return a function sending one planned request over HTTP"""
+    def send(kind, payload):
+        if kind == 'booking':
+            request = urllib.request.Request(f'{base_url}/api/reservations', data=json.dumps(payload).encode(),
+                                             headers={'Content-Type': 'application/json'}, method='POST')
+        else:
+            query = '&'.join(f'{key}={value}' for key, value in payload.items())
+            request = urllib.request.Request(f'{base_url}/api/tables/available?{query}')
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except (urllib.error.URLError, OSError):
+            return 0
+    return send
+
+def test_client_sender(app):
+    """Return a function sending one planned request through the Flask test client"""
+    def send(kind, payload):
+        client = app.test_client()
+        if kind == 'booking':
+            return client.post('/api/reservations', json=payload).status_code
+        return client.get('/api/tables/available', query_string=payload).status_code
+    return send
+
+def run_plan(send, plan, clients):
+    """
+    Send every planned request from a pool of client threads
+
+    Returns:
+        list: (kind, status code, latency in seconds) per request
+    """
+    def timed(item):
+        kind, payload = item
+        started = time_module.perf_counter()
+        status = send(kind, payload)
+        return kind, status, time_module.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        return list(pool.map(timed, plan))
+
+def run_process(args):
+    """Worker process entry point for HTTP load (--processes)"""
+    base_url, plan, clients = args
+    return run_plan(http_sender(base_url), plan, clients)
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))]
+
+def summarise(results, elapsed):
+    """Turn raw results into the load report"""
+    latencies = sorted(latency for _, _, latency in results)
+    bookings = [status for kind, status, _ in results if kind == 'booking']
+    statuses = Counter(status for _, status, _ in results)
+
+    return {
+        'requests': len(results),
+        'elapsed_s': round(elapsed, 2),
+        'throughput_rps': round(len(results) / elapsed, 1) if elapsed else 0,
+        'bookings_attempted': len(bookings),
+        'bookings_created': sum(1 for status in bookings if status == 201),
+        'bookings_per_second': round(sum(1 for status in bookings if status == 201) / elapsed, 1) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'conflict_rate': round(sum(1 for status in bookings if status == 409) / len(bookings), 4) if bookings else 0,
+        'error_rate': round(sum(count for status, count in statuses.items()
+                                if status == 0 or status >= 500) / len(results), 4) if results else 0,
+        'status_codes': {str(status): count for status, count in sorted(statuses.items())}
+    }
+
+def audit_bookings(app, target_date):
+    """
+    Look for double-booked tables and undersized tables on a date
+
+    Returns:
+        dict: Lists of offending slots/reservations, empty when consistent
+    """
+    from models import db, Reservation, Table, ACTIVE_RESERVATION_STATUSES
+
+    with app.app_context():
+        double_booked = db.session.execute(
+            db.select(Reservation.table_id, Reservation.reservation_time, db.func.count())
+            .where(Reservation.reservation_date == target_date,
+                   Reservation.status.in_(ACTIVE_RESERVATION_STATUSES))
+            .group_by(Reservation.table_id, Reservation.reservation_time)
+            .having(db.func.count() > 1)
+        ).all()
+
+        undersized = db.session.execute(
+            db.select(Reservation.reservation_id, Reservation.party_size, Table.capacity)
+            .join(Table, Table.table_id == Reservation.table_id)
+            .where(Reservation.reservation_date == target_date,
+                   Reservation.status.in_(ACTIVE_RESERVATION_STATUSES),
+                   Reservation.party_size > Table.capacity)
+        ).all()
+
+    return {
+        'double_booked': [{'table_id': table_id, 'time': slot.strftime('%H:%M'), 'bookings': count}
+                          for table_id, slot, count in double_booked],
+        'undersized': [{'reservation_id': reservation_id, 'party_size': party_size, 'capacity': capacity}
+                       for reservation_id, party_size, capacity in undersized]
+    }
+
+def main():
+    """Main load test function"""
+    parser = argparse.ArgumentParser(description='Simulate a booking rush and audit for double bookings')
+    parser.add_argument('--url', help='base URL of a running server (default: in-process test client)')
+    parser.add_argument('--database-url', help='database the server uses, for the audit (default: DATABASE_URL)')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent client threads (per process)')
+    parser.add_argument('--processes', type=int, default=1, help='client processes (HTTP mode only)')
+    parser.add_argument('--requests', type=int, default=1000, help='total requests to send')
+    parser.add_argument('--booking-share', type=float, default=0.3, help='fraction of requests that are bookings')
+    parser.add_argument('--date', help='date to book (YYYY-MM-DD, default: next Saturday)')
+    parser.add_argument('--tables', type=int, default=20, help='tables to seed in test client mode')
+    parser.add_argument('--seed', type=int, default=7, help='random seed')
+    parser.add_argument('--output', help='write the report as JSON to this file')
+    args = parser.parse_args()
+
+    target_date = date.fromisoformat(args.date) if args.date else next_saturday()
+    temp_dir = tempfile.TemporaryDirectory()
+
+    if args.url:
+        database_url = args.database_url or os.environ.get('DATABASE_URL')
+    else:
+        database_url = f"sqlite:///{os.path.join(temp_dir.name, 'load.db')}"
+    if database_url:
+        os.environ['DATABASE_URL'] = database_url
+
+    from app import create_app
+    app = create_app('production')
+
+    if not args.url:
+        from benchmark_system import seed_benchmark_data
+        seed_benchmark_data(app, tables=args.tables, customers=0, per_day=0, months=0)
+
+    print("🔥 Restaurant Reservation System - Booking load test")
+    print(f"Target: {args.url or 'in-process test client'} | Date: {target_date} | "
+          f"Clients: {args.clients} x {args.processes} process(es)")
+
+    plan = build_plan(args.requests, args.booking_share, target_date, args.seed)
+    started = time_module.perf_counter()
+    if args.url and args.processes > 1:
+        chunks = [(args.url.rstrip('/'), plan[index::args.processes], args.clients) for index in range(args.processes)]
+        with multiprocessing.Pool(args.processes) as pool:
+            results = [result for chunk in pool.map(run_process, chunks) for result in chunk]
+    else:
+        send = http_sender(args.url.rstrip('/')) if args.url else test_client_sender(app)
+        results = run_plan(send, plan, args.clients)
+    report = summarise(results, time_module.perf_counter() - started)
+
+    print(f"\n  Requests: {report['requests']} in {report['elapsed_s']}s ({report['throughput_rps']} req/s)")
+    print(f"  Bookings: {report['bookings_created']}/{report['bookings_attempted']} created "
+          f"({report['bookings_per_second']} bookings/s)")
+    print(f"  Latency:  p50 {report['p50_ms']} ms | p95 {report['p95_ms']} ms | p99 {report['p99_ms']} ms")
+    print(f"  Conflict rate: {report['conflict_rate']:.1%} | Error rate: {report['error_rate']:.1%}")
+    print(f"  Status codes: {report['status_codes']}")
+
+    if database_url:
+        report['audit'] = audit_bookings(app, target_date)
+        problems = report['audit']['double_booked'] + report['audit']['undersized']
+        if problems:
+            print(f"\n❌ Audit found {len(report['audit']['double_booked'])} double-booked slot(s) and "
+                  f"{len(report['audit']['undersized'])} undersized table(s)")
+        else:
+            print("\n✅ Audit: no double bookings and no undersized tables")
+    else:
+        problems = []
+        print("\n⚠️  No database URL given, skipping the double-booking audit")
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"📄 Report written to {args.output}")
+
+    temp_dir.cleanup()
+    if problems:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Request Metrics for Restaurant Reservation System
+MIT400 Assessment 2
+
+This module records per-endpoint request latency, response status codes,
+the number of SQL statements each request runs and the time spent in
+SQL, and renders them in the Prometheus text format for /metrics.
+
+SQL statements are counted with SQLAlchemy cursor-execute events, so
+every query is seen no matter which model or helper issued it. The
+async handlers in asgi.py are wrapped with RequestMetrics.instrument and
+report under the same endpoint names as their Flask views.
+
+Recording a request costs a few dictionary updates under a lock, which
+is cheap enough to leave enabled in production (METRICS_ENABLED).
+Metrics are kept per process: with several gunicorn workers each worker
+reports its own counts, labelled with its pid.
+"""
+
+import bisect
+import contextvars
+import os
+import threading
+import time
+from flask import request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+STATEMENT_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100, 250]
+
+# SQL totals [statements, seconds] and start time of the request being
+# handled: per thread under Flask, per task under asgi.py
+_request_sql = contextvars.ContextVar('request_sql', default=None)
+_request_started = contextvars.ContextVar('request_started', default=None)
+
+class Counter:
+    """Prometheus counter keyed by label values"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values = {}
+
+    def inc(self, labels, amount=1):
+        """Add amount to the counter for these label values"""
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self, extra_labels):
+        """Render the counter as Prometheus text lines"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self.values.items()):
+            lines.append(f'{self.name}{format_labels(self.label_names, labels, extra_labels)} {value}')
+        return lines
+
+class Histogram:
+    """Prometheus histogram keyed by label values"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.values = {}
+
+    def observe(self, labels, value):
+        """Record one observation for these label values"""
+        series = self.values.get(labels)
+        if series is None:
+            # One count per bucket plus +Inf, then sum and count
+            series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self, extra_labels):
+        """Render the histogram as Prometheus text lines"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, (bucket_counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ['+Inf'], bucket_counts):
+                cumulative += bucket_count
+                bucket_labels = format_labels(self.label_names + ('le',), labels + (str(bound),), extra_labels)
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            series_labels = format_labels(self.label_names, labels, extra_labels)
+            lines.append(f'{self.name}_sum{series_labels} {total}')
+            lines.append(f'{self.name}_count{series_labels} {count}')
+        return lines
+
+def format_labels(label_names, label_values, extra_labels=()):
+    """Format label names and values as a Prometheus label set"""
+    pairs = list(extra_labels) + list(zip(label_names, label_values))
+    escaped = [(name, str(value).replace('\\', '\\\\').replace('"', '\\"')) for name, value in pairs]
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+class RequestMetrics:
+    """Collects request and SQL metrics for one application"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter(
+            'http_requests_total', 'Requests handled, by endpoint, method and status code',
+            ('endpoint', 'method', 'status'))
+        self.latency = Histogram(
+            'http_request_duration_seconds', 'Request latency in seconds',
+            ('endpoint',), LATENCY_BUCKETS)
+        self.sql_statements = Histogram(
+            'http_request_sql_statements', 'SQL statements executed per request',
+            ('endpoint',), STATEMENT_BUCKETS)
+        self.sql_duration = Histogram(
+            'http_request_sql_duration_seconds', 'Time spent executing SQL per request in seconds',
+            ('endpoint',), LATENCY_BUCKETS)
+        self.collectors = []
+
+    def add_collector(self, render):
+        """
+        Include another component's metrics in /metrics
+
+        Args:
+            render (callable): Takes the extra labels, returns Prometheus text lines
+        """
+        self.collectors.append(render)
+
+    def record(self, endpoint, method, status, duration, statements, sql_duration):
+        """Record one finished request"""
+        with self.lock:
+            self.requests.inc((endpoint, method, str(status)))
+            self.latency.observe((endpoint,), duration)
+            self.sql_statements.observe((endpoint,), statements)
+            self.sql_duration.observe((endpoint,), sql_duration)
+
+    def instrument(self, endpoint, handler):
+        """
+        Wrap an async request handler so its requests are recorded here
+
+        Args:
+            endpoint (str): Endpoint label, the name of the matching Flask view
+            handler (callable): Async handler taking a request, returning a response
+
+        Returns:
+            callable: Async handler recording latency, status and SQL totals
+        """
+        async def instrumented(request):
+            started = time.perf_counter()
+            totals = [0, 0.0]
+            token = _request_sql.set(totals)
+            try:
+                response = await handler(request)
+            finally:
+                _request_sql.reset(token)
+            self.record(endpoint, request.method, response.status_code,
+                        time.perf_counter() - started, totals[0], totals[1])
+            return response
+        return instrumented
+
+    def render(self):
+        """Render every metric in the Prometheus text format"""
+        extra_labels = [('pid', os.getpid())]
+        lines = []
+        with self.lock:
+            for metric in (self.requests, self.latency, self.sql_statements, self.sql_duration):
+                lines.extend(metric.render(extra_labels))
+        for render in self.collectors:
+            lines.extend(render(extra_labels))
+        return '\n'.join(lines) + '\n'
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Remember when the statement started, by cursor"""
+    conn.info.setdefault('metrics_query_start', {})[id(cursor)] = time.perf_counter()
+
+def _finish_statement(conn, cursor):
+    """Add a finished statement to the current request's SQL totals"""
+    started = conn.info.get('metrics_query_start', {}).pop(id(cursor), None)
+    totals = _request_sql.get()
+    if started is not None and totals is not None:
+        totals[0] += 1
+        totals[1] += time.perf_counter() - started
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Count a statement that succeeded"""
+    _finish_statement(conn, cursor)
+
+def _handle_error(exception_context):
+    """Count a statement that raised, so its start is not left behind on the pooled connection"""
+    # No execution context or cursor when the error came before any statement was sent
+    cursor = getattr(exception_context.execution_context, 'cursor', None)
+    if exception_context.connection is not None and cursor is not None:
+        _finish_statement(exception_context.connection, cursor)
+
+def _listen_for_sql():
+    """Attach the cursor-execute listeners to every engine (once per process)"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+
+def init_metrics(app):
+    """
+    Instrument an application and add the /metrics endpoint
+
+    Args:
+        app (Flask): Application to instrument
+
+    Returns:
+        RequestMetrics: The collector attached to the app
+    """
+    metrics = RequestMetrics()
+    app.extensions['metrics'] = metrics
+    _listen_for_sql()
+
+    @app.before_request
+    def start_request_metrics():
+        _request_sql.set([0, 0.0])
+        _request_started.set(time.perf_counter())
+
+    @app.after_request
+    def record_request_metrics(response):
+        totals = _request_sql.get()
+        if totals is not None:
+            # Unmatched URLs share one label so 404 scans cannot blow up cardinality
+            metrics.record(
+                request.endpoint or '<unmatched>', request.method, response.status_code,
+                time.perf_counter() - _request_started.get(), totals[0], totals[1])
+            _request_sql.set(None)
+        return response
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        """Prometheus scrape endpoint"""
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    return metrics
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Reservation Index Migration for Restaurant Reservation System
+MIT400 Assessment 2
+
+This script brings an existing database up to the reservation indexes
+declared in models.py without holding a long table lock:
+
+    uq_reservations_active_slot   one active booking per table and slot
+                                  (partial on PostgreSQL/SQLite, functional
+                                  on MySQL), replacing unique_table_datetime
+    ix_reservations_table_slot    (table_id, date, time, status)
+    ix_reservations_slot          (date, time, status, table_id)
+    ix_reservations_date_status   (date, status)
+
+The single-column reservation_date, status and table_id indexes are
+dropped, since every query they served now uses one of the composites.
+
+How each backend avoids blocking writes:
+
+    PostgreSQL  CREATE/DROP INDEX CONCURRENTLY outside a transaction;
+                invalid leftovers of an interrupted build are rebuilt
+    MySQL       online DDL (ALGORITHM=INPLACE, LOCK=NONE), which fails
+                immediately rather than falling back to a locking copy
+    SQLite      one short transaction - the old UNIQUE constraint is part
+                of CREATE TABLE, so the reservations table is rebuilt
+
+Short lock timeouts make a statement that cannot get its lock give up
+instead of queueing every other query behind it; just run it again.
+
+The index set was chosen from the plans of the hot queries, which
+--explain prints for the current database (run it before and after).
+
+Usage:
+    python migrate_indexes.py --explain
+    python migrate_indexes.py --dry-run
+    python migrate_indexes.py
+    python migrate_indexes.py --database-url postgresql://...
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, time, timedelta
+
+# Indexes and constraints replaced by the composites in models.py, under
+# the names create_all and database_schema.sql gave them
+LEGACY_INDEXES = [
+    'ix_reservations_table_id', 'ix_reservations_reservation_date', 'ix_reservations_status',
+    'idx_table_id', 'idx_reservation_date', 'idx_status', 'idx_datetime'
+]
+LEGACY_UNIQUE_CONSTRAINT = 'unique_table_datetime'
+
+# Planned instead of SQL when SQLite has to rebuild the reservations table
+SQLITE_REBUILD = '-- rebuild reservations with the model schema (copies every row)'
+
+# Seconds a statement waits for a lock before giving up
+LOCK_TIMEOUT = 5
+
+def hot_queries(reference_date):
+    """
+    The reservation queries the index set was chosen for
+
+    Args:
+        reference_date (date): Day the queries look at
+
+    Returns:
+        list: (label, SELECT statement) pairs, built from the app's own code
+    """
+    from models import db, Reservation, ACTIVE_RESERVATION_STATUSES, available_tables_statement
+
+    return [
+        ('find_available_tables', available_tables_statement(reference_date, time(19, 0), 4)),
+        ('Table.is_available_at', db.select(Reservation.reservation_id).filter_by(
+            table_id=1, reservation_date=reference_date, reservation_time=time(19, 0)
+        ).where(Reservation.status.in_(ACTIVE_RESERVATION_STATUSES)).limit(1)),
+        ('dashboard status counts', db.select(Reservation.status, db.func.count()).where(
+            Reservation.reservation_date == reference_date).group_by(Reservation.status)),
+        ('reservation listing', db.select(Reservation.reservation_id).order_by(
+            Reservation.reservation_date.desc(), Reservation.reservation_time.desc()).limit(10)),
+        ('restaurant_stats', db.select(db.func.count()).select_from(Reservation).where(
+            Reservation.reservation_date == reference_date))
+    ]
+
+def explain(engine, reference_date=None):
+    """
+    Print the query plan of every hot query
+
+    Args:
+        engine (Engine): Database to explain against
+        reference_date (date, optional): Day the queries look at, defaults to tomorrow
+    """
+    prefix = {'sqlite': 'EXPLAIN QUERY PLAN', 'postgresql': 'EXPLAIN'}.get(engine.dialect.name, 'EXPLAIN')
+    with engine.connect() as connection:
+        for label, statement in hot_queries(reference_date or date.today() + timedelta(days=1)):
+            sql = statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True})
+            print(f"\n{label}:")
+            for row in connection.exec_driver_sql(f"{prefix} {sql}"):
+                print('   ', ' | '.join(str(value) for value in row))
+
+def model_index_ddl(dialect):
+    """
+    The CREATE INDEX statements models.py declares for this backend
+
+    Args:
+        dialect (Dialect): Target database dialect
+
+    Returns:
+        dict: Index name to compiled CREATE INDEX statement
+    """
+    from sqlalchemy import create_mock_engine
+    from sqlalchemy.schema import CreateIndex
+    from models import Reservation
+
+    # A mock engine runs create_all's DDL visitor, so per-dialect
+    # conditions on the indexes are applied exactly as create_all would
+    statements = []
+    mock_engine = create_mock_engine(f'{dialect.name}://', lambda ddl, *args, **kwargs: statements.append(ddl))
+    Reservation.__table__.create(mock_engine)
+    return {ddl.element.name: str(ddl.compile(dialect=mock_engine.dialect)).strip()
+            for ddl in statements if isinstance(ddl, CreateIndex)}
+
+def plan_migration(connection):
+    """
+    Work out the statements needed to reach the model's index set
+
+    Args:
+        connection (Connection): Connection to the database to migrate
+
+    Returns:
+        list: SQL statements in the order they must run
+    """
+    from sqlalchemy import inspect
+
+    inspector = inspect(connection)
+    backend = connection.dialect.name
+    if backend == 'mysql':
+        # Reflection skips functional indexes, ask the catalog for every name
+        existing = set(connection.exec_driver_sql(
+            "SELECT DISTINCT index_name FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = 'reservations'").scalars())
+    else:
+        existing = {index['name'] for index in inspector.get_indexes('reservations')}
+    unique_constraints = {constraint['name'] for constraint in inspector.get_unique_constraints('reservations')}
+    wanted = model_index_ddl(connection.dialect)
+
+    if backend == 'sqlite':
+        # The old constraint cannot be dropped in place, rebuild the table instead
+        if LEGACY_UNIQUE_CONSTRAINT in unique_constraints:
+            return [SQLITE_REBUILD]
+        return ([wanted[name] for name in wanted if name not in existing] +
+                [f'DROP INDEX IF EXISTS {name}' for name in LEGACY_INDEXES if name in existing])
+
+    statements = []
+    if backend == 'postgresql':
+        invalid = set(connection.exec_driver_sql(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indrelid = 'reservations'::regclass AND NOT i.indisvalid").scalars())
+        for name, ddl in wanted.items():
+            if name in invalid:
+                statements.append(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+            if name not in existing or name in invalid:
+                statements.append(ddl.replace(' INDEX ', ' INDEX CONCURRENTLY IF NOT EXISTS ', 1))
+        if LEGACY_UNIQUE_CONSTRAINT in unique_constraints:
+            statements.append(f'ALTER TABLE reservations DROP CONSTRAINT IF EXISTS {LEGACY_UNIQUE_CONSTRAINT}')
+        statements.extend(f'DROP INDEX CONCURRENTLY IF EXISTS {name}' for name in LEGACY_INDEXES if name in existing)
+
+    elif backend == 'mysql':
+        online = 'ALGORITHM=INPLACE LOCK=NONE'
+        statements.extend(f'{ddl} {online}' for name, ddl in wanted.items() if name not in existing)
+        # MySQL reports unique constraints as indexes too
+        for name in [LEGACY_UNIQUE_CONSTRAINT] + LEGACY_INDEXES:
+            if name in existing or name in unique_constraints:
+                statements.append(f'DROP INDEX {name} ON reservations {online}')
+
+    else:
+        raise ValueError(f'No online index migration for {backend} databases')
+
+    return statements
+
+def rebuild_sqlite_reservations(connection):
+    """
+    Recreate the SQLite reservations table with the model's constraints
+
+    Args:
+        connection (Connection): Connection to the database, committed by the caller
+    """
+    from sqlalchemy import inspect
+    from models import Reservation
+
+    columns = ', '.join(column['name'] for column in inspect(connection).get_columns('reservations'))
+    # The sqlite3 driver does not open a transaction for DDL by itself, so
+    # begin explicitly to make the rename, copy and drop all-or-nothing
+    connection.exec_driver_sql('BEGIN IMMEDIATE')
+    connection.exec_driver_sql('ALTER TABLE reservations RENAME TO reservations_old')
+    # Index names are global in SQLite, free them for the new table
+    for index in inspect(connection).get_indexes('reservations_old'):
+        connection.exec_driver_sql(f'DROP INDEX {index["name"]}')
+    Reservation.__table__.create(connection)
+    connection.exec_driver_sql(f'INSERT INTO reservations ({columns}) SELECT {columns} FROM reservations_old')
+    connection.exec_driver_sql('DROP TABLE reservations_old')
+
+def migrate(engine, dry_run=False, log=print):
+    """
+    Build the model's reservation indexes and drop the ones they replace
+
+    Args:
+        engine (Engine): Database to migrate
+        dry_run (bool): Only log the statements
+        log (callable): Receives progress messages
+
+    Returns:
+        list: Statements that were (or would be) run
+    """
+    backend = engine.dialect.name
+    # CONCURRENTLY cannot run inside a transaction block
+    connection = engine.connect().execution_options(isolation_level='AUTOCOMMIT') \
+        if backend == 'postgresql' else engine.connect()
+
+    with connection:
+        statements = plan_migration(connection)
+        if not statements:
+            log("✓ Reservation indexes are up to date")
+            return statements
+
+        for statement in statements:
+            log(f"  {statement}")
+        if dry_run:
+            return statements
+
+        if backend == 'postgresql':
+            connection.exec_driver_sql(f"SET lock_timeout = '{LOCK_TIMEOUT}s'")
+        elif backend == 'mysql':
+            connection.exec_driver_sql(f'SET SESSION lock_wait_timeout = {LOCK_TIMEOUT}')
+
+        if statements == [SQLITE_REBUILD]:
+            rebuild_sqlite_reservations(connection)
+        else:
+            for statement in statements:
+                connection.exec_driver_sql(statement)
+        connection.commit()
+
+    log(f"✓ Ran {len(statements)} index statements")
+    return statements
+
+def main():
+    """Main migration function"""
+    parser = argparse.ArgumentParser(description='Migrate reservation indexes without long table locks')
+    parser.add_argument('--database-url', help='database to migrate (default: DATABASE_URL / config)')
+    parser.add_argument('--dry-run', action='store_true', help='print the statements without running them')
+    parser.add_argument('--explain', action='store_true', help='print the hot query plans and exit')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+
+    from app import create_app
+    from models import db
+
+    app = create_app('production')
+    print("🗂  Restaurant Reservation System - Index migration")
+    print(f"Database: {app.config['SQLALCHEMY_DATABASE_URI']}")
+
+    with app.app_context():
+        if args.explain:
+            explain(db.engine)
+            return
+        try:
+            migrate(db.engine, dry_run=args.dry_run)
+        except Exception as e:
+            print(f"✗ Migration stopped: {e}")
+            print("  Statements that ran are kept; run the script again to continue.")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
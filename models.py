@@ -7,13 +7,19 @@ Models include Customer, Table, Reservation, and User entities with proper
 relationships and constraints.
 """
 
+import json
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy.orm import object_session, joinedload
+from sqlalchemy.sql.elements import Grouping
 from datetime import datetime, date, time
-from werkzeug.security import generate_password_hash, check_password_hash
+from tenancy import TenantSession
 
-# Initialize SQLAlchemy
-db = SQLAlchemy()
+# Initialize SQLAlchemy; the session binds to the current tenant's database (tenancy.py)
+db = SQLAlchemy(session_options={'class_': TenantSession})
+
+# Reservation statuses that occupy a table
+ACTIVE_RESERVATION_STATUSES = ['pending', 'confirmed']
 
 class Customer(db.Model):
     """
@@ -109,12 +115,14 @@ class Table(db.Model):
         if self.status != 'available':
             return False
             
-        # Check for existing reservations at this time
-        existing_reservation = Reservation.query.filter_by(
+        # Check for existing reservations at this time (in whichever
+        # session loaded this table, so async callers work too)
+        session = object_session(self) or db.session
+        existing_reservation = session.query(Reservation).filter_by(
             table_id=self.table_id,
             reservation_date=reservation_date,
             reservation_time=reservation_time
-        ).filter(Reservation.status.in_(['pending', 'confirmed'])).first()
+        ).filter(Reservation.status.in_(ACTIVE_RESERVATION_STATUSES)).first()
         
         return existing_reservation is None
     
@@ -161,10 +169,12 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         """Set password hash"""
+        from werkzeug.security import generate_password_hash
         self.password_hash = generate_password_hash(password)
     
     def check_password(self, password):
         """Check password against hash"""
+        from werkzeug.security import check_password_hash
         return check_password_hash(self.password_hash, password)
     
     def is_admin(self):
@@ -206,19 +216,41 @@ class Reservation(db.Model):
     
     reservation_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.customer_id'), nullable=False, index=True)
-    table_id = db.Column(db.Integer, db.ForeignKey('tables.table_id'), nullable=False, index=True)
-    reservation_date = db.Column(db.Date, nullable=False, index=True)
+    table_id = db.Column(db.Integer, db.ForeignKey('tables.table_id'), nullable=False)
+    reservation_date = db.Column(db.Date, nullable=False)
     reservation_time = db.Column(db.Time, nullable=False)
     party_size = db.Column(db.Integer, nullable=False)
-    status = db.Column(db.Enum('pending', 'confirmed', 'cancelled', 'completed'), default='pending', index=True)
+    status = db.Column(db.Enum('pending', 'confirmed', 'cancelled', 'completed'), default='pending')
     special_requests = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Constraints
+    # Constraints and indexes (see migrate_indexes.py for the query plans
+    # they were chosen from and for building them on a live database)
     __table_args__ = (
         db.CheckConstraint('party_size > 0', name='check_party_size_positive'),
-        db.UniqueConstraint('table_id', 'reservation_date', 'reservation_time', name='unique_table_datetime'),
+        
+        # One active booking per table and slot. Cancelled and completed rows
+        # stay in the table without blocking the slot: a partial index on
+        # PostgreSQL and SQLite, a functional index on MySQL (8.0.13+) whose
+        # table_id part is NULL for inactive rows, and NULLs never collide
+        db.Index('uq_reservations_active_slot', 'table_id', 'reservation_date', 'reservation_time',
+                 unique=True,
+                 postgresql_where=status.in_(ACTIVE_RESERVATION_STATUSES),
+                 sqlite_where=status.in_(ACTIVE_RESERVATION_STATUSES)
+                 ).ddl_if(dialect=('postgresql', 'sqlite')),
+        db.Index('uq_reservations_active_slot',
+                 Grouping(db.case((status.in_(ACTIVE_RESERVATION_STATUSES), table_id))), 'reservation_date', 'reservation_time',
+                 unique=True
+                 ).ddl_if(dialect='mysql'),
+        
+        # Table.is_available_at and the delete-table check (table, slot, status)
+        db.Index('ix_reservations_table_slot', 'table_id', 'reservation_date', 'reservation_time', 'status'),
+        # Covers the booked-tables subquery of available_tables_statement, and
+        # serves ORDER BY date DESC, time DESC listings by scanning it backwards
+        db.Index('ix_reservations_slot', 'reservation_date', 'reservation_time', 'status', 'table_id'),
+        # Day and date-range scans filtered by status (dashboard, stats)
+        db.Index('ix_reservations_date_status', 'reservation_date', 'status'),
     )
     
     def __repr__(self):
@@ -242,6 +274,7 @@ class Reservation(db.Model):
         if self.status == 'pending':
             self.status = 'confirmed'
             self.updated_at = datetime.utcnow()
+            self._record_event('reservation.confirmed')
             return True
         return False
     
@@ -250,6 +283,7 @@ class Reservation(db.Model):
         if self.can_be_cancelled():
             self.status = 'cancelled'
             self.updated_at = datetime.utcnow()
+            self._record_event('reservation.cancelled')
             return True
         return False
     
@@ -258,9 +292,28 @@ class Reservation(db.Model):
         if self.status == 'confirmed':
             self.status = 'completed'
             self.updated_at = datetime.utcnow()
+            self._record_event('reservation.completed')
             return True
         return False
     
+    def _record_event(self, event_type):
+        """Add an outbox event to the session holding this reservation"""
+        session = object_session(self)
+        if session is not None:
+            record_event(session, event_type, self.reservation_id, self.event_payload())
+    
+    def event_payload(self):
+        """Reservation fields carried by outbox events (no relationships)"""
+        return {
+            'reservation_id': self.reservation_id,
+            'customer_id': self.customer_id,
+            'table_id': self.table_id,
+            'reservation_date': self.reservation_date.isoformat() if self.reservation_date else None,
+            'reservation_time': self.reservation_time.strftime('%H:%M') if self.reservation_time else None,
+            'party_size': self.party_size,
+            'status': self.status
+        }
+    
     def to_dict(self):
         """Convert reservation object to dictionary"""
         return {
@@ -278,38 +331,372 @@ class Reservation(db.Model):
             'table': self.table.to_dict() if self.table else None
         }
 
+class ArchivedReservation(db.Model):
+    """
+    Reservation moved out of the reservations table by archive.py
+    
+    Completed and cancelled reservations older than the retention window
+    are archived so the hot table only holds recent and upcoming bookings.
+    Rows keep their original reservation_id; customer_id and table_id are
+    plain columns so history survives a table being removed.
+    
+    Attributes:
+        Same as Reservation, plus
+        archived_at (datetime): When the row was archived
+    """
+    __tablename__ = 'reservations_archive'
+    
+    reservation_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    customer_id = db.Column(db.Integer, nullable=False, index=True)
+    table_id = db.Column(db.Integer, nullable=False)
+    reservation_date = db.Column(db.Date, nullable=False)
+    reservation_time = db.Column(db.Time, nullable=False)
+    party_size = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.Enum('pending', 'confirmed', 'cancelled', 'completed'), default='pending')
+    special_requests = db.Column(db.Text)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_reservations_archive_date', 'reservation_date', 'reservation_time'),
+    )
+    
+    def __repr__(self):
+        return f'<ArchivedReservation {self.reservation_id} for {self.party_size} people>'
+
+# Columns shared by live and archived reservations
+RESERVATION_HISTORY_COLUMNS = [
+    'reservation_id', 'customer_id', 'table_id', 'reservation_date', 'reservation_time',
+    'party_size', 'status', 'special_requests', 'created_at', 'updated_at'
+]
+
+# Live and archived reservations as one relation (UNION ALL; IDs never overlap)
+reservation_history = db.union_all(
+    db.select(*[Reservation.__table__.c[name] for name in RESERVATION_HISTORY_COLUMNS],
+              db.false().label('archived')),
+    db.select(*[ArchivedReservation.__table__.c[name] for name in RESERVATION_HISTORY_COLUMNS],
+              db.true().label('archived'))
+).subquery('reservation_history')
+
+class ReservationRecord(db.Model):
+    """
+    Read-only view over every reservation, live or archived
+    
+    Used by admin search and exports so history stays visible after
+    archival. Queries like Reservation (filter_by, joins to customer and
+    table, with_reservation_details) but cannot be modified.
+    
+    Attributes:
+        Same as Reservation, plus
+        archived (bool): True when the row lives in reservations_archive
+    """
+    __table__ = reservation_history
+    __mapper_args__ = {'primary_key': [reservation_history.c.reservation_id]}
+    
+    customer = db.relationship(
+        'Customer', primaryjoin='foreign(ReservationRecord.customer_id) == Customer.customer_id', viewonly=True)
+    table = db.relationship(
+        'Table', primaryjoin='foreign(ReservationRecord.table_id) == Table.table_id', viewonly=True)
+    
+    @property
+    def datetime_str(self):
+        """Returns formatted date and time string"""
+        return Reservation.datetime_str.fget(self)
+    
+    def to_dict(self):
+        """Convert reservation record to dictionary"""
+        data = Reservation.to_dict(self)
+        data['archived'] = bool(self.archived)
+        return data
+
+class SchedulerLease(db.Model):
+    """
+    Time-limited lease that elects one process to run scheduled jobs
+    
+    Every gunicorn worker runs a scheduler (scheduler.py); only the one
+    holding an unexpired lease runs the jobs that must not run twice.
+    
+    Attributes:
+        name (str): Lease name (primary key)
+        holder (str): 'hostname:pid' of the process holding it
+        expires_at (datetime): UTC time the lease lapses unless renewed
+    """
+    __tablename__ = 'scheduler_leases'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<SchedulerLease {self.name} held by {self.holder}>'
+
+class SchedulerJobRun(db.Model):
+    """
+    When a leader-only scheduled job last started
+    
+    Kept in the database rather than in the leader's memory, so a process
+    that takes the lease over (after a restart or worker recycling) knows
+    which jobs are actually due.
+    
+    Attributes:
+        name (str): '<lease name>:<job name>' (primary key)
+        last_run_at (datetime): UTC time of the last start
+    """
+    __tablename__ = 'scheduler_job_runs'
+    
+    name = db.Column(db.String(100), primary_key=True)
+    last_run_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<SchedulerJobRun {self.name} at {self.last_run_at}>'
+
+class WaitlistEntry(db.Model):
+    """
+    Customer waiting for a table anywhere in a time window on a date
+
+    When a booking is cancelled or a table comes back into service,
+    waitlist.py offers the freed table to the best-fitting waiting entry
+    and books it (status 'promoted').
+
+    Attributes:
+        entry_id (int): Primary key
+        customer_id (int): Foreign key to Customer
+        reservation_date (date): Date wanted
+        earliest_time (time): Earliest acceptable reservation time
+        latest_time (time): Latest acceptable reservation time
+        party_size (int): Number of people in party
+        priority (int): Higher is served first (staff can raise it)
+        status (str): waiting, promoted, removed or expired
+        special_requests (str): Carried over to the reservation
+        reservation_id (int): Reservation made on promotion; a plain column
+            so the reservation can still be archived
+        created_at (datetime): When the customer joined the waitlist
+        promoted_at (datetime): When the entry was promoted
+    """
+    __tablename__ = 'waitlist_entries'
+
+    entry_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customers.customer_id'), nullable=False, index=True)
+    reservation_date = db.Column(db.Date, nullable=False)
+    earliest_time = db.Column(db.Time, nullable=False)
+    latest_time = db.Column(db.Time, nullable=False)
+    party_size = db.Column(db.Integer, nullable=False)
+    priority = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.Enum('waiting', 'promoted', 'removed', 'expired'), nullable=False, default='waiting')
+    special_requests = db.Column(db.Text)
+    reservation_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    promoted_at = db.Column(db.DateTime)
+
+    customer = db.relationship('Customer')
+
+    __table_args__ = (
+        db.CheckConstraint('party_size > 0', name='check_waitlist_party_size_positive'),
+        # Matching a freed slot only reads the waiting entries for its date
+        db.Index('ix_waitlist_match', 'reservation_date', 'status', 'earliest_time', 'latest_time'),
+    )
+
+    def __repr__(self):
+        return f'<WaitlistEntry {self.entry_id} for {self.party_size} people>'
+
+    def to_dict(self):
+        """Convert waitlist entry to dictionary"""
+        return {
+            'entry_id': self.entry_id,
+            'customer_id': self.customer_id,
+            'reservation_date': self.reservation_date.isoformat() if self.reservation_date else None,
+            'earliest_time': self.earliest_time.strftime('%H:%M') if self.earliest_time else None,
+            'latest_time': self.latest_time.strftime('%H:%M') if self.latest_time else None,
+            'party_size': self.party_size,
+            'priority': self.priority,
+            'status': self.status,
+            'special_requests': self.special_requests,
+            'reservation_id': self.reservation_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'promoted_at': self.promoted_at.isoformat() if self.promoted_at else None,
+            'customer': self.customer.to_dict() if self.customer else None
+        }
+
+class OutboxEvent(db.Model):
+    """
+    Change to a reservation or table, written in the same transaction
+
+    outbox.py reads new events in id order and hands them to subscribers,
+    so consumers learn about changes without polling the tables.
+
+    Attributes:
+        event_id (int): Primary key, the order events are delivered in
+        event_type (str): e.g. reservation.created, table.updated
+        aggregate_type (str): reservation or table
+        aggregate_id (int): Id of the changed row
+        payload (str): JSON of the row after the change
+        created_at (datetime): When the event was written
+    """
+    __tablename__ = 'outbox_events'
+
+    event_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    event_type = db.Column(db.String(50), nullable=False)
+    aggregate_type = db.Column(db.String(30), nullable=False)
+    aggregate_id = db.Column(db.Integer)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<OutboxEvent {self.event_id} {self.event_type}>'
+
+    def to_dict(self):
+        """Convert outbox event to dictionary"""
+        return {
+            'event_id': self.event_id,
+            'event_type': self.event_type,
+            'aggregate_type': self.aggregate_type,
+            'aggregate_id': self.aggregate_id,
+            'payload': json.loads(self.payload),
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class OutboxCursor(db.Model):
+    """
+    Last outbox event a named consumer has processed
+
+    Attributes:
+        name (str): Consumer name (primary key)
+        last_event_id (int): Highest event_id delivered
+        updated_at (datetime): When the cursor last moved
+    """
+    __tablename__ = 'outbox_cursors'
+
+    name = db.Column(db.String(50), primary_key=True)
+    last_event_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<OutboxCursor {self.name} at {self.last_event_id}>'
+
+class IdempotencyKey(db.Model):
+    """
+    Idempotency-Key of a POST request and the response it got
+
+    idempotency.py claims a key with an 'in_flight' row before running the
+    request and stores the response ('done') for replays of the same key.
+
+    Attributes:
+        key (str): Idempotency-Key header value (primary key)
+        request_hash (str): Hash of method, path and body of the first request
+        state (str): in_flight or done
+        status_code (int): Stored response status
+        response_body (str): Stored response body
+        content_type (str): Stored response Content-Type
+        created_at (datetime): When the key was claimed
+        expires_at (datetime): When the claim lapses (in_flight) or the
+            stored response is forgotten (done)
+    """
+    __tablename__ = 'idempotency_keys'
+
+    key = db.Column(db.String(255), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    state = db.Column(db.Enum('in_flight', 'done'), nullable=False, default='in_flight')
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    content_type = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key} {self.state}>'
+
 # Utility functions for database operations
 
-def find_available_tables(reservation_date, reservation_time, party_size):
+def record_event(session, event_type, aggregate_id, payload):
     """
-    Find available tables for a specific date, time, and party size
+    Append an event to the outbox as part of the session's transaction
+
+    The event commits or rolls back together with the change it describes.
+
+    Args:
+        session (Session): Session holding the change
+        event_type (str): '<aggregate>.<change>', e.g. 'reservation.created'
+        aggregate_id (int): Id of the changed row
+        payload (dict): JSON-serialisable description of the row
+
+    Returns:
+        OutboxEvent: The pending event
+    """
+    event = OutboxEvent(event_type=event_type, aggregate_type=event_type.split('.')[0],
+                        aggregate_id=aggregate_id, payload=json.dumps(payload, default=str))
+    session.add(event)
+    return event
+
+def with_reservation_details(query, model=None):
+    """
+    Eager-load the customer and table of every reservation in a query
+    
+    Listings render reservation.customer and reservation.table for each
+    row; loading them in the same SELECT avoids one lazy query per row.
+    
+    Args:
+        query (Query): Query returning Reservation objects
+        model (class, optional): Reservation (default) or ReservationRecord
+        
+    Returns:
+        Query: The query with joined loads for customer and table
+    """
+    model = model or Reservation
+    return query.options(joinedload(model.customer), joinedload(model.table))
+
+def available_tables_statement(reservation_date, reservation_time, party_size, exclude_table_ids=()):
+    """
+    Build the SELECT for tables that can seat a party at a date and time
+    
+    The statement is shared by the sync (Flask-SQLAlchemy) and async
+    (asgi.py) code paths, and excludes booked tables with a subquery so
+    availability costs one round trip instead of one query per table.
     
     Args:
         reservation_date (date): Date for reservation
         reservation_time (time): Time for reservation
         party_size (int): Number of people in party
+        exclude_table_ids (iterable, optional): Tables to treat as taken (e.g. held)
         
     Returns:
-        list: List of available Table objects
+        Select: Statement yielding Table objects, smallest suitable first
     """
-    # Get all tables with sufficient capacity
-    suitable_tables = Table.query.filter(
-        Table.capacity >= party_size,
-        Table.status == 'available'
-    ).all()
+    booked_tables = db.select(Reservation.table_id).where(
+        Reservation.reservation_date == reservation_date,
+        Reservation.reservation_time == reservation_time,
+        Reservation.status.in_(ACTIVE_RESERVATION_STATUSES)
+    )
     
-    # Filter out tables that are already reserved at this time
-    available_tables = []
-    for table in suitable_tables:
-        if table.is_available_at(reservation_date, reservation_time):
-            available_tables.append(table)
+    statement = db.select(Table).where(
+        Table.capacity >= party_size,
+        Table.status == 'available',
+        Table.table_id.not_in(booked_tables)
+    ).order_by(Table.capacity, Table.table_id)
     
-    # Sort by capacity (smallest suitable table first)
-    available_tables.sort(key=lambda t: t.capacity)
+    if exclude_table_ids:
+        statement = statement.where(Table.table_id.not_in(list(exclude_table_ids)))
+    return statement
+
+def find_available_tables(reservation_date, reservation_time, party_size, session=None, exclude_table_ids=()):
+    """
+    Find available tables for a specific date, time, and party size
     
-    return available_tables
+    Args:
+        reservation_date (date): Date for reservation
+        reservation_time (time): Time for reservation
+        party_size (int): Number of people in party
+        session (Session, optional): Session to query, defaults to db.session
+        exclude_table_ids (iterable, optional): Tables to treat as taken (e.g. held)
+        
+    Returns:
+        list: List of available Table objects (smallest suitable table first)
+    """
+    session = session if session is not None else db.session
+    statement = available_tables_statement(reservation_date, reservation_time, party_size, exclude_table_ids)
+    return list(session.scalars(statement))
 
-def create_customer(first_name, last_name, phone, email=None):
+def create_customer(first_name, last_name, phone, email=None, session=None):
     """
     Create a new customer
     
@@ -318,13 +705,15 @@ def create_customer(first_name, last_name, phone, email=None):
         last_name (str): Customer's last name
         phone (str): Customer's phone number
         email (str, optional): Customer's email
+        session (Session, optional): Session to use, defaults to db.session
         
     Returns:
         Customer: Created customer object or None if error
     """
+    session = session if session is not None else db.session
     try:
         # Check if customer with this phone already exists
-        existing_customer = Customer.query.filter_by(phone=phone).first()
+        existing_customer = session.query(Customer).filter_by(phone=phone).first()
         if existing_customer:
             return existing_customer
         
@@ -334,15 +723,15 @@ def create_customer(first_name, last_name, phone, email=None):
             phone=phone,
             email=email
         )
-        db.session.add(customer)
-        db.session.commit()
+        session.add(customer)
+        session.commit()
         return customer
     except Exception as e:
-        db.session.rollback()
+        session.rollback()
         print(f"Error creating customer: {e}")
         return None
 
-def create_reservation(customer_id, table_id, reservation_date, reservation_time, party_size, special_requests=None):
+def create_reservation(customer_id, table_id, reservation_date, reservation_time, party_size, special_requests=None, session=None):
     """
     Create a new reservation
     
@@ -353,13 +742,15 @@ def create_reservation(customer_id, table_id, reservation_date, reservation_time
         reservation_time (time): Time of reservation
         party_size (int): Number of people
         special_requests (str, optional): Special requests
+        session (Session, optional): Session to use, defaults to db.session
         
     Returns:
         Reservation: Created reservation object or None if error
     """
+    session = session if session is not None else db.session
     try:
         # Check if table is available
-        table = Table.query.get(table_id)
+        table = session.get(Table, table_id)
         if not table or not table.is_available_at(reservation_date, reservation_time):
             return None
         
@@ -371,10 +762,13 @@ def create_reservation(customer_id, table_id, reservation_date, reservation_time
             party_size=party_size,
             special_requests=special_requests
         )
-        db.session.add(reservation)
-        db.session.commit()
+        session.add(reservation)
+        # The event needs the new reservation_id
+        session.flush()
+        record_event(session, 'reservation.created', reservation.reservation_id, reservation.event_payload())
+        session.commit()
         return reservation
     except Exception as e:
-        db.session.rollback()
+        session.rollback()
         print(f"Error creating reservation: {e}")
         return None
@@ -0,0 +1,228 @@
+"""
+Occupancy Matrix for Restaurant Reservation System
+MIT400 Assessment 2
+
+Day-level availability questions - which slots tonight can seat six, the
+earliest slot this week for eight, how full each sitting is - touch every
+table x slot x date. OccupancyMatrix loads a date range with two queries
+into NumPy arrays and answers them with masks and reductions instead of
+one find_available_tables call per slot:
+
+    occupied[date, table, slot]   active reservation on the table then
+    capacities[table]             seats per table
+    in_service[table]             table status is 'available'
+
+Tables are ordered by (capacity, table_id), the order find_available_tables
+returns them in, so a boolean mask over the table axis is already a result
+list. Slots are the booking grid (bookable_slots); reservations at other
+times cannot block a grid slot, exactly as in find_available_tables, which
+matches on the reservation time. Holds are not part of the matrix - callers
+that offer tables filter the held ones (booking.suggest_slots).
+
+test_system.py checks the results against find_available_tables on
+random floor plans; benchmark_occupancy.py compares the two on a seeded
+database.
+"""
+
+from datetime import datetime, timedelta
+import numpy as np
+from models import db, Table, Reservation, ACTIVE_RESERVATION_STATUSES
+
+def bookable_slots(opening_time, closing_time, step_minutes):
+    """
+    Booking grid between opening and closing time
+
+    Args:
+        opening_time (str): First slot, 'HH:MM' (OPENING_TIME)
+        closing_time (str): Closing time, 'HH:MM' (CLOSING_TIME); the last
+            slot starts one step before it
+        step_minutes (int): Minutes between slots (TIME_SLOT_DURATION)
+
+    Returns:
+        list: time objects
+    """
+    current = datetime.strptime(opening_time, '%H:%M')
+    closing = datetime.strptime(closing_time, '%H:%M')
+    slots = []
+    while current + timedelta(minutes=step_minutes) <= closing:
+        slots.append(current.time())
+        current += timedelta(minutes=step_minutes)
+    return slots
+
+class OccupancyMatrix:
+    """
+    Tables x slots occupancy for a range of dates
+
+    Args:
+        dates (list): Consecutive dates covered
+        slots (list): Slot times of each date
+        table_ids (ndarray): Table ids, ordered by (capacity, table_id)
+        capacities (ndarray): Seats of each table
+        in_service (ndarray): True for tables that can be booked
+        occupied (ndarray): bool array of shape (dates, tables, slots)
+    """
+
+    def __init__(self, dates, slots, table_ids, capacities, in_service, occupied):
+        self.dates = dates
+        self.slots = slots
+        self.table_ids = table_ids
+        self.capacities = capacities
+        self.in_service = in_service
+        self.occupied = occupied
+        self._date_positions = {day: position for position, day in enumerate(dates)}
+        self._slot_positions = {slot: position for position, slot in enumerate(slots)}
+        self._slot_minutes = np.array([slot.hour * 60 + slot.minute for slot in slots], dtype=np.int64)
+
+    @classmethod
+    def load(cls, start_date, days, slots, session=None):
+        """
+        Read the tables and the active reservations of a date range
+
+        Args:
+            start_date (date): First date
+            days (int): Number of dates
+            slots (list): Slot times, e.g. bookable_slots(...)
+            session (Session, optional): Session to use, defaults to db.session
+
+        Returns:
+            OccupancyMatrix: Snapshot of the range
+        """
+        session = session if session is not None else db.session
+        tables = session.execute(db.select(Table.table_id, Table.capacity, Table.status)
+                                 .order_by(Table.capacity, Table.table_id)).all()
+        dates = [start_date + timedelta(days=offset) for offset in range(days)]
+        matrix = cls(
+            dates, list(slots),
+            np.array([table.table_id for table in tables], dtype=np.int64),
+            np.array([table.capacity for table in tables], dtype=np.int64),
+            np.array([table.status == 'available' for table in tables], dtype=bool),
+            np.zeros((len(dates), len(tables), len(slots)), dtype=bool))
+
+        table_positions = {table.table_id: position for position, table in enumerate(tables)}
+        rows = session.execute(db.select(Reservation.reservation_date, Reservation.reservation_time,
+                                         Reservation.table_id).where(
+            Reservation.reservation_date >= dates[0],
+            Reservation.reservation_date <= dates[-1],
+            Reservation.reservation_time.in_(matrix.slots),
+            Reservation.status.in_(ACTIVE_RESERVATION_STATUSES)
+        )).all()
+        if rows:
+            positions = np.array([(matrix._date_positions[row[0]], table_positions[row[2]],
+                                   matrix._slot_positions[row[1]]) for row in rows], dtype=np.int64)
+            matrix.occupied[positions[:, 0], positions[:, 1], positions[:, 2]] = True
+        return matrix
+
+    def position(self, reservation_date, reservation_time):
+        """
+        Indexes of a date and slot
+
+        Raises:
+            KeyError: The date is outside the range or the time is not a slot
+        """
+        return self._date_positions[reservation_date], self._slot_positions[reservation_time]
+
+    def free(self, party_size):
+        """bool array (dates, tables, slots): table can take the party then"""
+        suitable = (self.capacities >= party_size) & self.in_service
+        return ~self.occupied & suitable[np.newaxis, :, np.newaxis]
+
+    def available_tables(self, reservation_date, reservation_time, party_size):
+        """
+        Tables that can seat a party, like find_available_tables
+
+        Returns:
+            list: Table ids, smallest suitable table first
+        """
+        date_position, slot_position = self.position(reservation_date, reservation_time)
+        suitable = (self.capacities >= party_size) & self.in_service
+        mask = suitable & ~self.occupied[date_position, :, slot_position]
+        return self.table_ids[mask].tolist()
+
+    def free_table_counts(self, party_size):
+        """int array (dates, slots): tables free for the party in each slot"""
+        return self.free(party_size).sum(axis=1)
+
+    def free_slots(self, reservation_date, party_size):
+        """
+        Slots of a date with at least one table for the party
+
+        Returns:
+            list: time objects
+        """
+        counts = self.free_table_counts(party_size)[self._date_positions[reservation_date]]
+        return [self.slots[position] for position in np.flatnonzero(counts)]
+
+    def next_free_slot(self, party_size, reservation_date=None, reservation_time=None):
+        """
+        Earliest slot at or after a moment that can seat a party
+
+        Args:
+            party_size (int): Number of people
+            reservation_date (date, optional): Search from this date, default the first
+            reservation_time (time, optional): Search from this time on that date
+
+        Returns:
+            tuple: (date, time, table id of the smallest free table) or None
+        """
+        start = 0
+        if reservation_date is not None:
+            if reservation_date not in self._date_positions:
+                return None
+            start = self._date_positions[reservation_date] * len(self.slots)
+            if reservation_time is not None:
+                start += int(np.searchsorted(self._slot_minutes, reservation_time.hour * 60 + reservation_time.minute))
+
+        free = self.free(party_size)
+        # (dates, slots) flattened in time order
+        any_free = free.any(axis=1).ravel()
+        candidates = np.flatnonzero(any_free[start:])
+        if not len(candidates):
+            return None
+        date_position, slot_position = divmod(start + int(candidates[0]), len(self.slots))
+        table_position = int(np.argmax(free[date_position, :, slot_position]))
+        return self.dates[date_position], self.slots[slot_position], int(self.table_ids[table_position])
+
+    def nearest_free_slots(self, party_size, reservation_date, reservation_time, not_before=None):
+        """
+        Slots that can seat a party, nearest to a requested moment first
+
+        Every free (date, slot) of the matrix is ranked at once by its
+        distance in minutes from the request, earlier first on ties, so
+        callers stop after the first few without probing slot by slot.
+
+        Args:
+            party_size (int): Number of people
+            reservation_date (date): Requested date
+            reservation_time (time): Requested time
+            not_before (datetime, optional): Skip slots starting before this
+
+        Yields:
+            tuple: (date, time, list of free table ids, smallest first)
+        """
+        free = self.free(party_size)
+        # Minutes of every (date, slot) from midnight of the requested date
+        day_minutes = np.array([(day - reservation_date).days * 1440 for day in self.dates], dtype=np.int64)
+        minutes = (day_minutes[:, np.newaxis] + self._slot_minutes[np.newaxis, :]).ravel()
+        candidates = np.flatnonzero(free.any(axis=1).ravel())
+        if not_before is not None:
+            earliest = (not_before.date() - reservation_date).days * 1440 + not_before.hour * 60 + not_before.minute
+            candidates = candidates[minutes[candidates] >= earliest]
+        distance = np.abs(minutes[candidates] - (reservation_time.hour * 60 + reservation_time.minute))
+        for flat in candidates[np.lexsort((minutes[candidates], distance))]:
+            date_position, slot_position = divmod(int(flat), len(self.slots))
+            yield (self.dates[date_position], self.slots[slot_position],
+                   self.table_ids[free[date_position, :, slot_position]].tolist())
+
+    def fill_rate(self):
+        """
+        Share of in-service seats booked in each slot
+
+        Returns:
+            ndarray: float array (dates, slots), 0 when no table is in service
+        """
+        seats = self.capacities * self.in_service
+        total = seats.sum()
+        if not total:
+            return np.zeros((len(self.dates), len(self.slots)))
+        # (dates, tables, slots) x (tables,) -> booked seats per (date, slot)
+        return np.einsum('dts,t->ds', self.occupied, seats) / total
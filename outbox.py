@@ -0,0 +1,233 @@
+"""
+Transactional Outbox for Restaurant Reservation System
+MIT400 Assessment 2
+
+Every write to a reservation or table appends an OutboxEvent in the same
+transaction (models.record_event): create_reservation, Reservation
+confirm/cancel/complete (and so the housekeeping jobs built on them),
+table moves by the optimizer and the table create/update/delete views.
+An event exists exactly when its change committed.
+
+OutboxDispatcher reads the outbox in batches after a cursor and hands
+each event to the subscribers registered for its type:
+
+    - worker subscribers (the default) run in every process, for state
+      kept in worker memory such as caches; each process keeps its cursor
+      in memory and starts from the newest event
+    - leader subscribers (leader_only=True) run in the process holding
+      the scheduler lease, for side effects that must happen once such as
+      notifications; their cursor is the 'leader' row in outbox_cursors,
+      moved after each delivered batch, so delivery resumes where it
+      stopped after a restart (at least once: a crash mid-batch delivers
+      that batch again)
+
+Events are only read once they are OUTBOX_SETTLE_SECONDS old. Ids are
+handed out at insert but become visible at commit, so a transaction that
+commits late could otherwise slip in behind a cursor that has moved on.
+
+A subscriber that raises is logged and skipped; the others still get the
+event. GET /api/admin/outbox serves the same stream to consumers outside
+the application.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from models import db, OutboxEvent, OutboxCursor
+from tenancy import current_tenant
+
+# Cursor row of the leader subscribers
+LEADER_CURSOR = 'leader'
+
+class Subscriber:
+    """A handler for outbox events of some types"""
+
+    def __init__(self, name, handler, event_types, leader_only):
+        self.name = name
+        self.handler = handler
+        self.event_types = tuple(event_types or ())
+        self.leader_only = leader_only
+
+    def wants(self, event_type):
+        """True for listed types, or for every type of a listed 'reservation.*' prefix"""
+        if not self.event_types:
+            return True
+        return any(event_type == wanted or (wanted.endswith('.*') and event_type.startswith(wanted[:-1]))
+                   for wanted in self.event_types)
+
+def read_events(after_id, limit, settle_seconds=0, session=None):
+    """
+    Read outbox events after a cursor
+
+    Args:
+        after_id (int): Cursor, the last event_id already seen
+        limit (int): Maximum number of events
+        settle_seconds (float): Skip events younger than this
+        session (Session, optional): Session to use, defaults to db.session
+
+    Returns:
+        list: OutboxEvent rows in event_id order
+    """
+    session = session if session is not None else db.session
+    query = db.select(OutboxEvent).where(OutboxEvent.event_id > after_id)
+    if settle_seconds:
+        query = query.where(OutboxEvent.created_at <= datetime.utcnow() - timedelta(seconds=settle_seconds))
+    return session.scalars(query.order_by(OutboxEvent.event_id).limit(limit)).all()
+
+def prune_outbox(retention_hours, batch_size=1000, session=None):
+    """
+    Delete events older than the retention window
+
+    Args:
+        retention_hours (int): Hours events are kept for
+        batch_size (int): Events deleted per transaction
+        session (Session, optional): Session to use, defaults to db.session
+
+    Returns:
+        int: Number of events deleted
+    """
+    session = session if session is not None else db.session
+    events = OutboxEvent.__table__
+    cutoff = datetime.utcnow() - timedelta(hours=retention_hours)
+    deleted = 0
+    while True:
+        ids = session.scalars(db.select(events.c.event_id).where(events.c.created_at < cutoff)
+                              .order_by(events.c.event_id).limit(batch_size)).all()
+        if not ids:
+            return deleted
+        session.execute(events.delete().where(events.c.event_id.in_(ids)))
+        session.commit()
+        deleted += len(ids)
+
+class OutboxDispatcher:
+    """
+    Delivers outbox events to in-process subscribers
+
+    Args:
+        app (Flask): Application, for logging
+        batch_size (int): Events read per query
+        max_batches (int): Batches delivered per dispatch run
+        settle_seconds (float): Age an event must reach before delivery
+    """
+
+    def __init__(self, app, batch_size=200, max_batches=10, settle_seconds=2):
+        self.app = app
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.settle_seconds = settle_seconds
+        self.subscribers = []
+        self.worker_cursors = {}   # tenant -> last event_id delivered in this process
+        self.lock = threading.Lock()
+        self.delivered = 0
+        self.failures = 0
+
+    def subscribe(self, name, handler, event_types=None, leader_only=False):
+        """
+        Register a subscriber
+
+        Args:
+            name (str): Name used in logs
+            handler (callable): Called with each event as a dict (OutboxEvent.to_dict)
+            event_types (iterable, optional): Types to receive, e.g. ['reservation.*',
+                'table.deleted']; all types when omitted
+            leader_only (bool): Deliver in the elected process only, exactly
+                one process sees each event
+        """
+        self.subscribers.append(Subscriber(name, handler, event_types, leader_only))
+
+    def deliver(self, event, leader_only):
+        """Hand one event to every matching subscriber"""
+        data = event.to_dict()
+        for subscriber in self.subscribers:
+            if subscriber.leader_only != leader_only or not subscriber.wants(event.event_type):
+                continue
+            try:
+                subscriber.handler(data)
+                self.delivered += 1
+            except Exception:
+                self.failures += 1
+                self.app.logger.exception(f"Outbox subscriber {subscriber.name} failed on event {event.event_id}")
+
+    def _load_cursor(self, leader_only, session):
+        if leader_only:
+            cursor = session.get(OutboxCursor, LEADER_CURSOR)
+            if cursor is None:
+                # A new consumer starts at the newest event instead of replaying history
+                last_id = session.scalar(db.select(db.func.max(OutboxEvent.event_id))) or 0
+                cursor = OutboxCursor(name=LEADER_CURSOR, last_event_id=last_id)
+                session.add(cursor)
+                session.commit()
+            return cursor.last_event_id
+        tenant = current_tenant()
+        if tenant not in self.worker_cursors:
+            self.worker_cursors[tenant] = session.scalar(db.select(db.func.max(OutboxEvent.event_id))) or 0
+        return self.worker_cursors[tenant]
+
+    def _save_cursor(self, leader_only, last_id, session):
+        if leader_only:
+            session.execute(OutboxCursor.__table__.update().where(OutboxCursor.name == LEADER_CURSOR)
+                            .values(last_event_id=last_id, updated_at=datetime.utcnow()))
+            session.commit()
+        else:
+            self.worker_cursors[current_tenant()] = last_id
+
+    def dispatch(self, leader_only=False, session=None):
+        """
+        Deliver the events after the cursor
+
+        Args:
+            leader_only (bool): Deliver to the leader subscribers (persisted
+                cursor) instead of the worker subscribers
+            session (Session, optional): Session to use, defaults to db.session
+
+        Returns:
+            int: Number of events delivered
+        """
+        if not any(subscriber.leader_only == leader_only for subscriber in self.subscribers):
+            return 0
+        session = session if session is not None else db.session
+        # One dispatch at a time per process, so worker cursors never go backwards
+        with self.lock:
+            last_id = self._load_cursor(leader_only, session)
+            count = 0
+            for _ in range(self.max_batches):
+                events = read_events(last_id, self.batch_size, self.settle_seconds, session)
+                for event in events:
+                    self.deliver(event, leader_only)
+                if events:
+                    last_id = events[-1].event_id
+                    self._save_cursor(leader_only, last_id, session)
+                    count += len(events)
+                if len(events) < self.batch_size:
+                    break
+            session.rollback()   # end the read transaction
+            return count
+
+def init_outbox(app):
+    """
+    Create the dispatcher and schedule its runs
+
+    Args:
+        app (Flask): Application, after init_scheduler if the scheduler is enabled
+
+    Returns:
+        OutboxDispatcher: Stored in app.extensions['outbox']
+    """
+    config = app.config
+    dispatcher = OutboxDispatcher(app, config['OUTBOX_BATCH_SIZE'], settle_seconds=config['OUTBOX_SETTLE_SECONDS'])
+    app.extensions['outbox'] = dispatcher
+
+    scheduler = app.extensions.get('scheduler')
+    if scheduler is not None:
+        jobs = [
+            ('dispatch_outbox', config['OUTBOX_DISPATCH_SECONDS'], lambda: dispatcher.dispatch(), False),
+            ('dispatch_outbox_leader', config['OUTBOX_DISPATCH_SECONDS'],
+             lambda: dispatcher.dispatch(leader_only=True), True),
+            ('prune_outbox', 3600, lambda: prune_outbox(config['OUTBOX_RETENTION_HOURS']), True)
+        ]
+        # Each tenant database has its own outbox
+        tenancy = app.extensions.get('tenancy')
+        for name, interval, function, leader_only in jobs:
+            if tenancy is not None:
+                function = tenancy.for_each_tenant(function)
+            scheduler.add_job(name, interval, function, leader_only=leader_only)
+    return dispatcher
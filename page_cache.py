@@ -0,0 +1,182 @@
+"""
+Template Caching for Restaurant Reservation System
+MIT400 Assessment 2
+
+Three layers keep page rendering off the request path:
+
+    - bytecode cache: compiled templates are written to
+      JINJA_BYTECODE_CACHE_DIR, so a fresh worker (or a restarted one)
+      loads them from disk instead of parsing and compiling every
+      template again. The directory is shared by every worker on a host.
+    - static pages: pages that only depend on configuration (the customer
+      portal and the login form, as seen by a visitor who is not logged
+      in) are rendered once at boot and served as stored bytes with an
+      ETag.
+    - fragment cache: {% cache 'name', key... %}...{% endcache %} in a
+      template stores the rendered block under its key, whose first part
+      names the fragment. Keys include a data version (see data_version),
+      so an edit to the underlying rows changes the key and the block is
+      rendered afresh; nothing is invalidated by hand, in this worker or
+      any other.
+
+TEMPLATE_CACHE_ENABLED turns the static pages and fragment cache off.
+benchmark_pages.py measures time to first byte with and without them.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from flask import render_template, request, session, make_response
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from models import db
+from tenancy import DEFAULT_TENANT, current_tenant
+
+class FragmentCache:
+    """
+    Bounded in-process store for rendered template fragments
+
+    Args:
+        max_entries (int): Least recently used fragments beyond this are dropped
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return a stored fragment, or None"""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store a fragment"""
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every fragment"""
+        with self.lock:
+            self.entries.clear()
+
+class FragmentCacheExtension(Extension):
+    """Jinja extension adding {% cache key, ... %}...{% endcache %}"""
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key_parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key_parts.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render_cached', [nodes.List(key_parts)]),
+                               [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, key_parts, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        key = tuple(key_parts)
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = caller()
+            cache.set(key, fragment)
+        return fragment
+
+def data_version(model, session=None):
+    """
+    Cheap fingerprint of a table's rows for fragment cache keys
+
+    Any insert, update (updated_at) or delete changes the result, which is
+    read with one aggregate query instead of loading the rows. On MySQL,
+    whose TIMESTAMP columns hold whole seconds, two edits in the same
+    second share a version. The tenant is part of the version, so tenant
+    databases with the same row counts never share a fragment.
+
+    Args:
+        model (class): Model with an updated_at column
+        session (Session, optional): Session to use, defaults to db.session
+
+    Returns:
+        str: Version string
+    """
+    session = session if session is not None else db.session
+    primary_key = model.__mapper__.primary_key[0]
+    count, last_id, last_update = session.execute(db.select(
+        db.func.count(), db.func.max(primary_key), db.func.max(model.updated_at)).select_from(model)).one()
+    return f'{current_tenant()}:{count}:{last_id}:{last_update}'
+
+class StaticPages:
+    """Pages rendered once for visitors who are not logged in"""
+
+    def __init__(self):
+        self.pages = {}
+
+    def render(self, app, endpoint, template_name):
+        """Render a page as an anonymous visitor and store it with its ETag"""
+        with app.test_request_context():
+            html = render_template(template_name)
+        self.pages[endpoint] = (html, hashlib.sha1(html.encode('utf-8')).hexdigest())
+
+    def response(self, endpoint, current_user):
+        """
+        Serve a stored page if it suits this request
+
+        Returns:
+            Response: The stored page, or None if the page must be rendered
+        """
+        page = self.pages.get(endpoint)
+        # Pages are rendered for the default tenant, at the site root
+        if (page is None or current_user.is_authenticated or session.get('_flashes')
+                or current_tenant() != DEFAULT_TENANT):
+            return None
+        html, etag = page
+        response = make_response(html)
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+def init_template_cache(app, static_pages=()):
+    """
+    Set up the bytecode cache, fragment cache and static pages
+
+    Args:
+        app (Flask): Application, after its routes are registered
+        static_pages (iterable): (endpoint, template name) pairs to pre-render
+
+    Returns:
+        StaticPages: Stored in app.extensions['static_pages']
+    """
+    # The {% cache %} tag must parse even with caching off
+    app.jinja_env.add_extension(FragmentCacheExtension)
+
+    directory = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+    pages = StaticPages()
+    if app.config.get('TEMPLATE_CACHE_ENABLED'):
+        app.jinja_env.fragment_cache = FragmentCache(app.config.get('TEMPLATE_FRAGMENT_CACHE_SIZE', 256))
+        for endpoint, template_name in static_pages:
+            pages.render(app, endpoint, template_name)
+
+    app.extensions['static_pages'] = pages
+    return pages
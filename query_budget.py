@@ -0,0 +1,205 @@
+"""
+Query Budgets for Restaurant Reservation System
+MIT400 Assessment 2
+
+This module catches N+1 query patterns before they reach production. A
+QueryBudget counts the SQL statements run inside a block and fails when
+the block runs more than max_statements, or runs the same statement
+shape (the SQL with literals and IN lists collapsed) more than
+max_repeats times - the signature of a lazy load inside a loop.
+
+The failure report names the call site of every offending statement,
+including the template line when a lazy load happens during rendering.
+
+Usage:
+    with QueryBudget(max_statements=5):
+        find_available_tables(res_date, res_time, 4)
+
+    @QueryBudget(max_statements=10, max_repeats=2)
+    def test_something():
+        ...
+
+TestingConfig sets QUERY_BUDGET and QUERY_REPEAT_LIMIT, which makes
+create_app wrap every request in a budget (see init_query_budget).
+"""
+
+import contextlib
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Files under this directory count as application code for call sites
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Budgets currently open on this thread (innermost last)
+_active_budgets = threading.local()
+
+# Patterns used to reduce a statement to its shape
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block runs too many statements or repeats one in a loop"""
+
+def statement_shape(statement):
+    """
+    Reduce a SQL statement to its shape
+
+    Args:
+        statement (str): SQL as sent to the database driver
+
+    Returns:
+        str: Statement with literals and placeholder lists collapsed
+    """
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _PLACEHOLDER_LIST.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+def find_call_site():
+    """
+    Find the innermost application frame that led to a statement
+
+    Returns:
+        str: 'path:line in function', or 'template.html:line' for templates
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        template = frame.f_globals.get('__jinja_template__')
+        if template is not None:
+            return f"{template.name}:{template.get_corresponding_lineno(frame.f_lineno)} (template)"
+
+        filename = frame.f_code.co_filename
+        # Skip generated code such as '<string>' and SQLAlchemy's wrappers
+        if not filename.startswith('<'):
+            filename = os.path.abspath(filename)
+        if (filename.startswith(PROJECT_ROOT + os.sep) and filename != os.path.abspath(__file__)
+                and 'site-packages' not in filename):
+            return f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return '<unknown>'
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Record the statement in every budget open on this thread"""
+    budgets = getattr(_active_budgets, 'stack', None)
+    if budgets:
+        shape = statement_shape(statement)
+        call_site = find_call_site()
+        for budget in budgets:
+            budget.statements.append((shape, call_site))
+
+def _listen_for_sql():
+    """Attach the statement listener to every engine (once per process)"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+
+class QueryBudget(contextlib.ContextDecorator):
+    """
+    Context manager and decorator enforcing a SQL statement budget
+
+    Args:
+        max_statements (int, optional): Most statements the block may run
+        max_repeats (int, optional): Most times one statement shape may run
+        label (str, optional): Name used in the failure report
+    """
+
+    def __init__(self, max_statements=None, max_repeats=None, label=None):
+        self.max_statements = max_statements
+        self.max_repeats = max_repeats
+        self.label = label or 'block'
+        self.statements = []
+
+    def __enter__(self):
+        _listen_for_sql()
+        self.statements = []
+        if not hasattr(_active_budgets, 'stack'):
+            _active_budgets.stack = []
+        _active_budgets.stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.discard()
+        # Let the original error through rather than masking it
+        if exc_type is None:
+            self.check()
+        return False
+
+    def discard(self):
+        """Stop recording statements without checking the budget"""
+        if self in getattr(_active_budgets, 'stack', []):
+            _active_budgets.stack.remove(self)
+
+    @property
+    def count(self):
+        """Number of statements recorded so far"""
+        return len(self.statements)
+
+    def violations(self):
+        """
+        Describe every way the recorded statements break the budget
+
+        Returns:
+            list: Human readable problems, empty when within budget
+        """
+        problems = []
+
+        if self.max_statements is not None and self.count > self.max_statements:
+            problems.append(f"{self.count} statements run, budget is {self.max_statements}")
+
+        if self.max_repeats is not None:
+            shape_counts = Counter(shape for shape, _ in self.statements)
+            for shape, repeats in shape_counts.items():
+                if repeats > self.max_repeats:
+                    call_sites = Counter(site for statement, site in self.statements if statement == shape)
+                    sites = ', '.join(f"{site} (x{count})" for site, count in call_sites.most_common())
+                    problems.append(f"possible N+1: statement ran {repeats} times "
+                                    f"(limit {self.max_repeats}) from {sites}\n    {shape}")
+
+        return problems
+
+    def check(self):
+        """Raise QueryBudgetExceeded if the budget was broken"""
+        problems = self.violations()
+        if problems:
+            lines = [f"Query budget exceeded in {self.label}:"]
+            lines.extend(f"  - {problem}" for problem in problems)
+            lines.append("  Statements:")
+            lines.extend(f"    {site}: {shape}" for shape, site in self.statements)
+            raise QueryBudgetExceeded('\n'.join(lines))
+
+def init_query_budget(app):
+    """
+    Enforce QUERY_BUDGET and QUERY_REPEAT_LIMIT on every request of an app
+
+    Args:
+        app (Flask): Application, normally built with TestingConfig
+    """
+    @app.before_request
+    def open_query_budget():
+        g.query_budget = QueryBudget(
+            max_statements=app.config.get('QUERY_BUDGET'),
+            max_repeats=app.config.get('QUERY_REPEAT_LIMIT'),
+            label=f"{request.method} {request.full_path.rstrip('?')} ({request.endpoint})"
+        ).__enter__()
+
+    @app.after_request
+    def close_query_budget(response):
+        budget = g.pop('query_budget', None)
+        if budget is not None:
+            # Raises QueryBudgetExceeded, which TESTING propagates to the test
+            budget.__exit__(None, None, None)
+        return response
+
+    @app.teardown_request
+    def discard_query_budget(exc):
+        # Only reached with a budget still open when the request failed
+        budget = g.pop('query_budget', None)
+        if budget is not None:
+            budget.discard()
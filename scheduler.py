@@ -0,0 +1,315 @@
+"""
+Background Scheduler for Restaurant Reservation System
+MIT400 Assessment 2
+
+Runs periodic jobs on a daemon thread inside each server process. Two
+kinds of job are supported:
+
+    - leader jobs (housekeeping, archival, planner statistics) must run
+      in one process only. Every gunicorn worker competes for a lease row
+      in scheduler_leases; the holder renews it each tick and runs these
+      jobs, and when it dies the lease lapses and another worker takes over.
+      While a leader job runs, a heartbeat thread keeps renewing the lease,
+      so a long archival is not taken over half way. The start time of
+      each leader job is stored in scheduler_job_runs, so a new leader
+      does not re-run a daily job the previous one ran an hour ago
+    - worker jobs (leader_only=False) run in every process, e.g. to
+      refresh caches kept in worker memory
+
+The leases live in the application database, so election also works
+across several hosts.
+
+The scheduler is built by create_app (SCHEDULER_ENABLED) but only
+started where requests are served - gunicorn's post_worker_init, the
+ASGI lifespan or the development server - so no thread is started in a
+process that is about to fork.
+"""
+
+import contextlib
+import os
+import random
+import socket
+import threading
+import time as time_module
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from models import db, SchedulerLease, SchedulerJobRun
+
+def acquire_lease(name, holder, seconds, session=None):
+    """
+    Take or renew a lease unless another holder has an unexpired one
+
+    Args:
+        name (str): Lease name
+        holder (str): Identity of the caller
+        seconds (int): How long the lease lasts without renewal
+        session (Session, optional): Session to use, defaults to db.session
+
+    Returns:
+        bool: True if the caller now holds the lease
+    """
+    session = session if session is not None else db.session
+    leases = SchedulerLease.__table__
+    now = datetime.utcnow()
+    values = {'holder': holder, 'expires_at': now + timedelta(seconds=seconds)}
+
+    # A single UPDATE both renews our own lease and steals an expired one,
+    # so two workers can never both succeed
+    result = session.execute(leases.update().where(
+        leases.c.name == name,
+        db.or_(leases.c.holder == holder, leases.c.expires_at < now)
+    ).values(**values))
+
+    if result.rowcount == 0:
+        # Either nobody has taken the lease yet or someone else holds it
+        try:
+            session.execute(leases.insert().values(name=name, **values))
+        except IntegrityError:
+            session.rollback()
+            return False
+
+    session.commit()
+    return True
+
+def release_lease(name, holder, session=None):
+    """
+    Give up a lease so another process can take it at once
+
+    Args:
+        name (str): Lease name
+        holder (str): Identity of the caller
+        session (Session, optional): Session to use, defaults to db.session
+    """
+    session = session if session is not None else db.session
+    leases = SchedulerLease.__table__
+    session.execute(leases.update().where(leases.c.name == name, leases.c.holder == holder)
+                    .values(expires_at=datetime.utcnow()))
+    session.commit()
+
+def last_job_runs(prefix, session=None):
+    """
+    Start times of the leader jobs of a scheduler
+
+    Args:
+        prefix (str): Lease name the jobs run under
+        session (Session, optional): Session to use, defaults to db.session
+
+    Returns:
+        dict: UTC datetime of the last start by job name
+    """
+    session = session if session is not None else db.session
+    runs = SchedulerJobRun.__table__
+    rows = session.execute(db.select(runs.c.name, runs.c.last_run_at)
+                           .where(runs.c.name.startswith(f'{prefix}:'))).all()
+    return {name[len(prefix) + 1:]: last_run_at for name, last_run_at in rows}
+
+def record_job_run(prefix, job_name, started_at, session=None):
+    """Store the start time of a leader job"""
+    session = session if session is not None else db.session
+    runs = SchedulerJobRun.__table__
+    name = f'{prefix}:{job_name}'
+    updated = session.execute(runs.update().where(runs.c.name == name).values(last_run_at=started_at)).rowcount
+    if not updated:
+        session.execute(runs.insert().values(name=name, last_run_at=started_at))
+    session.commit()
+
+class Job:
+    """A function run every interval seconds"""
+
+    def __init__(self, name, interval, function, leader_only):
+        self.name = name
+        self.interval = interval
+        self.function = function
+        self.leader_only = leader_only
+        self.next_run = 0.0
+
+class Scheduler:
+    """
+    Runs registered jobs on a background thread
+
+    Args:
+        app (Flask): Application whose context the jobs run in
+        tick (int): Seconds between checks for due jobs
+        lease_seconds (int): Leader lease duration, a few ticks long
+        lease_name (str): Lease the processes compete for
+    """
+
+    def __init__(self, app, tick=15, lease_seconds=60, lease_name='scheduler'):
+        self.app = app
+        self.tick = tick
+        self.lease_seconds = lease_seconds
+        self.lease_name = lease_name
+        self.jobs = []
+        self.holder = None
+        self.is_leader = False
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def add_job(self, name, interval, function, leader_only=True):
+        """
+        Register a job
+
+        Args:
+            name (str): Name used in logs
+            interval (int): Seconds between runs
+            function (callable): Called without arguments in an app context
+            leader_only (bool): Run in the elected process only
+        """
+        self.jobs.append(Job(name, interval, function, leader_only))
+
+    @contextlib.contextmanager
+    def _lease_heartbeat(self, holder):
+        """Keep renewing the lease from another thread while a leader job runs"""
+        done = threading.Event()
+
+        def renew():
+            while not done.wait(self.lease_seconds / 3):
+                with self.app.app_context():
+                    try:
+                        if not acquire_lease(self.lease_name, holder, self.lease_seconds):
+                            self.app.logger.warning("Scheduler lost its lease during a running job")
+                    except Exception as e:
+                        db.session.rollback()
+                        self.app.logger.warning(f"Scheduler could not renew its lease: {e}")
+
+        thread = threading.Thread(target=renew, name='scheduler-lease', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def _due_leader_jobs(self):
+        """Names of the leader jobs whose interval has passed since their last start"""
+        last_runs = last_job_runs(self.lease_name)
+        db.session.rollback()   # end the read transaction
+        now = datetime.utcnow()
+        return {job.name for job in self.jobs if job.leader_only and (
+            job.name not in last_runs or last_runs[job.name] + timedelta(seconds=job.interval) <= now)}
+
+    def run_pending(self):
+        """
+        Renew leadership and run every job that is due
+
+        Returns:
+            list: Names of the jobs that ran
+        """
+        holder = self.holder = self.holder or f'{socket.gethostname()}:{os.getpid()}'
+        ran = []
+        with self.app.app_context():
+            try:
+                self.is_leader = acquire_lease(self.lease_name, holder, self.lease_seconds)
+            except Exception as e:
+                db.session.rollback()
+                self.is_leader = False
+                self.app.logger.warning(f"Scheduler could not reach the lease table: {e}")
+
+            due = set()
+            if self.is_leader:
+                try:
+                    due = self._due_leader_jobs()
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.warning(f"Scheduler could not read its job runs: {e}")
+
+            for job in self.jobs:
+                if job.leader_only:
+                    if job.name not in due:
+                        continue
+                else:
+                    now = time_module.monotonic()
+                    if now < job.next_run:
+                        continue
+                    job.next_run = now + job.interval
+                try:
+                    if job.leader_only:
+                        record_job_run(self.lease_name, job.name, datetime.utcnow())
+                        with self._lease_heartbeat(holder):
+                            result = job.function()
+                    else:
+                        result = job.function()
+                    ran.append(job.name)
+                    if result:
+                        self.app.logger.info(f"Scheduled job {job.name}: {result}")
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception(f"Scheduled job {job.name} failed")
+        return ran
+
+    def start(self):
+        """Start the background thread in this process"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        # Identity is taken here, after any fork, so each worker has its own
+        self.holder = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run, name='scheduler', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        """Stop the thread and hand the lease over if this process held it"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        if self.is_leader:
+            with self.app.app_context():
+                try:
+                    release_lease(self.lease_name, self.holder)
+                except Exception as e:
+                    self.app.logger.warning(f"Scheduler could not release its lease: {e}")
+            self.is_leader = False
+
+    def _run(self):
+        # A random first delay keeps freshly started workers from all
+        # hitting the lease table at the same moment
+        delay = random.uniform(0, self.tick)
+        while not self.stopped.wait(delay):
+            self.run_pending()
+            delay = self.tick
+
+def init_scheduler(app):
+    """
+    Build the scheduler with the housekeeping jobs from the app config
+
+    Args:
+        app (Flask): Application to schedule jobs for
+
+    Returns:
+        Scheduler: Not yet started, stored in app.extensions['scheduler']
+    """
+    from housekeeping import complete_past_reservations, expire_pending_reservations, refresh_statistics
+    from archive import archive_reservations
+    from waitlist import expire_waitlist
+    from idempotency import prune_idempotency_keys
+    from table_assignment import optimize_day
+
+    config = app.config
+    scheduler = Scheduler(app, tick=config['SCHEDULER_TICK_SECONDS'], lease_seconds=config['SCHEDULER_LEASE_SECONDS'])
+    batch_size = config['HOUSEKEEPING_BATCH_SIZE']
+    interval = config['HOUSEKEEPING_INTERVAL_SECONDS']
+
+    scheduler.add_job('complete_past_reservations', interval,
+                      lambda: complete_past_reservations(config['COMPLETE_AFTER_MINUTES'], batch_size))
+    scheduler.add_job('expire_pending_reservations', interval,
+                      lambda: expire_pending_reservations(config['PENDING_EXPIRY_MINUTES'], batch_size,
+                                                          holds=app.extensions.get('holds')))
+    scheduler.add_job('expire_waitlist', interval, expire_waitlist)
+    scheduler.add_job('prune_idempotency_keys', interval, prune_idempotency_keys)
+    scheduler.add_job('optimize_table_assignments', interval, lambda: sum(
+        len(optimize_day(datetime.now().date() + timedelta(days=offset), holds=app.extensions.get('holds'))['moves'])
+        for offset in range(config['OPTIMIZE_AHEAD_DAYS'] + 1)))
+    scheduler.add_job('archive_reservations', 24 * 3600, lambda: archive_reservations(
+        db.session.get_bind(), datetime.now().date() - timedelta(days=config['RESERVATION_RETENTION_DAYS']),
+        config['ARCHIVE_BATCH_SIZE']))
+    scheduler.add_job('refresh_statistics', 24 * 3600, lambda: refresh_statistics(db.session.get_bind()))
+    
+    # Housekeeping visits every restaurant location's database in turn
+    tenancy = app.extensions.get('tenancy')
+    if tenancy is not None:
+        for job in scheduler.jobs:
+            if job.leader_only:
+                job.function = tenancy.for_each_tenant(job.function)
+
+    app.extensions['scheduler'] = scheduler
+    return scheduler
@@ -0,0 +1,145 @@
+"""
+Request Coalescing for Restaurant Reservation System
+MIT400 Assessment 2
+
+At peak many browsers ask for exactly the same availability (the portal's
+status poll always asks for today, 19:00, party of 2). A SingleFlight
+lets concurrent identical calls inside one worker share a single
+computation: the first caller runs it, everyone who arrives while it is
+running waits for and receives the same result (or exception).
+
+Nothing is cached - once the computation finishes the next call runs it
+again - so results are never staler than the request that produced them.
+
+The counters show how much work was saved: collapse ratio is the share
+of calls that were answered by another caller's computation.
+"""
+
+import asyncio
+import threading
+from metrics import format_labels
+
+# Coalescing groups in this process by name, reported together by render_metrics
+_groups = {}
+
+class _Call:
+    """One in-flight computation and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key (thread version)
+
+    Args:
+        name (str): Label used in metrics
+    """
+
+    def __init__(self, name):
+        self.name = name
+        _groups[name] = self
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.calls = 0
+        self.executions = 0
+
+    def do(self, key, function):
+        """
+        Run function, or wait for the identical call already running
+
+        Args:
+            key (hashable): Identifies identical calls
+            function (callable): Computation to run when no call is in flight
+
+        Returns:
+            The function's result, shared by every coalesced caller
+        """
+        with self.lock:
+            self.calls += 1
+            call = self.in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self.in_flight[key] = _Call()
+                self.executions += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            call.done.set()
+
+    @property
+    def collapse_ratio(self):
+        """Share of calls answered by another caller's computation"""
+        return 1 - self.executions / self.calls if self.calls else 0.0
+
+class AsyncSingleFlight(SingleFlight):
+    """Coalesces concurrent calls with the same key (asyncio version)"""
+
+    async def do(self, key, function):
+        """
+        Await function(), or the identical call already running
+
+        Args:
+            key (hashable): Identifies identical calls
+            function (callable): Returns the awaitable to run when no call is in flight
+
+        Returns:
+            The awaited result, shared by every coalesced caller
+        """
+        self.calls += 1
+        future = self.in_flight.get(key)
+        if future is not None:
+            # shield() so one cancelled waiter does not cancel the others
+            return await asyncio.shield(future)
+
+        self.executions += 1
+        future = self.in_flight[key] = asyncio.ensure_future(function())
+        # Forget the call once it finishes, even if the caller that started it was cancelled
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        """Drop a finished call unless a newer one already replaced it"""
+        if self.in_flight.get(key) is future:
+            del self.in_flight[key]
+
+def render_metrics(extra_labels=()):
+    """
+    Prometheus text lines for every coalescing group in this process
+
+    Args:
+        extra_labels (list): (name, value) pairs added to every series
+
+    Returns:
+        list: Text lines for calls, executions and collapse ratio per group
+    """
+    groups = sorted(_groups.values(), key=lambda group: group.name)
+    series = [
+        ('singleflight_calls_total', 'counter', 'Calls made to a coalescing group',
+         lambda group: group.calls),
+        ('singleflight_executions_total', 'counter', 'Computations actually run by a coalescing group',
+         lambda group: group.executions),
+        ('singleflight_collapse_ratio', 'gauge', "Share of calls served by another call's computation",
+         lambda group: round(group.collapse_ratio, 4))
+    ]
+    lines = []
+    for name, metric_type, help_text, value in series:
+        lines.extend([f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}'])
+        for group in groups:
+            lines.append(f"{name}{format_labels(('group',), (group.name,), extra_labels)} {value(group)}")
+    return lines
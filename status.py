@@ -0,0 +1,106 @@
+"""
+System Status for Restaurant Reservation System
+MIT400 Assessment 2
+
+The customer portal shows "🟢 Online" from a poll every open tab makes.
+GET /api/status answers that poll from a cached database liveness probe
+instead of running a query per request:
+
+    - DatabaseProbe.refresh runs SELECT 1 on a pooled connection, never
+      touching the reservation tables
+    - each worker refreshes its probe every STATUS_PROBE_INTERVAL_SECONDS
+      from the scheduler (a worker job, not leader only); where no
+      scheduler thread runs, the first request after the interval
+      refreshes it instead, so a worker probes at most once per interval
+      however many tabs are polling
+    - the response tells the page how often to poll (STATUS_POLL_SECONDS),
+      and the page adds jitter so tabs opened together do not stay in step
+"""
+
+import threading
+import time as time_module
+from datetime import datetime
+from models import db
+
+class DatabaseProbe:
+    """
+    Cached result of the last database liveness check
+
+    Args:
+        interval (int): Seconds a result stays fresh
+    """
+
+    def __init__(self, interval=30):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.ok = None
+        self.error = None
+        self.latency_ms = None
+        self.checked_at = None
+        self.checked_monotonic = None
+        self.probes = 0
+
+    def refresh(self):
+        """
+        Check the database now
+
+        Returns:
+            bool: True if the database answered
+        """
+        started = time_module.perf_counter()
+        try:
+            with db.engine.connect() as connection:
+                connection.exec_driver_sql('SELECT 1')
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        self.ok, self.error = ok, error
+        self.latency_ms = round((time_module.perf_counter() - started) * 1000, 2)
+        self.checked_at = datetime.utcnow()
+        self.checked_monotonic = time_module.monotonic()
+        self.probes += 1
+        return ok
+
+    def is_stale(self):
+        """True if the last result is older than the interval"""
+        return self.checked_monotonic is None or time_module.monotonic() - self.checked_monotonic >= self.interval
+
+    def snapshot(self):
+        """
+        The cached result, refreshing it first if it is out of date
+
+        Only one request refreshes a stale result; concurrent requests
+        answer from the previous one instead of queueing behind it.
+
+        Returns:
+            dict: database state, latency and check time
+        """
+        if self.is_stale() and self.lock.acquire(blocking=self.checked_monotonic is None):
+            try:
+                if self.is_stale():
+                    self.refresh()
+            finally:
+                self.lock.release()
+        return {
+            'database': 'ok' if self.ok else 'unreachable',
+            'database_latency_ms': self.latency_ms,
+            'checked_at': self.checked_at.isoformat() + 'Z' if self.checked_at else None
+        }
+
+def init_status(app):
+    """
+    Create the status probe and schedule its refresh in every worker
+
+    Args:
+        app (Flask): Application, after init_scheduler if the scheduler is enabled
+
+    Returns:
+        DatabaseProbe: Stored in app.extensions['status_probe']
+    """
+    probe = DatabaseProbe(app.config['STATUS_PROBE_INTERVAL_SECONDS'])
+    app.extensions['status_probe'] = probe
+
+    scheduler = app.extensions.get('scheduler')
+    if scheduler is not None:
+        scheduler.add_job('probe_database', probe.interval, probe.refresh, leader_only=False)
+    return probe
@@ -0,0 +1,231 @@
+"""
+Table Assignment Optimizer for Restaurant Reservation System
+MIT400 Assessment 2
+
+Bookings take the smallest table that fits at the moment they are made.
+Cancellations, waitlist promotions and tables going in and out of service
+leave the evening fragmented - a couple on a 6-top while the 2-top next
+to it sits empty - and large parties get turned away although the seats
+exist.
+
+optimize_day re-assigns the not-yet-seated reservations of a day. Each
+slot is solved on its own: parties are seated largest first, each at the
+smallest free table that fits them (best fit decreasing). Because a
+table fits a party exactly when its capacity is at least the party size,
+this places every party that any assignment could place, and leaves the
+largest possible tables free for walk-ins, new bookings and the
+waitlist. Among tables of equal size a reservation keeps its current
+one, or else takes one nobody is sitting at, so few reservations move.
+
+The whole day is read in two queries and solved in memory, so a full
+service day takes milliseconds. Every proposed assignment is checked for
+conflicts before anything is written, and moves are applied in one
+transaction that fails if any of the reservations changed meanwhile.
+
+Run from the admin dashboard (POST /api/admin/optimize-tables) or by the
+scheduler for today and the next OPTIMIZE_AHEAD_DAYS days.
+"""
+
+import bisect
+import time as time_module
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from models import db, Table, Reservation, ACTIVE_RESERVATION_STATUSES, record_event
+from waitlist import is_upcoming, promote_waitlist
+
+def assign_slot(parties, free_tables):
+    """
+    Seat parties at tables for one slot, largest party first
+
+    Args:
+        parties (list): (reservation_id, party_size, current_table_id) tuples
+        free_tables (list): (capacity, table_id) tuples of usable tables
+
+    Returns:
+        tuple: ({reservation_id: table_id}, [reservation_id that could not be seated])
+    """
+    free = sorted(free_tables)
+    occupied = {current_table_id for _, _, current_table_id in parties}
+    capacities = [capacity for capacity, _ in free]
+    assignment = {}
+    unplaced = []
+
+    # Among parties of one size, those already at the smallest tables pick
+    # first, so they keep their tables
+    current_capacity = {table_id: capacity for capacity, table_id in free_tables}
+    order = sorted(parties, key=lambda party: (-party[1], current_capacity.get(party[2], float('inf')), party[0]))
+
+    for reservation_id, party_size, current_table_id in order:
+        index = bisect.bisect_left(capacities, party_size)
+        if index == len(free):
+            unplaced.append(reservation_id)
+            continue
+        # Tables of the same size are interchangeable: keep the current one
+        # if free, else prefer one no other party is sitting at, so fewer
+        # reservations move
+        end = bisect.bisect_right(capacities, capacities[index])
+        same_size = range(index, end)
+        index = next((candidate for candidate in same_size if free[candidate][1] == current_table_id),
+                     next((candidate for candidate in same_size if free[candidate][1] not in occupied), index))
+        assignment[reservation_id] = free[index][1]
+        del free[index]
+        del capacities[index]
+
+    return assignment, unplaced
+
+def find_conflicts(assignments, parties_by_id, tables_by_id):
+    """
+    Check proposed assignments before they are written
+
+    Args:
+        assignments (dict): {slot: {reservation_id: table_id}}
+        parties_by_id (dict): {reservation_id: party_size}
+        tables_by_id (dict): {table_id: Table}
+
+    Returns:
+        list: Human-readable conflicts, empty if the assignments are valid
+    """
+    conflicts = []
+    for slot, assignment in assignments.items():
+        seen = {}
+        for reservation_id, table_id in assignment.items():
+            table = tables_by_id.get(table_id)
+            if table is None or table.status != 'available':
+                conflicts.append(f'Reservation {reservation_id} assigned to unavailable table {table_id}')
+            elif table.capacity < parties_by_id[reservation_id]:
+                conflicts.append(f'Reservation {reservation_id} does not fit table {table_id}')
+            if table_id in seen:
+                conflicts.append(f'Table {table_id} assigned to reservations {seen[table_id]} and '
+                                 f'{reservation_id} at {slot.strftime("%H:%M")}')
+            seen[table_id] = reservation_id
+    return conflicts
+
+def _apply_moves(moves, session):
+    """
+    Write table moves in one transaction
+
+    Tables are swapped within a slot, so a move would briefly collide with
+    uq_reservations_active_slot. Moved rows are first taken out of the
+    index (status 'cancelled' inside the transaction, never visible to
+    other connections), then given their new table and original status.
+
+    Args:
+        moves (list): (reservation_id, old_table_id, new_table_id, status) tuples
+        session (Session): Session to write with
+
+    Returns:
+        bool: False (and nothing written) if a reservation changed since it was
+            read or a target table has been booked meanwhile
+    """
+    reservations = Reservation.__table__
+    now = datetime.utcnow()
+    for reservation_id, old_table_id, _, status in moves:
+        released = session.execute(reservations.update().where(
+            reservations.c.reservation_id == reservation_id,
+            reservations.c.table_id == old_table_id,
+            reservations.c.status == status
+        ).values(status='cancelled')).rowcount
+        if not released:
+            session.rollback()
+            return False
+    try:
+        for reservation_id, old_table_id, new_table_id, status in moves:
+            session.execute(reservations.update().where(reservations.c.reservation_id == reservation_id)
+                            .values(table_id=new_table_id, status=status, updated_at=now))
+            record_event(session, 'reservation.moved', reservation_id, {
+                'reservation_id': reservation_id, 'table_id': new_table_id,
+                'previous_table_id': old_table_id, 'status': status})
+        session.commit()
+    except IntegrityError:
+        # A target table was booked after the day was read
+        session.rollback()
+        return False
+    return True
+
+def optimize_day(service_date, apply=True, session=None, holds=None, now=None):
+    """
+    Re-assign a day's upcoming reservations to free up the largest tables
+
+    Args:
+        service_date (date): Day to optimize
+        apply (bool): Write the moves; False only reports them
+        session (Session, optional): Session to use, defaults to db.session
+        holds (optional): Hold store from holds.py; held tables are left alone
+        now (datetime, optional): Current local time, defaults to datetime.now()
+
+    Returns:
+        dict: Summary with the moves, wasted seats before and after, any
+              reservations that could not be seated and any conflicts
+    """
+    session = session if session is not None else db.session
+    started = time_module.perf_counter()
+
+    tables_by_id = {table.table_id: table for table in session.scalars(db.select(Table))}
+    usable_tables = [(table.capacity, table.table_id) for table in tables_by_id.values() if table.status == 'available']
+
+    rows = session.execute(db.select(
+        Reservation.reservation_id, Reservation.reservation_time, Reservation.party_size,
+        Reservation.table_id, Reservation.status
+    ).where(
+        Reservation.reservation_date == service_date,
+        Reservation.status.in_(ACTIVE_RESERVATION_STATUSES)
+    )).all()
+
+    # Slots already under way are seated and left as they are
+    slots = defaultdict(list)
+    for row in rows:
+        if is_upcoming(service_date, row.reservation_time, now):
+            slots[row.reservation_time].append(row)
+
+    assignments = {}
+    unplaced = []
+    moves = []
+    wasted_before = wasted_after = 0
+    for slot_time, slot_rows in sorted(slots.items()):
+        held_tables = holds.held_tables(service_date, slot_time) if holds is not None else set()
+        free_tables = [table for table in usable_tables if table[1] not in held_tables]
+        assignment, slot_unplaced = assign_slot(
+            [(row.reservation_id, row.party_size, row.table_id) for row in slot_rows], free_tables)
+
+        if slot_unplaced:
+            # Not even the best assignment seats everyone; leave the slot alone
+            unplaced.extend(slot_unplaced)
+            continue
+
+        assignments[slot_time] = assignment
+        for row in slot_rows:
+            wasted_before += tables_by_id[row.table_id].capacity - row.party_size
+            wasted_after += tables_by_id[assignment[row.reservation_id]].capacity - row.party_size
+            if assignment[row.reservation_id] != row.table_id:
+                moves.append((row.reservation_id, row.table_id, assignment[row.reservation_id], row.status))
+
+    parties_by_id = {row.reservation_id: row.party_size for row in rows}
+    conflicts = find_conflicts(assignments, parties_by_id, tables_by_id)
+
+    applied = False
+    if apply and moves and not conflicts:
+        applied = _apply_moves(moves, session)
+        if not applied:
+            conflicts.append('Reservations changed during optimization; nothing was moved')
+
+    if applied:
+        # Tables given up by moved reservations may suit someone on the waitlist
+        times_by_id = {row.reservation_id: row.reservation_time for row in rows}
+        for reservation_id, old_table_id, _, _ in moves:
+            slot_time = times_by_id[reservation_id]
+            if old_table_id not in assignments[slot_time].values():
+                promote_waitlist(old_table_id, service_date, slot_time, session=session, holds=holds)
+
+    return {
+        'date': service_date.isoformat(),
+        'reservations': sum(len(slot_rows) for slot_rows in slots.values()),
+        'moves': [{'reservation_id': reservation_id, 'from_table_id': old_table_id, 'to_table_id': new_table_id}
+                  for reservation_id, old_table_id, new_table_id, _ in moves],
+        'wasted_seats_before': wasted_before,
+        'wasted_seats_after': wasted_after,
+        'unplaced': unplaced,
+        'conflicts': conflicts,
+        'applied': applied,
+        'elapsed_ms': round((time_module.perf_counter() - started) * 1000, 2)
+    }
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Multi-Restaurant Tenancy for Restaurant Reservation System
+MIT400 Assessment 2
+
+Each location is a tenant with its own database. The tenant of a request
+is resolved before Flask sees it:
+
+    - a /t/<tenant>/ path prefix, which moves into SCRIPT_NAME so url_for
+      keeps generating links inside the tenant
+    - otherwise the host name: an explicit TENANT_HOSTS entry, or a first
+      label matching a tenant id (harbour.example.com -> harbour)
+    - otherwise the default tenant, the database in SQLALCHEMY_DATABASE_URI
+
+db.session picks its engine per request from the EngineRegistry, which
+creates one engine per tenant on first use. Every tenant pool is bounded
+(TENANT_POOL_SIZE + TENANT_MAX_OVERFLOW connections, TENANT_POOL_TIMEOUT
+seconds to wait), so a location that exhausts its pool queues only its own
+requests.
+
+Cross-tenant admin reports run once per tenant on a thread each and are
+merged; a tenant that has not answered within TENANT_REPORT_TIMEOUT
+seconds is reported as timed out instead of holding up the others.
+Leader-only scheduled jobs run against every tenant in turn.
+
+With TENANT_DATABASES empty none of this is installed and the application
+serves the default database only.
+
+Usage:
+    python tenancy.py              # list tenants and check their databases
+    python tenancy.py --create     # create the schema in every tenant database
+"""
+
+import argparse
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+DEFAULT_TENANT = 'default'
+
+# Path prefix selecting a tenant: /t/<tenant>/...
+PATH_PREFIX = '/t/'
+
+# WSGI environ key the middleware stores the resolved tenant under
+ENVIRON_KEY = 'restaurant.tenant'
+
+TENANT_ID_PATTERN = re.compile(r'^[a-z0-9][a-z0-9-]*$')
+
+def parse_tenant_setting(value):
+    """
+    Parse an 'id=value;id=value' setting
+
+    Args:
+        value (str): Setting from the environment
+
+    Returns:
+        dict: Values by tenant id (or host name for TENANT_HOSTS)
+    """
+    pairs = {}
+    for item in (value or '').split(';'):
+        if item.strip():
+            key, _, setting = item.partition('=')
+            pairs[key.strip().lower()] = setting.strip()
+    return pairs
+
+def current_tenant():
+    """
+    Tenant of the current request or tenant context
+
+    Returns:
+        str: Tenant id, DEFAULT_TENANT outside any tenant
+    """
+    if has_app_context() and g.get('tenant'):
+        return g.tenant
+    if has_request_context():
+        return request.environ.get(ENVIRON_KEY, DEFAULT_TENANT)
+    return DEFAULT_TENANT
+
+@contextmanager
+def tenant_context(app, tenant):
+    """
+    App context whose db.session uses a tenant's database
+
+    Args:
+        app (Flask): Application
+        tenant (str): Tenant id
+    """
+    with app.app_context():
+        g.tenant = tenant
+        yield
+
+class TenantSession(Session):
+    """db.session class that binds to the current tenant's engine"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            tenancy = current_app.extensions.get('tenancy')
+            tenant = current_tenant()
+            if tenancy is not None and tenant != DEFAULT_TENANT:
+                return tenancy.registry.engine(tenant)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class EngineRegistry:
+    """
+    One bounded engine per tenant database, created on first use
+
+    Args:
+        databases (dict): Database URL by tenant id
+        engine_options (dict): Options for every engine (pool_pre_ping, ...)
+        pool_size (int): Connections kept open per tenant
+        max_overflow (int): Extra connections a tenant may open under load
+        pool_timeout (int): Seconds a request waits for a tenant connection
+    """
+
+    def __init__(self, databases, engine_options=None, pool_size=5, max_overflow=5, pool_timeout=10):
+        self.databases = databases
+        self.engine_options = dict(engine_options or {})
+        self.pool_options = {'pool_size': pool_size, 'max_overflow': max_overflow, 'pool_timeout': pool_timeout}
+        self.engines = {}
+        self.lock = threading.Lock()
+
+    def engine(self, tenant):
+        """
+        Engine of a tenant
+
+        Raises:
+            KeyError: Unknown tenant
+        """
+        engine = self.engines.get(tenant)
+        if engine is None:
+            with self.lock:
+                engine = self.engines.get(tenant)
+                if engine is None:
+                    url = make_url(self.databases[tenant])
+                    options = dict(self.engine_options)
+                    # In-memory SQLite uses a single-connection pool without these settings
+                    if not (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')):
+                        options.update(self.pool_options)
+                    engine = self.engines[tenant] = create_engine(url, **options)
+        return engine
+
+    def dispose(self, close=True):
+        """Drop every pooled connection, e.g. after a fork"""
+        for engine in list(self.engines.values()):
+            engine.dispose(close=close)
+
+    def render_metrics(self, extra_labels=()):
+        """Prometheus text lines for the connections each tenant pool holds"""
+        from metrics import format_labels
+
+        lines = ['# HELP tenant_pool_checked_out Connections in use from a tenant pool',
+                 '# TYPE tenant_pool_checked_out gauge']
+        for tenant, engine in sorted(self.engines.items()):
+            checked_out = getattr(engine.pool, 'checkedout', lambda: 0)()
+            lines.append(f"tenant_pool_checked_out{format_labels(('tenant',), (tenant,), extra_labels)} {checked_out}")
+        return lines
+
+class TenantMiddleware:
+    """
+    WSGI middleware storing the tenant of each request in the environ
+
+    Args:
+        wsgi_app (callable): Wrapped WSGI application
+        tenants (iterable): Tenant ids other than the default
+        hosts (dict): Tenant id by host name
+    """
+
+    def __init__(self, wsgi_app, tenants, hosts=None):
+        self.wsgi_app = wsgi_app
+        self.tenants = set(tenants)
+        self.hosts = hosts or {}
+
+    def resolve(self, environ):
+        """Resolve the tenant, moving a tenant path prefix into SCRIPT_NAME"""
+        path = environ.get('PATH_INFO', '')
+        if path.startswith(PATH_PREFIX):
+            tenant, _, rest = path[len(PATH_PREFIX):].partition('/')
+            if tenant in self.tenants:
+                environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + PATH_PREFIX + tenant
+                environ['PATH_INFO'] = '/' + rest
+                return tenant
+
+        host = (environ.get('HTTP_HOST') or environ.get('SERVER_NAME', '')).split(':')[0].lower()
+        if host in self.hosts:
+            return self.hosts[host]
+        label = host.split('.')[0]
+        return label if label in self.tenants else DEFAULT_TENANT
+
+    def __call__(self, environ, start_response):
+        environ[ENVIRON_KEY] = self.resolve(environ)
+        return self.wsgi_app(environ, start_response)
+
+class Tenancy:
+    """
+    Tenants of an application and the engines serving them
+
+    Args:
+        app (Flask): Application
+        registry (EngineRegistry): Engines of the non-default tenants
+        names (dict): Restaurant name by tenant id
+    """
+
+    def __init__(self, app, registry, names=None):
+        self.app = app
+        self.registry = registry
+        self.names = names or {}
+        self.middleware = None   # TenantMiddleware installed by init_tenancy
+
+    @property
+    def tenants(self):
+        """Every tenant id, the default first"""
+        return [DEFAULT_TENANT] + sorted(self.registry.databases)
+
+    def restaurant_name(self, tenant=None):
+        """Display name of a tenant"""
+        tenant = tenant or current_tenant()
+        return self.names.get(tenant) or self.app.config.get('RESTAURANT_NAME', 'Bella Vista Restaurant')
+
+    def _run(self, tenant, function):
+        with tenant_context(self.app, tenant):
+            return function()
+
+    def fan_out(self, function, timeout=None, workers=None):
+        """
+        Run a function once per tenant in parallel
+
+        Each call runs on its own thread in a tenant context, so it sees
+        that tenant's db.session. Calls still running after the timeout
+        are reported as timed out and left to finish in the background.
+
+        Args:
+            function (callable): Called without arguments, returns the tenant's result
+            timeout (float, optional): Seconds to wait, TENANT_REPORT_TIMEOUT by default
+            workers (int, optional): Threads, TENANT_REPORT_WORKERS by default
+
+        Returns:
+            dict: Result by tenant id, or {'error': message} for a failed tenant
+        """
+        timeout = timeout if timeout is not None else self.app.config.get('TENANT_REPORT_TIMEOUT', 10)
+        workers = workers or self.app.config.get('TENANT_REPORT_WORKERS', 8)
+        tenants = self.tenants
+        executor = ThreadPoolExecutor(max_workers=min(workers, len(tenants)), thread_name_prefix='tenant-report')
+        futures = {tenant: executor.submit(self._run, tenant, function) for tenant in tenants}
+        done, _ = wait(futures.values(), timeout=timeout)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        results = {}
+        for tenant, future in futures.items():
+            if future not in done:
+                results[tenant] = {'error': f'no answer within {timeout:g}s'}
+            elif future.exception() is not None:
+                results[tenant] = {'error': str(future.exception())}
+            else:
+                results[tenant] = future.result()
+        return results
+
+    def for_each_tenant(self, function):
+        """
+        Wrap a scheduled job so it runs against every tenant in turn
+
+        Returns:
+            callable: Returns the non-empty results by tenant id
+        """
+        def run_for_each_tenant():
+            results = {}
+            for tenant in self.tenants:
+                try:
+                    result = self._run(tenant, function)
+                except Exception:
+                    self.app.logger.exception(f"Scheduled job failed for tenant {tenant}")
+                    continue
+                if result:
+                    results[tenant] = result
+            return results
+        return run_for_each_tenant
+
+    def scoped(self, factory):
+        """
+        Per-tenant instances of an in-memory component, e.g. the hold store
+
+        Args:
+            factory (callable): Takes a tenant id, returns that tenant's instance
+
+        Returns:
+            TenantScoped: Proxy forwarding to the current tenant's instance
+        """
+        return TenantScoped(factory)
+
+class TenantScoped:
+    """Forwards attribute access to the current tenant's instance"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def for_tenant(self, tenant):
+        """Instance of a tenant, created on first use"""
+        instance = self._instances.get(tenant)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.setdefault(tenant, self._factory(tenant))
+        return instance
+
+    def __getattr__(self, name):
+        return getattr(self.for_tenant(current_tenant()), name)
+
+def merge_reports(results):
+    """
+    Add up the numeric fields of per-tenant reports
+
+    Args:
+        results (dict): Report by tenant id, from Tenancy.fan_out
+
+    Returns:
+        dict: Totals over the tenants that answered
+    """
+    totals = {}
+    for report in results.values():
+        if 'error' in report:
+            continue
+        for key, value in report.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                totals[key] = totals.get(key, 0) + value
+    return totals
+
+def init_tenancy(app):
+    """
+    Install tenancy if TENANT_DATABASES lists any tenants
+
+    Args:
+        app (Flask): Application, right after db.init_app
+
+    Returns:
+        Tenancy: Stored in app.extensions['tenancy'], or None without tenants
+    """
+    databases = parse_tenant_setting(app.config.get('TENANT_DATABASES'))
+    if not databases:
+        return None
+    for tenant in databases:
+        if tenant == DEFAULT_TENANT or not TENANT_ID_PATTERN.match(tenant):
+            raise ValueError(f"Invalid tenant id {tenant!r}: use lowercase letters, digits and '-', not 'default'")
+
+    hosts = parse_tenant_setting(app.config.get('TENANT_HOSTS'))
+    unknown = set(hosts.values()) - set(databases) - {DEFAULT_TENANT}
+    if unknown:
+        raise ValueError(f"TENANT_HOSTS refers to unknown tenants: {', '.join(sorted(unknown))}")
+
+    registry = EngineRegistry(
+        databases, app.config.get('SQLALCHEMY_ENGINE_OPTIONS'),
+        pool_size=app.config['TENANT_POOL_SIZE'], max_overflow=app.config['TENANT_MAX_OVERFLOW'],
+        pool_timeout=app.config['TENANT_POOL_TIMEOUT'])
+    tenancy = Tenancy(app, registry, parse_tenant_setting(app.config.get('TENANT_NAMES')))
+    app.extensions['tenancy'] = tenancy
+    tenancy.middleware = app.wsgi_app = TenantMiddleware(app.wsgi_app, databases, hosts)
+    return tenancy
+
+def create_schemas(app, log=None):
+    """
+    Create the tables in every tenant database that lacks them
+
+    Args:
+        app (Flask): Application with tenancy installed
+        log (callable, optional): Receives progress messages
+    """
+    from models import db
+
+    log = log or (lambda message: None)
+    tenancy = app.extensions['tenancy']
+    for tenant in tenancy.tenants:
+        with tenant_context(app, tenant):
+            db.metadata.create_all(db.session.get_bind())
+        log(f"  ✓ {tenant}: schema ready")
+
+def main():
+    """Main tenancy command"""
+    parser = argparse.ArgumentParser(description='List the tenants and prepare their databases')
+    parser.add_argument('--create', action='store_true', help='create the schema in every tenant database')
+    args = parser.parse_args()
+
+    from app import create_app
+    from models import db
+
+    app = create_app('production')
+    tenancy = app.extensions.get('tenancy')
+    print("🏢 Restaurant Reservation System - Tenants")
+    if tenancy is None:
+        print("No tenants configured (TENANT_DATABASES is empty); serving the default database only")
+        return
+
+    if args.create:
+        create_schemas(app, log=print)
+
+    def check():
+        with db.session.get_bind().connect() as connection:
+            connection.exec_driver_sql('SELECT 1')
+        return {'ok': True}
+
+    for tenant, result in tenancy.fan_out(check).items():
+        state = '✓' if result.get('ok') else f"✗ {result.get('error')}"
+        print(f"  {tenant:<16} {tenancy.restaurant_name(tenant):<32} {state}")
+
+if __name__ == "__main__":
+    main()
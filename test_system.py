@@ -16,13 +16,61 @@ from datetime import datetime, date, time, timedelta
 from config import Config
 from models import db, Customer, Table, Reservation, User, find_available_tables, create_customer, create_reservation
 
+# Shared testing application, built once on first use
+_test_app = None
+
+def get_test_app():
+    """
+    Return the testing application, creating and seeding it on first use
+    
+    Building one app for the whole run keeps the in-memory database (and
+    its sample data) alive between tests instead of paying for a new app
+    and engine in every test function.
+    """
+    global _test_app
+    if _test_app is None:
+        from app import create_app
+        _test_app = create_app('testing')
+        
+        with _test_app.app_context():
+            db.create_all()
+            seed_sample_data()
+    
+    return _test_app
+
+def seed_sample_data():
+    """Insert the sample tables, users and customers from database_schema.sql"""
+    for table_number, capacity, status, location in [
+        (1, 2, 'available', 'Window Side'),
+        (2, 4, 'available', 'Center'),
+        (3, 6, 'available', 'Private Corner'),
+        (4, 4, 'available', 'Garden View'),
+        (5, 8, 'available', 'Large Group Area'),
+        (6, 2, 'available', 'Bar Area'),
+        (7, 4, 'maintenance', 'Center'),
+        (8, 6, 'available', 'VIP Section')
+    ]:
+        db.session.add(Table(table_number=table_number, capacity=capacity, status=status, location=location))
+    
+    admin = User(username='admin', role='admin', email='admin@bellavista.com')
+    admin.set_password('admin123')
+    db.session.add(admin)
+    
+    for first_name, last_name, phone, email in [
+        ('John', 'Smith', '+1 (555) 123-4567', 'john.smith@email.com'),
+        ('Sarah', 'Johnson', '+44 20 7946 0958', 'sarah.johnson@email.com'),
+        ('Mike', 'Davis', '+1 (555) 456-7890', 'mike.davis@email.com')
+    ]:
+        db.session.add(Customer(first_name=first_name, last_name=last_name, phone=phone, email=email))
+    
+    db.session.commit()
+
 def test_database_connection():
     """Test database connection"""
     print("🔗 Testing database connection...")
     
     try:
-        from app import create_app
-        app = create_app('testing')
+        app = get_test_app()
         
         with app.app_context():
             # Test basic database query
@@ -48,8 +96,7 @@ def test_table_availability():
     print("\n🪑 Testing table availability...")
     
     try:
-        from app import create_app
-        app = create_app('testing')
+        app = get_test_app()
         
         with app.app_context():
             # Test date and time
@@ -74,8 +121,7 @@ def test_customer_creation():
     print("\n👤 Testing customer creation...")
     
     try:
-        from app import create_app
-        app = create_app('testing')
+        app = get_test_app()
         
         with app.app_context():
             # Create test customer
@@ -105,8 +151,7 @@ def test_reservation_creation():
     print("\n📅 Testing reservation creation...")
     
     try:
-        from app import create_app
-        app = create_app('testing')
+        app = get_test_app()
         
         with app.app_context():
             # Get first available customer and table
@@ -152,13 +197,78 @@ def test_reservation_creation():
         print(f"✗ Reservation creation test failed: {e}")
         return False
 
+def test_active_slot_constraint():
+    """Test that only active reservations hold a table's slot"""
+    print("\n🔒 Testing active slot uniqueness...")
+    
+    try:
+        from sqlalchemy.exc import IntegrityError
+        app = get_test_app()
+        
+        with app.app_context():
+            customer = Customer.query.first()
+            test_date = date.today() + timedelta(days=3)
+            test_time = time(20, 30)
+            table = find_available_tables(test_date, test_time, 2)[0]
+            
+            def insert_booking():
+                db.session.add(Reservation(customer_id=customer.customer_id, table_id=table.table_id,
+                                           reservation_date=test_date, reservation_time=test_time,
+                                           party_size=2, status='confirmed'))
+                db.session.commit()
+            
+            insert_booking()
+            
+            # A second active booking for the slot is rejected by the database
+            try:
+                insert_booking()
+                print("✗ Database accepted a double booking")
+                return False
+            except IntegrityError:
+                db.session.rollback()
+            
+            # Once cancelled, the slot can be booked again
+            booked = Reservation.query.filter_by(table_id=table.table_id, reservation_date=test_date,
+                                                 reservation_time=test_time).one()
+            booked.cancel()
+            db.session.commit()
+            insert_booking()
+            
+            # A booking whose first choice was taken after its lookup (a lost
+            # race) lands on the next suitable table instead of failing
+            import booking
+            race_time = time(21, 0)
+            stale = find_available_tables(test_date, race_time, 2)
+            db.session.add(Reservation(customer_id=customer.customer_id, table_id=stale[0].table_id,
+                                       reservation_date=test_date, reservation_time=race_time,
+                                       party_size=2, status='pending'))
+            db.session.commit()
+            fields, _ = booking.parse_reservation_request({
+                'first_name': 'Race', 'last_name': 'Lost', 'phone': '555-RACE',
+                'date': test_date.isoformat(), 'time': '21:00', 'party_size': 2})
+            lookup = booking.find_available_tables
+            booking.find_available_tables = lambda *args, **kwargs: stale
+            try:
+                body, status = booking.book_reservation(fields)
+            finally:
+                booking.find_available_tables = lookup
+            if status != 201 or body['reservation']['table_id'] != stale[1].table_id:
+                print(f"✗ Lost race not retried on the next table ({status})")
+                return False
+            
+            print("✓ Double booking rejected, cancelled slot bookable again, lost race retried")
+            return True
+            
+    except Exception as e:
+        print(f"✗ Active slot test failed: {e}")
+        return False
+
 def test_user_authentication():
     """Test user authentication"""
     print("\n🔐 Testing user authentication...")
     
     try:
-        from app import create_app
-        app = create_app('testing')
+        app = get_test_app()
         
         with app.app_context():
             # Test admin user
@@ -191,8 +301,7 @@ def test_business_logic():
     print("\n🧠 Testing business logic...")
     
     try:
-        from app import create_app
-        app = create_app('testing')
+        app = get_test_app()
         
         with app.app_context():
             # Test 1: Cannot double-book a table
@@ -242,6 +351,1266 @@ def test_business_logic():
         print(f"✗ Business logic test failed: {e}")
         return False
 
+def test_metrics_endpoint():
+    """Test request and SQL metrics at /metrics"""
+    print("\n📈 Testing metrics endpoint...")
+    
+    try:
+        app = get_test_app()
+        client = app.test_client()
+        
+        test_date = (date.today() + timedelta(days=1)).isoformat()
+        client.get('/api/tables/available', query_string={'date': test_date, 'time': '19:00', 'party_size': 2})
+        client.get('/api/stats')
+        
+        body = client.get('/metrics').get_data(as_text=True)
+        expected_lines = [
+            'http_requests_total{pid=',
+            'endpoint="get_available_tables",method="GET",status="200"',
+            'http_request_duration_seconds_bucket{',
+            'http_request_sql_statements_count{',
+            'http_request_sql_duration_seconds_sum{'
+        ]
+        missing = [line for line in expected_lines if line not in body]
+        
+        if missing:
+            print(f"✗ Metrics output is missing: {missing}")
+            return False
+        
+        # A failing statement leaves no start time behind on its pooled connection
+        from sqlalchemy.exc import OperationalError
+        with app.app_context():
+            with db.engine.connect() as connection:
+                try:
+                    connection.exec_driver_sql('SELECT * FROM no_such_table')
+                except OperationalError:
+                    pass
+                if connection.info.get('metrics_query_start'):
+                    print("✗ Failed statement left its start time on the connection")
+                    return False
+        
+        print("✓ Metrics endpoint reports latency and SQL statistics")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Metrics test failed: {e}")
+        return False
+
+def test_asgi_metrics():
+    """Test that requests served by the async handlers in asgi.py reach /metrics"""
+    print("\n⚡ Testing ASGI request metrics...")
+    
+    try:
+        import tempfile
+        from starlette.testclient import TestClient
+        from config import config, TestingConfig
+        from app import create_app
+        from asgi import create_asgi_app
+        
+        # aiosqlite cannot share the in-memory test database, so use a file
+        temp_dir = tempfile.mkdtemp()
+        config['asgi_testing'] = type('AsgiTestingConfig', (TestingConfig,), {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(temp_dir, 'asgi.db')}",
+            'QUERY_BUDGET': None, 'QUERY_REPEAT_LIMIT': None
+        })
+        flask_app = create_app('asgi_testing')
+        with flask_app.app_context():
+            db.create_all()
+            db.session.add(Table(table_number=1, capacity=4, location='Center'))
+            db.session.commit()
+        
+        test_date = (date.today() + timedelta(days=1)).isoformat()
+        with TestClient(create_asgi_app(flask_app)) as client:
+            client.get('/api/tables/available', params={'date': test_date, 'time': '19:00', 'party_size': 2})
+            client.get('/api/tables/available', params={'date': test_date})
+            client.get('/api/stats')
+            body = client.get('/metrics').text
+        
+        expected_lines = [
+            'endpoint="get_available_tables",method="GET",status="200"} 1',
+            'endpoint="get_available_tables",method="GET",status="400"} 1',
+            'endpoint="get_stats",method="GET",status="200"} 1'
+        ]
+        missing = [line for line in expected_lines if line not in body]
+        if missing:
+            print(f"✗ ASGI requests missing from /metrics: {missing}")
+            return False
+        
+        # SQL run by the async session is counted for the request that ran it
+        statements = flask_app.extensions['metrics'].sql_statements.values[('get_available_tables',)]
+        if statements[1] < 1:
+            print("✗ SQL statements of ASGI requests were not counted")
+            return False
+        
+        print(f"✓ ASGI requests recorded under their Flask endpoint names ({statements[1]:.0f} SQL statements)")
+        return True
+        
+    except Exception as e:
+        print(f"✗ ASGI metrics test failed: {e}")
+        return False
+
+def test_availability_coalescing():
+    """Test that concurrent identical availability lookups share one computation"""
+    print("\n🔀 Testing availability request coalescing...")
+    
+    try:
+        import threading
+        from singleflight import SingleFlight
+        
+        flight = SingleFlight('test')
+        callers = 8
+        arrived = threading.Barrier(callers)
+        release = threading.Event()
+        results = []
+        
+        def lookup():
+            release.wait(timeout=5)
+            return [{'table_id': 1}]
+        
+        def call():
+            arrived.wait(timeout=5)
+            results.append(flight.do(('2030-01-01', '19:00', 2), lookup))
+        
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        # Give every caller time to join the in-flight lookup before it finishes
+        while flight.calls < callers:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        
+        if flight.executions != 1 or len(results) != callers or any(r is not results[0] for r in results):
+            print(f"✗ {callers} identical calls ran {flight.executions} lookups")
+            return False
+        
+        body = get_test_app().test_client().get('/metrics').get_data(as_text=True)
+        if 'singleflight_collapse_ratio{pid=' not in body:
+            print("✗ Collapse ratio missing from /metrics")
+            return False
+        
+        print(f"✓ {callers} identical calls shared one lookup (collapse ratio {flight.collapse_ratio:.2f})")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Coalescing test failed: {e}")
+        return False
+
+def test_reservation_archival():
+    """Test archiving old reservations and finding them through admin search"""
+    print("\n🗄  Testing reservation archival...")
+    
+    try:
+        from archive import archive_reservations
+        from models import ArchivedReservation
+        
+        app = get_test_app()
+        
+        with app.app_context():
+            customer = Customer.query.first()
+            last_name = customer.last_name
+            table = Table.query.filter_by(status='available').first()
+            retired = Table(table_number=95, capacity=2, location='Temporary')
+            db.session.add(retired)
+            db.session.flush()
+            retired_id = retired.table_id
+            old_date = date.today() - timedelta(days=400)
+            old_reservation = Reservation(customer_id=customer.customer_id, table_id=table.table_id,
+                                          reservation_date=old_date, reservation_time=time(19, 0),
+                                          party_size=2, status='completed')
+            retired_reservation = Reservation(customer_id=customer.customer_id, table_id=retired_id,
+                                              reservation_date=old_date, reservation_time=time(20, 0),
+                                              party_size=2, status='completed')
+            recent_reservation = Reservation(customer_id=customer.customer_id, table_id=table.table_id,
+                                             reservation_date=date.today() + timedelta(days=6),
+                                             reservation_time=time(19, 0), party_size=2)
+            db.session.add_all([old_reservation, retired_reservation, recent_reservation])
+            db.session.commit()
+            old_id = old_reservation.reservation_id
+            retired_reservation_id = retired_reservation.reservation_id
+            
+            archived = archive_reservations(db.engine, date.today() - timedelta(days=app.config['RESERVATION_RETENTION_DAYS']))
+            db.session.expire_all()
+            
+            if archived < 1 or db.session.get(Reservation, old_id) or not db.session.get(ArchivedReservation, old_id):
+                print("✗ Old reservation was not moved to the archive")
+                return False
+            if db.session.get(Reservation, recent_reservation.reservation_id) is None:
+                print("✗ Recent reservation was archived")
+                return False
+        
+        client = app.test_client()
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+        results = client.get('/api/reservations/search', query_string={'date': old_date.isoformat()}).get_json()
+        
+        if not any(r['reservation_id'] == old_id and r['archived'] for r in results['reservations']):
+            print("✗ Archived reservation missing from admin search")
+            return False
+        
+        # History outlives the table it was booked on
+        client.delete(f'/api/tables/{retired_id}')
+        results = client.get('/api/reservations/search',
+                             query_string={'q': last_name, 'date': old_date.isoformat()}).get_json()
+        client.get('/logout')
+        
+        if not any(r['reservation_id'] == retired_reservation_id and r['table'] is None
+                   for r in results['reservations']):
+            print("✗ Archived reservation on a deleted table missing from admin search")
+            return False
+        
+        print(f"✓ Archived {archived} reservation(s), still found by admin search")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Archival test failed: {e}")
+        return False
+
+def test_scheduled_housekeeping():
+    """Test the housekeeping jobs and scheduler leader election"""
+    print("\n⏰ Testing scheduled housekeeping...")
+    
+    try:
+        from housekeeping import complete_past_reservations, expire_pending_reservations
+        import time as time_module
+        from scheduler import Scheduler, acquire_lease
+        
+        app = get_test_app()
+        
+        with app.app_context():
+            customer = Customer.query.first()
+            table = Table.query.filter_by(status='available').first()
+            yesterday = date.today() - timedelta(days=1)
+            finished = Reservation(customer_id=customer.customer_id, table_id=table.table_id,
+                                   reservation_date=yesterday, reservation_time=time(18, 0),
+                                   party_size=2, status='confirmed')
+            stale = Reservation(customer_id=customer.customer_id, table_id=table.table_id,
+                                reservation_date=date.today() + timedelta(days=9), reservation_time=time(18, 0),
+                                party_size=2, created_at=datetime.utcnow() - timedelta(days=3))
+            fresh = Reservation(customer_id=customer.customer_id, table_id=table.table_id,
+                                reservation_date=date.today() + timedelta(days=9), reservation_time=time(19, 0),
+                                party_size=2)
+            db.session.add_all([finished, stale, fresh])
+            db.session.commit()
+            
+            complete_past_reservations(app.config['COMPLETE_AFTER_MINUTES'], batch_size=2)
+            # By default a pending booking for a future slot is left alone
+            expire_pending_reservations(app.config['PENDING_EXPIRY_MINUTES'], batch_size=2)
+            if stale.status != 'pending':
+                print("✗ Default pending expiry cancelled a booking for a future slot")
+                return False
+            expire_pending_reservations(24 * 60, batch_size=2)
+            
+            statuses = (finished.status, stale.status, fresh.status)
+            if statuses != ('completed', 'cancelled', 'pending'):
+                print(f"✗ Unexpected statuses after housekeeping: {statuses}")
+                return False
+            
+            # Only one holder at a time; an expired lease can be taken over
+            if not acquire_lease('test', 'worker-a', 60) or acquire_lease('test', 'worker-b', 60):
+                print("✗ Lease was not exclusive")
+                return False
+            if not acquire_lease('test', 'worker-a', -1) or not acquire_lease('test', 'worker-b', 60):
+                print("✗ Expired lease was not taken over")
+                return False
+        
+        leader_runs = []
+        scheduler = Scheduler(app, lease_name='test-scheduler')
+        scheduler.add_job('leader', 60, lambda: leader_runs.append(1))
+        scheduler.add_job('every worker', 60, lambda: None, leader_only=False)
+        follower = Scheduler(app, lease_name='test-scheduler')
+        follower.holder = 'another-host:1'
+        follower.add_job('leader', 60, lambda: leader_runs.append(2))
+        follower.add_job('every worker', 60, lambda: None, leader_only=False)
+        
+        if scheduler.run_pending() != ['leader', 'every worker'] or follower.run_pending() != ['every worker']:
+            print("✗ Leader-only job ran outside the leader")
+            return False
+        
+        # A new leader (restart, recycled worker) does not repeat a job that is not due
+        scheduler.stop()
+        if follower.run_pending() != [] or not follower.is_leader or leader_runs != [1]:
+            print("✗ New leader re-ran a job that was not due")
+            return False
+        
+        # The lease is renewed while a long leader job runs
+        def long_job():
+            time_module.sleep(1.5)
+            return acquire_lease('test-heartbeat', 'another-host:1', 1)
+        long_runner = Scheduler(app, lease_seconds=1, lease_name='test-heartbeat')
+        long_runner.add_job('long', 60, lambda: taken_over.append(long_job()))
+        taken_over = []
+        if long_runner.run_pending() != ['long'] or taken_over != [False]:
+            print("✗ Lease lapsed while a leader job was running")
+            return False
+        
+        print("✓ Past reservations completed, stale pending expired, one leader elected, job runs persisted")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Housekeeping test failed: {e}")
+        return False
+
+def test_slot_holds():
+    """Test holding a table during checkout and booking it with the hold token"""
+    print("\n⏳ Testing slot holds...")
+    
+    try:
+        app = get_test_app()
+        client = app.test_client()
+        slot = {'date': (date.today() + timedelta(days=11)).isoformat(), 'time': '18:00', 'party_size': 2}
+        
+        def available_ids():
+            response = client.get('/api/tables/available', query_string=slot).get_json()
+            return [table['table_id'] for table in response['available_tables']]
+        
+        before = available_ids()
+        response = client.post('/api/holds', json=slot)
+        if response.status_code != 201:
+            print(f"✗ Hold request returned {response.status_code}")
+            return False
+        hold = response.get_json()['hold']
+        
+        # The held table is taken for everybody else
+        if hold['table_id'] in available_ids() or len(available_ids()) != len(before) - 1:
+            print("✗ Held table still offered as available")
+            return False
+        if client.post('/api/holds', json=dict(slot, table_id=hold['table_id'])).status_code != 409:
+            print("✗ Same table held twice")
+            return False
+        
+        # Booking with the token takes exactly the held table and ends the hold
+        response = client.post('/api/reservations', json=dict(
+            slot, first_name='Hold', last_name='Test', phone='555-HOLD-01', hold_token=hold['hold_token']))
+        reservation = response.get_json().get('reservation')
+        if response.status_code != 201 or reservation['table_id'] != hold['table_id']:
+            print(f"✗ Booking with hold returned {response.status_code}")
+            return False
+        if client.delete(f"/api/holds/{hold['hold_token']}").status_code != 404:
+            print("✗ Hold still active after booking")
+            return False
+        
+        # A held table deleted during checkout falls back to the usual search
+        with app.app_context():
+            doomed = Table(table_number=97, capacity=2, location='Temporary')
+            db.session.add(doomed)
+            db.session.commit()
+            doomed_id = doomed.table_id
+        lost_hold = client.post('/api/holds', json=dict(slot, table_id=doomed_id)).get_json()['hold']
+        with app.app_context():
+            db.session.delete(db.session.get(Table, doomed_id))
+            db.session.commit()
+        response = client.post('/api/reservations', json=dict(
+            slot, first_name='Hold', last_name='Lost', phone='555-HOLD-02', hold_token=lost_hold['hold_token']))
+        if response.status_code != 201 or response.get_json()['reservation']['table_id'] == doomed_id:
+            print(f"✗ Booking with the hold of a deleted table returned {response.status_code}")
+            return False
+        
+        print(f"✓ Table {hold['table_id']} held, hidden from others and booked with the token")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Slot hold test failed: {e}")
+        return False
+
+def test_waitlist_promotion():
+    """Test that freed tables go to the best-fitting waitlist entry"""
+    print("\n📋 Testing waitlist promotion...")
+    
+    try:
+        app = get_test_app()
+        client = app.test_client()
+        # Only the 8-seat table can take parties of 7 or 8
+        slot = {'date': (date.today() + timedelta(days=12)).isoformat(), 'party_size': 8}
+        window = {'earliest_time': '19:00', 'latest_time': '19:30'}
+        
+        response = client.post('/api/reservations', json=dict(
+            slot, time='19:00', first_name='Wait', last_name='Blocker', phone='555-WAIT-00'))
+        blocker = response.get_json()['reservation']
+        client.post('/api/reservations', json=dict(
+            slot, time='19:30', first_name='Wait', last_name='Blocker', phone='555-WAIT-00'))
+        
+        # Nothing is free in the window, so both customers wait
+        entries = []
+        for phone, party_size in [('555-WAIT-07', 7), ('555-WAIT-08', 8)]:
+            response = client.post('/api/waitlist', json=dict(
+                slot, **window, party_size=party_size, first_name='Wait', last_name='List', phone=phone))
+            body = response.get_json()
+            if response.status_code != 201 or 'reservation' in body:
+                print(f"✗ Joining the waitlist returned {response.status_code}")
+                return False
+            entries.append(body['entry'])
+        
+        # The party of 8 fills the freed table exactly, so it beats the earlier party of 7
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+        response = client.post(f"/api/reservations/{blocker['reservation_id']}/cancel")
+        if response.get_json().get('waitlist_entry_id') != entries[1]['entry_id']:
+            print(f"✗ Cancellation promoted {response.get_json().get('waitlist_entry_id')}")
+            return False
+        
+        # A table coming back into service goes to the entry still waiting
+        with app.app_context():
+            spare_table = Table.query.filter_by(status='maintenance').first()
+            spare_id, spare_capacity = spare_table.table_id, spare_table.capacity
+        response = client.put(f'/api/tables/{spare_id}', json={'status': 'available', 'capacity': 8})
+        promoted_ids = response.get_json().get('waitlist_entry_ids')
+        client.put(f'/api/tables/{spare_id}', json={'status': 'maintenance', 'capacity': spare_capacity})
+        if promoted_ids != [entries[0]['entry_id']]:
+            print(f"✗ Table change promoted {promoted_ids}")
+            return False
+        
+        remaining = client.get('/api/waitlist', query_string={'date': slot['date']}).get_json()['entries']
+        if remaining:
+            print(f"✗ {len(remaining)} entries still waiting")
+            return False
+        
+        # A table freed by pending expiry stays with the customer holding it at checkout
+        from holds import new_hold
+        from housekeeping import expire_pending_reservations
+        held_slot = dict(slot, date=(date.today() + timedelta(days=14)).isoformat())
+        stale = client.post('/api/reservations', json=dict(
+            held_slot, time='19:00', first_name='Wait', last_name='Blocker', phone='555-WAIT-00')).get_json()['reservation']
+        waiting = client.post('/api/waitlist', json=dict(
+            held_slot, earliest_time='19:00', latest_time='19:00', first_name='Wait', last_name='List',
+            phone='555-WAIT-08')).get_json()['entry']
+        holds = app.extensions['holds']
+        with app.app_context():
+            reservation = db.session.get(Reservation, stale['reservation_id'])
+            reservation.created_at = datetime.utcnow() - timedelta(days=3)
+            hold = new_hold(reservation.table, reservation.reservation_date, reservation.reservation_time, 8, 60)
+            db.session.commit()
+            holds.create(hold, 60)
+            expire_pending_reservations(24 * 60, holds=holds)
+            status = db.session.get(Reservation, stale['reservation_id']).status
+        holds.release(hold['hold_token'])
+        still_waiting = client.get('/api/waitlist', query_string={'date': held_slot['date']}).get_json()['entries']
+        client.delete(f"/api/waitlist/{waiting['entry_id']}")
+        client.get('/logout')
+        if status != 'cancelled' or [entry['entry_id'] for entry in still_waiting] != [waiting['entry_id']]:
+            print("✗ Pending expiry gave a held table to the waitlist")
+            return False
+        
+        print("✓ Cancellation and table change promoted the best-fitting waitlist entries, holds respected")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Waitlist test failed: {e}")
+        return False
+
+def test_table_assignment_optimizer():
+    """Test that the optimizer frees large tables without creating conflicts"""
+    print("\n🧩 Testing table assignment optimizer...")
+    
+    try:
+        from table_assignment import optimize_day, find_conflicts, _apply_moves
+        
+        app = get_test_app()
+        client = app.test_client()
+        service_date = date.today() + timedelta(days=13)
+        
+        with app.app_context():
+            customer = Customer.query.first()
+            tables = Table.query.filter_by(status='available').order_by(Table.capacity.desc()).all()
+            # A couple sat at the largest table while the 2-tops are free
+            fragmented = create_reservation(customer.customer_id, tables[0].table_id, service_date, time(19, 0), 2)
+            fragmented_id, large_table_id = fragmented.reservation_id, tables[0].table_id
+            # A full evening: every table booked in every slot
+            for slot_hour in range(17, 22):
+                for table in tables:
+                    create_reservation(customer.customer_id, table.table_id, service_date, time(slot_hour, 30),
+                                       max(1, table.capacity - 1))
+            
+            preview = optimize_day(service_date, apply=False)
+            if preview['applied'] or preview['wasted_seats_after'] >= preview['wasted_seats_before']:
+                print("✗ Dry run did not find a better assignment")
+                return False
+            if preview['elapsed_ms'] > 1000:
+                print(f"✗ Optimizing {preview['reservations']} reservations took {preview['elapsed_ms']} ms")
+                return False
+            
+            tables_by_id = {table.table_id: table for table in tables}
+            if not find_conflicts({time(19, 0): {1: tables[-1].table_id, 2: tables[-1].table_id}},
+                                  {1: 2, 2: 2}, tables_by_id):
+                print("✗ Double-assigned table not reported as a conflict")
+                return False
+        
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+        response = client.post('/api/admin/optimize-tables', json={'date': service_date.isoformat()})
+        result = response.get_json()
+        client.get('/logout')
+        if response.status_code != 200 or not result['applied']:
+            print(f"✗ Optimizer returned {response.status_code}: {result.get('conflicts')}")
+            return False
+        
+        with app.app_context():
+            moved = db.session.get(Reservation, fragmented_id)
+            if moved.table_id == large_table_id or moved.table.capacity != 2:
+                print("✗ Couple still sits at the large table")
+                return False
+            
+            # The freed table is booked before a (stale) move back is written
+            small_table_id, status = moved.table_id, moved.status
+            create_reservation(Customer.query.first().customer_id, large_table_id, service_date, time(19, 0), 4)
+            if (_apply_moves([(fragmented_id, small_table_id, large_table_id, status)], db.session)
+                    or db.session.get(Reservation, fragmented_id).table_id != small_table_id):
+                print("✗ Move onto a newly booked table not rejected as a change")
+                return False
+        
+        print(f"✓ {len(result['moves'])} reservation(s) moved, wasted seats "
+              f"{result['wasted_seats_before']} → {result['wasted_seats_after']} in {result['elapsed_ms']} ms")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Optimizer test failed: {e}")
+        return False
+
+def test_template_caching():
+    """Test pre-rendered pages and table list fragments keyed by data version"""
+    print("\n🗂  Testing template caching...")
+    
+    try:
+        app = get_test_app()
+        client = app.test_client()
+        
+        # The portal is served from the copy rendered at boot, with an ETag
+        response = client.get('/')
+        if response.status_code != 200 or not response.headers.get('ETag'):
+            print("✗ Customer portal not served from the pre-rendered page")
+            return False
+        if client.get('/', headers={'If-None-Match': response.headers['ETag']}).status_code != 304:
+            print("✗ Unchanged portal not answered with 304")
+            return False
+        
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+        client.get('/admin')
+        with app.app_context():
+            table_id = Table.query.filter_by(status='available').first().table_id
+        
+        fragments = app.jinja_env.fragment_cache
+        client.get('/admin/tables')
+        hits = fragments.hits
+        client.get('/admin/tables')
+        if fragments.hits != hits + 1:
+            print("✗ Unchanged table list was rendered again")
+            return False
+        
+        # Editing a table changes the data version, so the list is rendered afresh
+        client.put(f'/api/tables/{table_id}', json={'location': 'Fragment Test Corner'})
+        page = client.get('/admin/tables').get_data(as_text=True)
+        client.put(f'/api/tables/{table_id}', json={'location': 'Window Side'})
+        client.get('/logout')
+        if 'Fragment Test Corner' not in page:
+            print("✗ Table list fragment served stale after an edit")
+            return False
+        
+        print("✓ Portal pre-rendered with ETag, table list cached until the tables change")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Template caching test failed: {e}")
+        return False
+
+def test_static_assets():
+    """Test fingerprinted assets, encoding negotiation and cache headers"""
+    print("\n📦 Testing static assets...")
+    
+    try:
+        import gzip
+        import re
+        
+        app = get_test_app()
+        client = app.test_client()
+        
+        page = client.get('/').get_data(as_text=True)
+        stylesheets = re.findall(r'href="(/assets/css/base\.[0-9a-f]{10}\.css)"', page)
+        if not stylesheets or '<style>' in page:
+            print("✗ Page does not link the fingerprinted stylesheet")
+            return False
+        
+        plain = client.get(stylesheets[0], headers={'Accept-Encoding': 'identity'})
+        gzipped = client.get(stylesheets[0], headers={'Accept-Encoding': 'gzip'})
+        if plain.headers.get('Content-Encoding') or gzipped.headers.get('Content-Encoding') != 'gzip':
+            print("✗ Content-Encoding not negotiated")
+            return False
+        if gzip.decompress(gzipped.data) != plain.data or len(gzipped.data) >= len(plain.data):
+            print("✗ Precompressed copy differs from the stylesheet")
+            return False
+        if 'immutable' not in gzipped.headers.get('Cache-Control', '') or 'Accept-Encoding' not in gzipped.headers.get('Vary', ''):
+            print(f"✗ Missing cache headers: {gzipped.headers.get('Cache-Control')}")
+            return False
+        
+        print(f"✓ {stylesheets[0]} served {len(plain.data):,} B plain, {len(gzipped.data):,} B gzip, immutable")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Static asset test failed: {e}")
+        return False
+
+def test_response_compression():
+    """Test negotiated compression of large, small and streamed responses"""
+    print("\n🗜  Testing response compression...")
+    
+    try:
+        import gzip
+        import zlib
+        from flask import Response
+        
+        app = get_test_app()
+        client = app.test_client()
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+        
+        plain = client.get('/api/database/view')
+        gzipped = client.get('/api/database/view', headers={'Accept-Encoding': 'gzip'})
+        small = client.get('/health', headers={'Accept-Encoding': 'gzip'})
+        client.get('/logout')
+        
+        if plain.headers.get('Content-Encoding') or gzipped.headers.get('Content-Encoding') != 'gzip':
+            print("✗ Content-Encoding not negotiated")
+            return False
+        if gzip.decompress(gzipped.data) != plain.data or 'Accept-Encoding' not in gzipped.headers.get('Vary', ''):
+            print("✗ Compressed body or Vary header wrong")
+            return False
+        if small.headers.get('Content-Encoding'):
+            print("✗ Response below COMPRESSION_MIN_SIZE was compressed")
+            return False
+        
+        # A streamed response is compressed chunk by chunk, each decodable on arrival
+        chunks = [b'{"rows": [', b'1, ' * 400, b'2]}']
+        with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            streamed = app.process_response(Response(iter(chunks), mimetype='application/json'))
+            encoded = list(streamed.response)
+        decoder = zlib.decompressobj(31)
+        if streamed.headers.get('Content-Encoding') != 'gzip' or decoder.decompress(encoded[0]) != chunks[0]:
+            print("✗ Streamed response not compressed incrementally")
+            return False
+        
+        print(f"✓ Database view {len(plain.data):,} B → {len(gzipped.data):,} B gzip, small and streamed responses handled")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Response compression test failed: {e}")
+        return False
+
+def test_system_status():
+    """Test that status polls answer from the cached probe without touching reservations"""
+    print("\n🟢 Testing system status endpoint...")
+    
+    try:
+        from sqlalchemy import event
+        
+        app = get_test_app()
+        client = app.test_client()
+        probe = app.extensions['status_probe']
+        
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', record)
+            try:
+                responses = [client.get('/api/status') for _ in range(20)]
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', record)
+        
+        if any(response.status_code != 200 or response.json['status'] != 'online' for response in responses):
+            print("✗ Status endpoint did not report online")
+            return False
+        if probe.probes != 1 or len(statements) != 1:
+            print(f"✗ Expected one probe per interval, got {probe.probes} probes and {len(statements)} statements")
+            return False
+        if any('reservation' in statement.lower() for statement in statements):
+            print("✗ Status check queried the reservations table")
+            return False
+        if 'no-store' not in responses[0].headers.get('Cache-Control', '') or not responses[0].json.get('poll_seconds'):
+            print("✗ Status response missing Cache-Control or poll interval")
+            return False
+        
+        # A stale result is refreshed by the next poll, not before
+        probe.checked_monotonic -= probe.interval
+        client.get('/api/status')
+        if probe.probes != 2:
+            print("✗ Stale probe was not refreshed")
+            return False
+        
+        print(f"✓ 21 status polls ran {probe.probes} probes ({statements[0]!r}), never touching reservations")
+        return True
+        
+    except Exception as e:
+        print(f"✗ System status test failed: {e}")
+        return False
+
+def test_tenancy():
+    """Test per-tenant databases, tenant resolution and the cross-tenant report"""
+    print("\n🏢 Testing multi-restaurant tenancy...")
+    
+    try:
+        import tempfile
+        import time as time_module
+        from config import config, TestingConfig
+        from app import create_app
+        from tenancy import create_schemas, tenant_context, current_tenant
+        
+        temp_dir = tempfile.mkdtemp()
+        config['tenant_testing'] = type('TenantTestingConfig', (TestingConfig,), {
+            'TENANT_DATABASES': f"harbour=sqlite:///{os.path.join(temp_dir, 'harbour.db')}",
+            'TENANT_NAMES': 'harbour=Harbour Test',
+            'TENANT_HOSTS': 'book.harbour.test=harbour',
+            'QUERY_BUDGET': None, 'QUERY_REPEAT_LIMIT': None
+        })
+        app = create_app('tenant_testing')
+        tenancy = app.extensions['tenancy']
+        create_schemas(app)
+        with app.app_context():
+            db.session.add_all([Table(table_number=1, capacity=2, location='Default'),
+                                Table(table_number=2, capacity=4, location='Default')])
+            db.session.commit()
+        with tenant_context(app, 'harbour'):
+            db.session.add(Table(table_number=1, capacity=4, location='Harbour'))
+            db.session.commit()
+        
+        client = app.test_client()
+        test_date = (date.today() + timedelta(days=3)).isoformat()
+        query = f'api/tables/available?date={test_date}&time=19:00&party_size=2'
+        default_tables = client.get('/' + query).json['available_tables']
+        path_tables = client.get('/t/harbour/' + query).json['available_tables']
+        host_tables = client.get('/' + query, headers={'Host': 'book.harbour.test'}).json['available_tables']
+        if {t['location'] for t in default_tables} != {'Default'} or \
+                [t['location'] for t in path_tables] != ['Harbour'] or host_tables != path_tables:
+            print("✗ Requests did not reach their tenant's database")
+            return False
+        if client.get('/t/harbour/api/stats').json['restaurant_name'] != 'Harbour Test':
+            print("✗ Tenant restaurant name not used")
+            return False
+        
+        # A login to the default database does not carry over to another tenant
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+        if client.get('/t/harbour/admin').status_code != 302 or client.get('/admin').status_code != 200:
+            print("✗ Login leaked across tenants")
+            return False
+        
+        report = client.get('/api/admin/tenants/report').json
+        if set(report['tenants']) != {'default', 'harbour'} or report['totals']['tables'] != 3 or report['failed']:
+            print(f"✗ Cross-tenant report wrong: {report}")
+            return False
+        
+        # A slow tenant is reported as timed out without holding up the others
+        started = time_module.perf_counter()
+        results = tenancy.fan_out(lambda: time_module.sleep(1) if current_tenant() == 'harbour' else 'ok', timeout=0.2)
+        elapsed = time_module.perf_counter() - started
+        if results['default'] != 'ok' or 'error' not in results['harbour'] or elapsed > 0.8:
+            print(f"✗ Slow tenant held up the report ({elapsed:.2f}s)")
+            return False
+        
+        pool = tenancy.registry.engine('harbour').pool
+        if pool.size() != app.config['TENANT_POOL_SIZE']:
+            print("✗ Tenant pool not bounded")
+            return False
+        
+        print(f"✓ Tenants resolved by path and host, report merged, slow tenant cut off after {elapsed:.2f}s")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Tenancy test failed: {e}")
+        return False
+
+def test_outbox():
+    """Test that reservation and table writes append outbox events delivered to subscribers"""
+    print("\n📬 Testing transactional outbox...")
+    
+    try:
+        from models import OutboxEvent, OutboxCursor
+        from outbox import OutboxDispatcher
+        
+        app = get_test_app()
+        client = app.test_client()
+        dispatcher = OutboxDispatcher(app, batch_size=2, settle_seconds=0)
+        received, leader_received = [], []
+        dispatcher.subscribe('collector', received.append)
+        dispatcher.subscribe('broken', lambda event: 1 / 0, event_types=['reservation.*'])
+        dispatcher.subscribe('notifier', leader_received.append, event_types=['reservation.cancelled'], leader_only=True)
+        
+        with app.app_context():
+            dispatcher.dispatch()
+            dispatcher.dispatch(leader_only=True)
+            start_id = db.session.scalar(db.select(db.func.max(OutboxEvent.event_id))) or 0
+            
+            customer = Customer.query.first()
+            table = Table.query.filter_by(status='available').first()
+            reservation = create_reservation(customer.customer_id, table.table_id,
+                                             date.today() + timedelta(days=9), time(20, 30), 2)
+            reservation_id = reservation.reservation_id
+            
+            # A rolled back change leaves no event behind
+            reservation.cancel()
+            db.session.rollback()
+            
+            reservation.confirm()
+            reservation.cancel()
+            db.session.commit()
+        
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+        created = client.post('/api/tables', json={'table_number': 950, 'capacity': 2})
+        table_id = created.json['table']['table_id']
+        client.put(f'/api/tables/{table_id}', json={'capacity': 4})
+        client.delete(f'/api/tables/{table_id}')
+        feed = client.get(f'/api/admin/outbox?after={start_id}').json
+        client.get('/logout')
+        
+        expected = ['reservation.created', 'reservation.confirmed', 'reservation.cancelled',
+                    'table.created', 'table.updated', 'table.deleted']
+        if [event['event_type'] for event in feed['events']] != expected:
+            print(f"✗ Unexpected outbox events: {[event['event_type'] for event in feed['events']]}")
+            return False
+        
+        with app.app_context():
+            delivered = dispatcher.dispatch()
+            leader_delivered = dispatcher.dispatch(leader_only=True)
+            again = dispatcher.dispatch() + dispatcher.dispatch(leader_only=True)
+            leader_cursor = db.session.get(OutboxCursor, 'leader').last_event_id
+        
+        if [event['event_type'] for event in received] != expected or delivered != 6 or again != 0:
+            print(f"✗ Worker subscriber got {[event['event_type'] for event in received]}")
+            return False
+        if [event['payload']['reservation_id'] for event in leader_received] != [reservation_id] \
+                or leader_delivered != 6 or leader_cursor != feed['next_after'] or dispatcher.failures != 3:
+            print("✗ Leader subscriber, persisted cursor or failure isolation wrong")
+            return False
+        
+        print(f"✓ {len(expected)} events written with their changes, delivered once in batches of 2")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Outbox test failed: {e}")
+        return False
+
+def test_idempotent_booking():
+    """Test that retried booking POSTs with one Idempotency-Key book once"""
+    print("\n🔁 Testing idempotent booking retries...")
+    
+    try:
+        from models import IdempotencyKey
+        from idempotency import claim_key, request_fingerprint
+        
+        app = get_test_app()
+        client = app.test_client()
+        booking = {'first_name': 'Retry', 'last_name': 'Client', 'phone': '555-RETRY',
+                   'date': (date.today() + timedelta(days=11)).isoformat(), 'time': '18:30', 'party_size': 2}
+        headers = {'Idempotency-Key': 'test-retry-key-1'}
+        
+        with app.app_context():
+            before = Reservation.query.count()
+        first = client.post('/api/reservations', json=booking, headers=headers)
+        retry = client.post('/api/reservations', json=booking, headers=headers)
+        other_body = client.post('/api/reservations', json=dict(booking, party_size=4), headers=headers)
+        with app.app_context():
+            created = Reservation.query.count() - before
+        
+        if first.status_code != 201 or retry.status_code != 201 or created != 1:
+            print(f"✗ Retry booked again ({first.status_code}, {retry.status_code}, {created} created)")
+            return False
+        if retry.json != first.json or retry.headers.get('Idempotent-Replayed') != 'true':
+            print("✗ Retry did not replay the first response")
+            return False
+        if other_body.status_code != 422:
+            print("✗ Key reused for a different booking was accepted")
+            return False
+        
+        # An attempt still in flight makes a retry wait, then answer 409
+        with app.app_context():
+            fingerprint = request_fingerprint('POST', '/api/reservations', b'{}')
+            claim_key('test-in-flight', fingerprint, lock_seconds=30, wait_seconds=0)
+            outcome, _ = claim_key('test-in-flight', fingerprint, lock_seconds=30, wait_seconds=0.1)
+            # A claim that lapsed (its request died) can be taken over
+            IdempotencyKey.query.filter_by(key='test-in-flight').update({'expires_at': datetime.utcnow()})
+            db.session.commit()
+            takeover, _ = claim_key('test-in-flight', fingerprint, lock_seconds=30, wait_seconds=0)
+        if outcome != 'in_flight' or takeover != 'claimed':
+            print(f"✗ In-flight handling wrong ({outcome}, {takeover})")
+            return False
+        
+        print("✓ Retry replayed the stored 201 without booking, mismatched body 422, in-flight retry 409")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Idempotent booking test failed: {e}")
+        return False
+
+def test_batch_availability():
+    """Test that batch availability matches single lookups with two queries in total"""
+    print("\n📅 Testing batch availability...")
+    
+    try:
+        from sqlalchemy import event
+        
+        app = get_test_app()
+        client = app.test_client()
+        base = date.today() + timedelta(days=12)
+        
+        with app.app_context():
+            customer = Customer.query.first()
+            booked_table = Table.query.filter_by(status='available').order_by(Table.capacity).first()
+            create_reservation(customer.customer_id, booked_table.table_id, base, time(19, 0), 2)
+        hold = client.post('/api/holds', json={'date': base.isoformat(), 'time': '19:30', 'party_size': 2}).json['hold']
+        
+        queries = [{'date': (base + timedelta(days=offset)).isoformat(), 'time': slot, 'party_size': size}
+                   for offset in range(3) for slot in ['18:00', '19:00', '19:30'] for size in [1, 2, 4, 6, 9]]
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', record)
+            try:
+                response = client.post('/api/tables/available/batch', json={'queries': queries})
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', record)
+        
+        if response.status_code != 200 or len(response.json['results']) != len(queries) or len(statements) != 2:
+            print(f"✗ Batch failed or ran {len(statements)} statements")
+            return False
+        
+        # Every answer matches the single-query endpoint
+        for query, result in zip(queries, response.json['results']):
+            single = client.get('/api/tables/available', query_string=query).json['available_tables']
+            if [table['table_id'] for table in single] != result['table_ids']:
+                print(f"✗ Batch answer differs for {query}")
+                return False
+        held_slot = response.json['results'][queries.index({'date': base.isoformat(), 'time': '19:30', 'party_size': 2})]
+        if hold['table_id'] in held_slot['table_ids'] or str(held_slot['table_ids'][0]) not in response.json['tables']:
+            print("✗ Held table offered or table details missing")
+            return False
+        client.delete(f"/api/holds/{hold['hold_token']}")
+        
+        too_many = client.post('/api/tables/available/batch',
+                               json={'queries': [queries[0]] * (app.config['AVAILABILITY_BATCH_LIMIT'] + 1)})
+        bad = client.post('/api/tables/available/batch', json={'queries': [queries[0], {'date': 'x'}]})
+        if too_many.status_code != 400 or bad.status_code != 400 or 'queries[1]' not in bad.json['error']:
+            print("✗ Oversized or invalid batch not rejected")
+            return False
+        
+        print(f"✓ {len(queries)} queries answered with {len(statements)} statements, identical to single lookups")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Batch availability test failed: {e}")
+        return False
+
+def test_occupancy_matrix():
+    """Test the occupancy matrix against find_available_tables on a random floor plan"""
+    print("\n🧮 Testing occupancy matrix...")
+    
+    try:
+        import random
+        from occupancy import OccupancyMatrix, bookable_slots
+        
+        app = get_test_app()
+        rng = random.Random(49)
+        base = date.today() + timedelta(days=20)
+        days = 4
+        slots = bookable_slots(app.config['OPENING_TIME'], app.config['CLOSING_TIME'],
+                               app.config['TIME_SLOT_DURATION'])
+        
+        with app.app_context():
+            db.session.add_all([Table(table_number=500 + number, capacity=rng.randint(1, 12),
+                                      status=rng.choice(['available', 'available', 'available', 'reserved', 'maintenance']))
+                                for number in range(25)])
+            db.session.commit()
+            customer_id = Customer.query.first().customer_id
+            table_ids = [table.table_id for table in Table.query.all()]
+            
+            # Random bookings in every status, plus off-grid times that block no slot
+            rows, active = [], set()
+            for _ in range(600):
+                key = (rng.choice(table_ids), base + timedelta(days=rng.randrange(days)),
+                       rng.choice(slots + [time(17, 15), time(23, 0)]))
+                status = rng.choice(['pending', 'confirmed', 'cancelled', 'completed'])
+                if status in ('pending', 'confirmed'):
+                    if key in active:
+                        continue
+                    active.add(key)
+                rows.append({'customer_id': customer_id, 'table_id': key[0], 'reservation_date': key[1],
+                             'reservation_time': key[2], 'party_size': 1, 'status': status})
+            db.session.execute(Reservation.__table__.insert(), rows)
+            db.session.commit()
+            
+            matrix = OccupancyMatrix.load(base, days, slots)
+            dates = [base + timedelta(days=offset) for offset in range(days)]
+            expected = {(day, slot, size): [table.table_id for table in find_available_tables(day, slot, size)]
+                        for day in dates for slot in slots for size in range(1, 14)}
+            
+            for (day, slot, size), table_ids_free in expected.items():
+                if matrix.available_tables(day, slot, size) != table_ids_free:
+                    print(f"✗ Matrix differs from find_available_tables at {day} {slot} for {size}")
+                    return False
+                if matrix.free_table_counts(size)[dates.index(day), slots.index(slot)] != len(table_ids_free):
+                    print(f"✗ Free table count differs at {day} {slot} for {size}")
+                    return False
+            
+            # Earliest free slot against a brute-force walk over the grid
+            grid = [(day, slot) for day in dates for slot in slots]
+            for _ in range(200):
+                size = rng.randint(1, 13)
+                start_day, start_time = rng.choice(dates), time(rng.randint(16, 22), rng.choice([0, 10, 30, 45]))
+                brute = next(((day, slot, expected[day, slot, size][0]) for day, slot in grid
+                              if (day, slot) >= (start_day, start_time) and expected[day, slot, size]), None)
+                if matrix.next_free_slot(size, start_day, start_time) != brute:
+                    print(f"✗ next_free_slot differs from {start_day} {start_time} for {size}")
+                    return False
+            
+            # Fill rate: booked in-service seats over all in-service seats
+            tables = Table.query.filter_by(status='available').all()
+            total = sum(table.capacity for table in tables)
+            fill_rate = matrix.fill_rate()
+            for day, slot in grid:
+                booked = sum(table.capacity for table in tables if (table.table_id, day, slot) in active)
+                if abs(fill_rate[dates.index(day), slots.index(slot)] - booked / total) > 1e-9:
+                    print(f"✗ Fill rate differs at {day} {slot}")
+                    return False
+        
+        client = app.test_client()
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+        response = client.get('/api/admin/occupancy', query_string={'date': base.isoformat(), 'days': days,
+                                                                    'party_size': 4})
+        report = response.json
+        if (response.status_code != 200 or len(report['days']) != days
+                or report['days'][0]['free_tables'][0] != len(expected[base, slots[0], 4])
+                or client.get('/api/admin/occupancy?days=0').status_code != 400):
+            print("✗ Occupancy report wrong")
+            return False
+        
+        print(f"✓ {len(expected)} lookups, 200 earliest-slot searches and fill rates match on {len(table_ids)} tables")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Occupancy matrix test failed: {e}")
+        return False
+
+def test_next_available_slots():
+    """Test nearest free slot suggestions against a brute-force search"""
+    print("\n🔜 Testing next available slot search...")
+    
+    try:
+        from sqlalchemy import event
+        from occupancy import bookable_slots
+        
+        app = get_test_app()
+        client = app.test_client()
+        base = date.today() + timedelta(days=6)
+        slots = bookable_slots(app.config['OPENING_TIME'], app.config['CLOSING_TIME'],
+                               app.config['TIME_SLOT_DURATION'])
+        
+        with app.app_context():
+            party_size = db.session.scalar(db.select(db.func.max(Table.capacity)).where(Table.status == 'available'))
+            customer = Customer.query.first()
+            # Every table for the party is booked at 18:30 and 19:00
+            for table in find_available_tables(base, time(19, 0), party_size):
+                for slot in [time(18, 30), time(19, 0)]:
+                    create_reservation(customer.customer_id, table.table_id, base, slot, party_size)
+        hold = client.post('/api/holds', json={'date': base.isoformat(), 'time': '19:30',
+                                               'party_size': party_size}).json['hold']
+        
+        def suggest(query, limit):
+            statements = []
+            def record(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+            with app.app_context():
+                event.listen(db.engine, 'before_cursor_execute', record)
+                try:
+                    response = client.get('/api/availability/next', query_string={**query, 'limit': limit})
+                finally:
+                    event.remove(db.engine, 'before_cursor_execute', record)
+            return response, statements
+        
+        def brute_force(requested):
+            # Every slot of the booking window, nearest first
+            now = datetime.now()
+            expected = []
+            with app.app_context():
+                for offset in range(app.config['MAX_ADVANCE_BOOKING_DAYS'] + 1):
+                    for slot in slots:
+                        moment = datetime.combine(date.today() + timedelta(days=offset), slot)
+                        if moment < now:
+                            continue
+                        held_tables = app.extensions['holds'].held_tables(moment.date(), slot)
+                        tables = find_available_tables(moment.date(), slot, party_size, exclude_table_ids=held_tables)
+                        if tables:
+                            expected.append((abs(moment - requested), moment, {
+                                'date': moment.date().isoformat(), 'time': slot.strftime('%H:%M'),
+                                'table_id': tables[0].table_id, 'capacity': tables[0].capacity}))
+            return [suggestion for _, _, suggestion in sorted(expected, key=lambda item: item[:2])]
+        
+        query = {'date': base.isoformat(), 'time': '19:00', 'party_size': party_size}
+        response, statements = suggest(query, 8)
+        suggestions = response.json['suggestions']
+        expected = brute_force(datetime.combine(base, time(19, 0)))
+        
+        if response.status_code != 200 or suggestions != expected[:8] or len(statements) != 2:
+            print(f"✗ Suggestions differ from brute force or took {len(statements)} statements")
+            return False
+        if any(suggestion['time'] in ('18:30', '19:00') and suggestion['date'] == base.isoformat()
+               or suggestion['table_id'] == hold['table_id'] and suggestion['time'] == '19:30'
+               for suggestion in suggestions):
+            print("✗ Booked or held table suggested")
+            return False
+        
+        # A full slot's 409 carries the same suggestions
+        conflict = client.post('/api/reservations', json={
+            'first_name': 'Next', 'last_name': 'Slot', 'phone': '555-NEXT', **query})
+        if conflict.status_code != 409 or conflict.json['suggestions'] != expected[:app.config['AVAILABILITY_SUGGESTIONS']]:
+            print("✗ 409 response without the nearest free slots")
+            return False
+        client.delete(f"/api/holds/{hold['hold_token']}")
+        
+        # Around a fully booked week the search widens until nothing nearer can be missed
+        far = date.today() + timedelta(days=20)
+        with app.app_context():
+            customer_id = Customer.query.first().customer_id
+            week = [(table.table_id, far + timedelta(days=offset), slot)
+                    for table in Table.query.filter(Table.capacity >= party_size)
+                    for offset in range(-3, 4) for slot in slots]
+            booked = set(db.session.execute(db.select(
+                Reservation.table_id, Reservation.reservation_date, Reservation.reservation_time).where(
+                Reservation.status.in_(['pending', 'confirmed']))).all())
+            db.session.execute(Reservation.__table__.insert(), [
+                {'customer_id': customer_id, 'table_id': table_id, 'reservation_date': day,
+                 'reservation_time': slot, 'party_size': party_size, 'status': 'confirmed'}
+                for table_id, day, slot in week if (table_id, day, slot) not in booked])
+            db.session.commit()
+        far_query = {**query, 'date': far.isoformat()}
+        widened, widened_statements = suggest(far_query, 3)
+        if widened.json['suggestions'] != brute_force(datetime.combine(far, time(19, 0)))[:3] or len(widened_statements) != 4:
+            print(f"✗ Widened search wrong or took {len(widened_statements)} statements")
+            return False
+        
+        too_large = client.get('/api/availability/next', query_string={**query, 'party_size': 1000})
+        bad_limit = client.get('/api/availability/next', query_string={**query, 'limit': 0})
+        if too_large.json['suggestions'] or bad_limit.status_code != 400:
+            print("✗ Oversized party or invalid limit not handled")
+            return False
+        
+        print(f"✓ Nearest {len(suggestions)} free slots match brute force, with {len(statements)} statements")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Next available slot test failed: {e}")
+        return False
+
+def seed_todays_reservations():
+    """Give every available table a reservation today so list pages loop over rows"""
+    customers = Customer.query.all()
+    tables = Table.query.filter_by(status='available').all()
+    
+    for index, table in enumerate(tables):
+        if not table.is_available_at(date.today(), time(18, 0)):
+            continue
+        create_reservation(
+            customer_id=customers[index % len(customers)].customer_id,
+            table_id=table.table_id,
+            reservation_date=date.today(),
+            reservation_time=time(18, 0),
+            party_size=min(2, table.capacity)
+        )
+
+def test_route_query_budgets():
+    """Test every route against the TestingConfig query budget"""
+    print("\n🔎 Testing query budgets on every route...")
+    
+    try:
+        from query_budget import QueryBudgetExceeded
+        from assets import asset_url
+        
+        app = get_test_app()
+        client = app.test_client()
+        
+        with app.app_context():
+            seed_todays_reservations()
+            reservation_id = Reservation.query.filter_by(status='pending').first().reservation_id
+            other_reservation_id = Reservation.query.filter_by(status='pending').order_by(
+                Reservation.reservation_id.desc()).first().reservation_id
+            table_id = Table.query.first().table_id
+        
+        test_date = (date.today() + timedelta(days=5)).isoformat()
+        today = date.today().isoformat()
+        
+        # One request per route; logout runs last because it ends the session
+        route_requests = [
+            ('login', 'POST', '/login', {'data': {'username': 'admin', 'password': 'admin123'}}),
+            ('login', 'GET', '/login', {}),
+            ('index', 'GET', '/', {}),
+            ('favicon', 'GET', '/favicon.ico', {}),
+            ('asset', 'GET', '{asset:css/base.css}', {}),
+            ('static', 'GET', '/static/dist/manifest.json', {}),
+            ('debug', 'GET', '/debug', {}),
+            ('health', 'GET', '/health', {}),
+            ('system_status', 'GET', '/api/status', {}),
+            ('tenant_report', 'GET', '/api/admin/tenants/report', {}),
+            ('outbox_events', 'GET', '/api/admin/outbox?after=0', {}),
+            ('occupancy_report', 'GET', f'/api/admin/occupancy?date={test_date}&days=7&party_size=4', {}),
+            ('metrics_endpoint', 'GET', '/metrics', {}),
+            ('get_available_tables', 'GET', f'/api/tables/available?date={test_date}&time=19:00&party_size=2', {}),
+            ('next_available_slots', 'GET', f'/api/availability/next?date={test_date}&time=19:00&party_size=2', {}),
+            ('get_available_tables_batch', 'POST', '/api/tables/available/batch', {'json': {'queries': [
+                {'date': test_date, 'time': slot, 'party_size': 2} for slot in ['18:00', '19:00', '20:00']]}}),
+            ('create_reservation_api', 'POST', '/api/reservations', {'json': {
+                'first_name': 'Budget', 'last_name': 'Test', 'phone': '555-BUDGET',
+                'date': test_date, 'time': '19:00', 'party_size': 2}}),
+            ('create_hold', 'POST', '/api/holds', {'json': {'date': test_date, 'time': '20:00', 'party_size': 2}}),
+            ('release_hold', 'DELETE', '/api/holds/unknown-token', {}),
+            ('create_waitlist_entry', 'POST', '/api/waitlist', {'json': {
+                'first_name': 'Budget', 'last_name': 'Waiting', 'phone': '555-BUDGET-W', 'date': test_date,
+                'earliest_time': '21:00', 'latest_time': '21:30', 'party_size': 2}}),
+            ('admin_dashboard', 'GET', '/admin', {}),
+            ('admin_reservations', 'GET', '/admin/reservations', {}),
+            ('admin_tables', 'GET', '/admin/tables', {}),
+            ('search_reservations', 'GET', f'/api/reservations/search?q=smith&date={today}', {}),
+            ('search_reservations', 'GET', '/api/reservations/search', {}),
+            ('get_stats', 'GET', '/api/stats', {}),
+            ('view_database', 'GET', '/api/database/view', {}),
+            ('optimize_table_assignments', 'POST', '/api/admin/optimize-tables', {'json': {'dry_run': True}}),
+            ('list_waitlist', 'GET', '/api/waitlist', {}),
+            ('remove_waitlist_entry', 'DELETE', '/api/waitlist/999999', {}),
+            ('confirm_reservation', 'POST', f'/api/reservations/{reservation_id}/confirm', {}),
+            ('complete_reservation', 'POST', f'/api/reservations/{reservation_id}/complete', {}),
+            ('cancel_reservation', 'POST', f'/api/reservations/{other_reservation_id}/cancel', {}),
+            ('create_table', 'POST', '/api/tables', {'json': {'table_number': 99, 'capacity': 4}}),
+            ('get_table', 'GET', f'/api/tables/{table_id}', {}),
+            ('update_table', 'PUT', f'/api/tables/{table_id}', {'json': {'location': 'Window Side'}}),
+            ('delete_table', 'DELETE', '/api/tables/{new_table_id}', {}),
+            ('logout', 'GET', '/logout', {})
+        ]
+        
+        # Every registered route must be exercised here
+        covered = {endpoint for endpoint, _, _, _ in route_requests}
+        uncovered = {rule.endpoint for rule in app.url_map.iter_rules()} - covered
+        if uncovered:
+            print(f"✗ Routes without a query budget test: {sorted(uncovered)}")
+            return False
+        
+        with app.test_request_context():
+            base_css_url = asset_url('css/base.css')
+        
+        new_table_id = None
+        for endpoint, method, path, kwargs in route_requests:
+            path = path.replace('{new_table_id}', str(new_table_id)).replace('{asset:css/base.css}', base_css_url)
+            try:
+                response = client.open(path, method=method, **kwargs)
+            except QueryBudgetExceeded as e:
+                print(f"✗ {e}")
+                return False
+            
+            if response.status_code >= 500:
+                print(f"✗ {method} {path} returned {response.status_code}")
+                return False
+            if endpoint == 'create_table':
+                new_table_id = response.get_json()['table']['table_id']
+        
+        print(f"✓ {len(route_requests)} route requests stayed within the query budget")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Query budget test failed: {e}")
+        return False
+
 def generate_test_report():
     """Generate a summary test report"""
     print("\n" + "="*60)
@@ -253,8 +1622,28 @@ def generate_test_report():
         ("Table Availability", test_table_availability),
         ("Customer Creation", test_customer_creation),
         ("Reservation Creation", test_reservation_creation),
+        ("Active Slot Uniqueness", test_active_slot_constraint),
         ("User Authentication", test_user_authentication),
-        ("Business Logic", test_business_logic)
+        ("Business Logic", test_business_logic),
+        ("Metrics Endpoint", test_metrics_endpoint),
+        ("ASGI Metrics", test_asgi_metrics),
+        ("Availability Coalescing", test_availability_coalescing),
+        ("Reservation Archival", test_reservation_archival),
+        ("Scheduled Housekeeping", test_scheduled_housekeeping),
+        ("Slot Holds", test_slot_holds),
+        ("Waitlist Promotion", test_waitlist_promotion),
+        ("Table Assignment Optimizer", test_table_assignment_optimizer),
+        ("Template Caching", test_template_caching),
+        ("Static Assets", test_static_assets),
+        ("Response Compression", test_response_compression),
+        ("System Status", test_system_status),
+        ("Multi-Restaurant Tenancy", test_tenancy),
+        ("Transactional Outbox", test_outbox),
+        ("Idempotent Booking", test_idempotent_booking),
+        ("Batch Availability", test_batch_availability),
+        ("Occupancy Matrix", test_occupancy_matrix),
+        ("Next Available Slot", test_next_available_slots),
+        ("Route Query Budgets", test_route_query_budgets)
     ]
     
     results = []
@@ -0,0 +1,244 @@
+"""
+Waitlist Matching for Restaurant Reservation System
+MIT400 Assessment 2
+
+Customers who find no table can join the waitlist for a party size on a
+date, anywhere between an earliest and a latest time. Whenever a table
+frees up - a booking is cancelled or expires, or staff put a table back
+into service or enlarge it - the freed table is offered to the waitlist
+straight away and the best-fitting entry is booked onto it:
+
+    1. highest priority first (staff can raise an entry's priority)
+    2. then the party that leaves the fewest empty seats at the table
+    3. then first come, first served
+
+Only the entries that could use the freed slot are read - waiting entries
+for that date whose window contains the time and whose party fits the
+table (ix_waitlist_match) - and ranked in a heap, so the cost of a
+cancellation grows with the demand for that slot, not with the whole
+waitlist.
+
+An entry is claimed with a conditional UPDATE (waiting -> promoted) in
+the same transaction that inserts its reservation, so two workers freeing
+tables at the same moment can never book one entry twice. Promoted
+reservations start as 'pending' and show up in the admin dashboard for
+staff to confirm with the customer.
+"""
+
+import heapq
+from datetime import datetime, date, timedelta
+from models import db, Table, WaitlistEntry, find_available_tables, create_reservation
+
+def slot_times(earliest_time, latest_time, step_minutes):
+    """
+    Reservation times from earliest_time to latest_time inclusive
+
+    Args:
+        earliest_time (time): First time
+        latest_time (time): Last time
+        step_minutes (int): Minutes between slots (TIME_SLOT_DURATION)
+
+    Returns:
+        list: time objects
+    """
+    current = datetime.combine(date.min, earliest_time)
+    last = datetime.combine(date.min, latest_time)
+    times = []
+    while current <= last:
+        times.append(current.time())
+        current += timedelta(minutes=step_minutes)
+    return times
+
+def is_upcoming(reservation_date, reservation_time, now=None):
+    """True if a slot has not started yet"""
+    return datetime.combine(reservation_date, reservation_time) > (now or datetime.now())
+
+def best_fit_queue(entries, capacity):
+    """
+    Order waitlist entries for a table as a heap
+
+    Args:
+        entries (iterable): WaitlistEntry objects that fit the table
+        capacity (int): Seats at the freed table
+
+    Returns:
+        list: Heap of (sort key..., entry); heappop gives the best entry
+    """
+    queue = [(-entry.priority, capacity - entry.party_size, entry.created_at or datetime.min, entry.entry_id, entry)
+             for entry in entries]
+    heapq.heapify(queue)
+    return queue
+
+def promote_entry(entry, table, reservation_time, session=None):
+    """
+    Book a waitlist entry onto a table
+
+    The entry is claimed and the reservation inserted in one transaction;
+    if either fails nothing changes.
+
+    Args:
+        entry (WaitlistEntry): Entry to promote
+        table (Table): Free table that seats the party
+        reservation_time (time): Time within the entry's window
+        session (Session, optional): Session to use, defaults to db.session
+
+    Returns:
+        Reservation: The booking, or None if the entry or table was taken
+    """
+    session = session if session is not None else db.session
+    entries = WaitlistEntry.__table__
+    claimed = session.execute(entries.update().where(
+        entries.c.entry_id == entry.entry_id,
+        entries.c.status == 'waiting'
+    ).values(status='promoted', promoted_at=datetime.utcnow())).rowcount
+    if not claimed:
+        session.rollback()
+        return None
+
+    # create_reservation commits the claim together with the booking
+    reservation = create_reservation(
+        customer_id=entry.customer_id,
+        table_id=table.table_id,
+        reservation_date=entry.reservation_date,
+        reservation_time=reservation_time,
+        party_size=entry.party_size,
+        special_requests=entry.special_requests,
+        session=session
+    )
+    if reservation is None:
+        session.rollback()
+        return None
+
+    session.execute(entries.update().where(entries.c.entry_id == entry.entry_id)
+                    .values(reservation_id=reservation.reservation_id))
+    session.commit()
+    return reservation
+
+def promote_waitlist(table_id, reservation_date, reservation_time, session=None, holds=None):
+    """
+    Offer a freed table and slot to the best-fitting waiting entry
+
+    Args:
+        table_id (int): Table that became free
+        reservation_date (date): Date of the freed slot
+        reservation_time (time): Time of the freed slot
+        session (Session, optional): Session to use, defaults to db.session
+        holds (optional): Hold store from holds.py; held tables are left alone
+
+    Returns:
+        WaitlistEntry: The promoted entry, or None
+    """
+    session = session if session is not None else db.session
+    if not is_upcoming(reservation_date, reservation_time):
+        return None
+    if holds is not None and table_id in holds.held_tables(reservation_date, reservation_time):
+        return None
+    table = session.get(Table, table_id)
+    if table is None or not table.is_available_at(reservation_date, reservation_time):
+        return None
+
+    candidates = session.scalars(db.select(WaitlistEntry).where(
+        WaitlistEntry.reservation_date == reservation_date,
+        WaitlistEntry.status == 'waiting',
+        WaitlistEntry.earliest_time <= reservation_time,
+        WaitlistEntry.latest_time >= reservation_time,
+        WaitlistEntry.party_size <= table.capacity
+    )).all()
+
+    queue = best_fit_queue(candidates, table.capacity)
+    while queue:
+        entry = heapq.heappop(queue)[-1]
+        # Another worker may have promoted this entry; try the next one
+        if promote_entry(entry, table, reservation_time, session):
+            return entry
+    return None
+
+def promote_for_table(table_id, step_minutes, session=None, holds=None):
+    """
+    Offer every upcoming free slot of a table to the waitlist
+
+    Used when a table comes back into service or gains seats, which frees
+    it for all upcoming slots at once. Entries are served in best-fit
+    order, each taking the earliest free slot in its window.
+
+    Args:
+        table_id (int): Table that became available
+        step_minutes (int): Minutes between slots (TIME_SLOT_DURATION)
+        session (Session, optional): Session to use, defaults to db.session
+        holds (optional): Hold store from holds.py; held slots are left alone
+
+    Returns:
+        list: Promoted WaitlistEntry objects
+    """
+    session = session if session is not None else db.session
+    table = session.get(Table, table_id)
+    if table is None or table.status != 'available':
+        return []
+    capacity = table.capacity
+
+    candidates = session.scalars(db.select(WaitlistEntry).where(
+        WaitlistEntry.reservation_date >= date.today(),
+        WaitlistEntry.status == 'waiting',
+        WaitlistEntry.party_size <= capacity
+    )).all()
+
+    promoted = []
+    queue = best_fit_queue(candidates, capacity)
+    while queue:
+        entry = heapq.heappop(queue)[-1]
+        reservation_date = entry.reservation_date
+        for reservation_time in slot_times(entry.earliest_time, entry.latest_time, step_minutes):
+            if not is_upcoming(reservation_date, reservation_time):
+                continue
+            if holds is not None and table_id in holds.held_tables(reservation_date, reservation_time):
+                continue
+            if table.is_available_at(reservation_date, reservation_time):
+                if promote_entry(entry, table, reservation_time, session):
+                    promoted.append(entry)
+                break
+    return promoted
+
+def match_entry(entry, step_minutes, session=None, holds=None):
+    """
+    Book a new waitlist entry at once if its window still has a free table
+
+    Args:
+        entry (WaitlistEntry): Entry that just joined the waitlist
+        step_minutes (int): Minutes between slots (TIME_SLOT_DURATION)
+        session (Session, optional): Session to use, defaults to db.session
+        holds (optional): Hold store from holds.py; held tables are skipped
+
+    Returns:
+        Reservation: The booking, or None if the entry keeps waiting
+    """
+    reservation_date = entry.reservation_date
+    for reservation_time in slot_times(entry.earliest_time, entry.latest_time, step_minutes):
+        if not is_upcoming(reservation_date, reservation_time):
+            continue
+        held_tables = holds.held_tables(reservation_date, reservation_time) if holds is not None else ()
+        for table in find_available_tables(reservation_date, reservation_time, entry.party_size,
+                                           session=session, exclude_table_ids=held_tables):
+            reservation = promote_entry(entry, table, reservation_time, session)
+            if reservation:
+                return reservation
+    return None
+
+def expire_waitlist(today=None, session=None):
+    """
+    Mark waiting entries for past dates as expired
+
+    Args:
+        today (date, optional): Current date, defaults to date.today()
+        session (Session, optional): Session to use, defaults to db.session
+
+    Returns:
+        int: Number of entries expired
+    """
+    session = session if session is not None else db.session
+    entries = WaitlistEntry.__table__
+    expired = session.execute(entries.update().where(
+        entries.c.status == 'waiting',
+        entries.c.reservation_date < (today or date.today())
+    ).values(status='expired')).rowcount
+    session.commit()
+    return expired